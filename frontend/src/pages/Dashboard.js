@@ -20,19 +20,13 @@ function Dashboard() {
 
   const loadDashboardData = async () => {
     try {
-      const [satisOzeti, kasa, urunler, dusuk, bugunSatis] = await Promise.all([
-        apiService.getSatisOzeti(),
-        apiService.getKasa(),
-        apiService.getUrunler(),
-        apiService.dusukStok(10),
-        apiService.getBugunSatislar()
-      ]);
+      const { data } = await apiService.getDashboard();
 
-      setStats(satisOzeti.data);
-      setKasaBakiye(kasa.data.length > 0 ? parseFloat(kasa.data[0].bakiye) : 0);
-      setToplamUrun(urunler.data.length);
-      setDusukStok(dusuk.data.length);
-      setSonSatislar(bugunSatis.data.slice(0, 5));
+      setStats(data.satis_ozeti);
+      setKasaBakiye(parseFloat(data.kasa_bakiyesi));
+      setToplamUrun(data.urun_sayisi);
+      setDusukStok(data.dusuk_stok_sayisi);
+      setSonSatislar(data.son_satislar);
       setLoading(false);
     } catch (error) {
       console.error('Dashboard yüklenirken hata:', error);
@@ -14,6 +14,9 @@ const api = axios.create({
 
 // API fonksiyonları
 const apiService = {
+  // Dashboard (tüm rakamlar tek istekte)
+  getDashboard: () => api.get('/dashboard/'),
+
   // Kategoriler
   getKategoriler: () => api.get('/kategoriler/'),
   getKategori: (id) => api.get(`/kategoriler/${id}/`),
@@ -23,6 +26,7 @@ const apiService = {
 
   // Ürünler
   getUrunler: () => api.get('/urunler/'),
+  getUrunSayisi: () => api.get('/urunler/sayi/'),
   getUrun: (stokNo) => api.get(`/urunler/${stokNo}/`),
   createUrun: (data) => api.post('/urunler/', data),
   updateUrun: (stokNo, data) => api.put(`/urunler/${stokNo}/`, data),
@@ -34,8 +38,9 @@ const apiService = {
   getSatisFisleri: () => api.get('/satis-fisleri/'),
   getSatisFisi: (id) => api.get(`/satis-fisleri/${id}/`),
   createSatisFisi: (data) => api.post('/satis-fisleri/', data),
-  getBugunSatislar: () => api.get('/satis-fisleri/bugun/'),
+  getBugunSatislar: () => api.get('/satis-fisleri/bugun/?view=ozet'),
   getSatisOzeti: () => api.get('/satis-fisleri/ozet/'),
+  checkout: (kalemler) => api.post('/satis-fisleri/checkout/', { kalemler }),
 
   // Satışlar
   getSatislar: () => api.get('/satislar/'),
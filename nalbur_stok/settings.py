@@ -54,6 +54,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',  # Eklendi
     ],
+    'DEFAULT_PAGINATION_CLASS': 'stok_takip.pagination.StokSayfalama',
     'PAGE_SIZE': 20,
     'DATETIME_FORMAT': '%d/%m/%Y %H:%M:%S',
     'DATE_FORMAT': '%d/%m/%Y',
@@ -158,4 +159,45 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/users/login/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/users/login/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/users/login/'
+
+# Otomatik lot numarasındaki sıra hane sayısı (L20251002-001)
+LOT_NO_HANE = 3
+
+# SKT uyarıları (skt_kontrol komutu): kademeler (gün) ve bildirim kanalları.
+# Kanallar gonder(uyarilar, bugun) metodu olan sınıflardır; alıcı/adres boşsa kanal atlanır
+SKT_UFUKLARI = [7, 30, 90]
+SKT_BILDIRIM_KANALLARI = [
+    'stok_takip.servisler.skt.EpostaKanali',
+    'stok_takip.servisler.skt.WebhookKanali',
+]
+SKT_UYARI_ALICILARI = []  # ör. ['depo@ornek.com']
+SKT_WEBHOOK_URL = ''
+
+# Önbellek: varsayılan yerel bellek; çok işlemli kurulumda paylaşılan bir arka uç
+# (ör. django.core.cache.backends.redis.RedisCache) tanımlanmalı
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Barkod okuyucu yanıtları: en fazla MAX_ENTRIES kayıt (LRU), TIMEOUT saniye
+    'barkod': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'barkod',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Barkod isabet/ıskalama sayaçları: ölçtükleri kayıtlarla birlikte LRU'ya ve
+    # temizliğe uğramasınlar diye ayrı, süresiz ve birkaç anahtarlık önbellekte
+    'barkod_sayac': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'barkod_sayac',
+        'TIMEOUT': None,
+    },
+    # Dashboard rakamları: kısa süreli, satış/kasa yazımlarında ayrıca silinir
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+        'TIMEOUT': 30,
+    },
+}
@@ -1,13 +1,20 @@
 from django.contrib import admin
-from .models import Kategori,Tedarikci,Urun,UrunYerlesimYeri,SatisFiyati,SatisFisi,Satis,TedarikciIade,MusteriIade,Kasa,AlisDetay,AlisFisi,OdemeKasa
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms.models import BaseInlineFormSet
+from .models import Kategori,Tedarikci,Urun,UrunYerlesimYeri,SatisFiyati,SatisFisi,Satis,TedarikciIade,MusteriIade,Kasa,KasaHareketi,KasaOzeti,AlisDetay,AlisFisi,OdemeKasa,GunlukSatisOzet,SktUyarisi,MusteriGrubu,DonemselFiyat
+from .servisler.kasa import kasa_bakiyesi
 from django.db import models
+from django.db.models import Count
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.urls import path
 
 
 
 @admin.register(Kategori)
 class KategoriAdmin(admin.ModelAdmin):
     
-    list_display = ['kategori_adi', 'id']
+    list_display = ['kategori_adi', 'yeniden_siparis_noktasi', 'id']
     search_fields = ['kategori_adi']
     ordering = ['kategori_adi']
     
@@ -25,15 +32,28 @@ class TedarikciAdmin(admin.ModelAdmin):
 @admin.register(Urun)
 class UrunAdmin(admin.ModelAdmin):
     
-    list_display = ['stok_no','urun_adi','kategori','birim','barkod']
+    list_display = ['stok_no','urun_adi','kategori','birim','barkod','toplam_stok']
     search_fields = ['stok_no' , 'urun_adi','kategori__kategori_adi']
     list_filter =['kategori']
+    list_select_related = ['kategori']
+    autocomplete_fields = ['kategori']
+    show_full_result_count = False
+    
+    def get_search_fields(self, request):
+        # Ürün seçici (autocomplete) indeksli ön ek aramasıyla çalışır:
+        # stok_no birincil anahtar, barkod unique, urun_adi urun_adi_idx
+        if request.resolver_match and request.resolver_match.url_name == 'autocomplete':
+            return ['^stok_no', '^barkod', '^urun_adi']
+        return super().get_search_fields(request)
     
     fieldsets = (
        ('Temel Bilgiler',{
            'fields':('stok_no','urun_adi','kategori','birim')
        }),
       
+       ('Stok',{
+           'fields':('yeniden_siparis_noktasi',)
+       }),
        ('Barkod',{
            'fields':('barkod','barkod_resim'),
            'classes':('collapse',)
@@ -52,6 +72,9 @@ class UrunYerlesimYeriAdmin(admin.ModelAdmin):
     list_display = ['get_stok_no', 'get_urun_adi', 'miktar', 'konum', 'lot_no', 'son_kullanma_tarihi', 'skt_durumu']
     search_fields = ['urun__stok_no', 'urun__urun_adi', 'lot_no']
     list_filter = ['konum', 'son_kullanma_tarihi']
+    list_select_related = ['urun']
+    autocomplete_fields = ['urun']
+    show_full_result_count = False
     
     def get_stok_no(self, obj):
         return obj.urun.stok_no
@@ -94,6 +117,9 @@ class SatisFiyatiAdmin(admin.ModelAdmin):
     
     list_display =['get_stok_no','get_urun_adi','alim_fiyati','kar_orani','kdv','iskonto_orani','satis_fiyati']
     search_fields=['urun__stok_no' , 'urun__urun_adi']
+    list_select_related = ['urun']
+    autocomplete_fields = ['urun']
+    show_full_result_count = False
     
     def get_stok_no(self,obj):
         return obj.urun.stok_no
@@ -112,41 +138,77 @@ class SatisFiyatiAdmin(admin.ModelAdmin):
         })
     )
     
+def stok_metni(stok):
+    """Satış satırındaki mevcut stok gösterimi (renk kodlu)"""
+    if stok == 0:
+        ikon = '🔴'
+    elif stok < 5:
+        ikon = '🟠'
+    else:
+        ikon = '🟢'
+    return f'Kalan Mevcut:{ikon} {stok} adet'
+
+
+class EtiketliAutocompleteSelect(AutocompleteSelect):
+    """
+    Seçili kaydın etiketi `etiketler`de ({pk: etiket}) varsa oradan okunur;
+    AutocompleteSelect her form için seçili kaydı ayrı sorguyla çeker.
+    """
+    etiketler = None
+    
+    def optgroups(self, name, value, attr=None):
+        secili = [str(deger) for deger in value if deger not in self.choices.field.empty_values]
+        if self.etiketler is None or not set(secili) <= self.etiketler.keys():
+            return super().optgroups(name, value, attr)
+        secenekler = []
+        if not self.is_required:
+            secenekler.append(self.create_option(name, '', '', False, 0))
+        for pk in secili:
+            secenekler.append(self.create_option(name, pk, self.etiketler[pk], True, len(secenekler)))
+        return [(None, secenekler, 0)]
+
+
+class SatisInlineFormSet(BaseInlineFormSet):
+    """Kayıtlı satırların ürün seçicisi, satırla birlikte yüklenen üründen etiketlenir"""
+    
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        if form.instance.urun_id and Satis.urun.is_cached(form.instance):
+            secici = form.fields['urun'].widget
+            secici = getattr(secici, 'widget', secici)  # RelatedFieldWidgetWrapper
+            secici.etiketler = {str(form.instance.urun_id): str(form.instance.urun)}
+        return form
+
+
 # Inline: Fiş içinde satışları göster
 class SatisInline(admin.TabularInline):
     model = Satis
+    formset = SatisInlineFormSet
     extra = 3
     fields = ['urun', 'get_mevcut_stok', 'miktar', 'birim_fiyat', 'toplam_fiyat']
     readonly_fields = ['get_mevcut_stok', 'birim_fiyat', 'toplam_fiyat']
+    autocomplete_fields = ['urun']
+    
+    class Media:
+        # Ürün seçilince stok sütunu SatisFisiAdmin.stok_durumu'ndan güncellenir
+        js = ['admin/js/jquery.init.js', 'stok_takip/admin/satis_stok.js']
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'urun':
+            kwargs['widget'] = EtiketliAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+    
+    def get_queryset(self, request):
+        # Stok sayacı ve satır başlığı (fiş no, ürün adı) satırlarla aynı sorguda gelir
+        return super().get_queryset(request).select_related('fis', 'urun')
     
     def get_mevcut_stok(self, obj):
-        if obj and obj.urun:
-            try:
-                    # Tüm lotların toplamı
-                toplam_stok = UrunYerlesimYeri.objects.filter(
-                    urun=obj.urun
-                ).aggregate(toplam=models.Sum('miktar'))['toplam'] or 0
-                
-                stok = toplam_stok
-                
-                # Renk kodu
-                if stok == 0:
-                   
-                    ikon = '🔴'
-                elif stok < 5:
-                    
-                    ikon = '🟠'
-                else:
-                   
-                    ikon = '🟢'
-                
-                return f'Kalan Mevcut:{ikon} {stok} adet'
-            except UrunYerlesimYeri.DoesNotExist:
-                return '⚠️ Stok kaydı yok'
+        if obj and obj.urun_id:
+            # Tüm lotların toplamı (ürünün stok sayacı)
+            return stok_metni(obj.urun.toplam_stok)
         return '-'
     
     get_mevcut_stok.short_description = 'Mevcut Stok'
-    get_mevcut_stok.allow_tags = True
 
 
 @admin.register(SatisFisi)
@@ -156,15 +218,42 @@ class SatisFisiAdmin(admin.ModelAdmin):
     search_fields = ['fis_no', 'kullanici__username']
     readonly_fields = ['fis_no', 'toplam_tutar', 'olusturma_tarihi']
     inlines = [SatisInline]
+    list_select_related = ['kullanici']
+    autocomplete_fields = ['kullanici']
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # Satır sayısı her fiş için ayrı count() yerine listeyle aynı sorguda
+        return super().get_queryset(request).annotate(urun_sayisi=Count('satislar'))
     
     def get_urun_sayisi(self, obj):
-        return obj.satislar.count()
+        return obj.urun_sayisi
     get_urun_sayisi.short_description = 'Ürün Çeşidi'
+    get_urun_sayisi.admin_order_field = 'urun_sayisi'
     
     def get_tarih(self, obj):
         return obj.olusturma_tarihi.strftime('%d.%m.%Y %H:%M')
     get_tarih.short_description = 'Satış Tarihi'
     
+    def get_urls(self):
+        return [
+            path('stok/', self.admin_site.admin_view(self.stok_durumu), name='stok_takip_satisfisi_stok'),
+        ] + super().get_urls()
+    
+    def stok_durumu(self, request):
+        """
+        Seçilen ürünlerin mevcut stoku (tek sorgu)
+        URL: /admin/stok_takip/satisfisi/stok/?urun=<stok_no>&urun=...
+        Yanıt: {stok_no: {'stok': adet, 'metin': gösterim}}
+        """
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        urun_idleri = request.GET.getlist('urun')[:100]
+        return JsonResponse({
+            pk: {'stok': stok, 'metin': stok_metni(stok)}
+            for pk, stok in Urun.objects.filter(pk__in=urun_idleri).values_list('pk', 'toplam_stok')
+        })
+    
     fieldsets = (
         ('Fiş Bilgileri', {
             'fields': ('fis_no', 'kullanici', 'olusturma_tarihi')
@@ -182,6 +271,9 @@ class SatisAdmin(admin.ModelAdmin):
     search_fields = ['fis__fis_no', 'urun__urun_adi', 'urun__stok_no']
     readonly_fields = ['birim_fiyat', 'toplam_fiyat']
     ordering = ['-fis__fis_no']
+    list_select_related = ['fis', 'urun']
+    autocomplete_fields = ['fis', 'urun']
+    show_full_result_count = False
     
     def get_fis_no(self, obj):
         return f"Fiş #{obj.fis.fis_no}"
@@ -215,6 +307,8 @@ class TedarikciIadeAdmin(admin.ModelAdmin):
     list_filter = ['durum', 'iade_tarihi', 'tedarikci']
     search_fields = ['urun__urun_adi', 'urun__stok_no', 'iade_nedeni']
     readonly_fields = ['iade_tarihi']
+    list_select_related = ['urun', 'tedarikci']
+    autocomplete_fields = ['urun', 'yerlesim', 'tedarikci']
     
     def get_iade_no(self, obj):
         return f"İADE-{obj.pk:04d}"
@@ -253,6 +347,8 @@ class MusteriIadeAdmin(admin.ModelAdmin):
     list_filter = ['durum', 'cozum_tipi', 'iade_tarihi']
     search_fields = ['urun__urun_adi', 'urun__stok_no', 'iade_nedeni']
     readonly_fields = ['iade_tarihi']
+    list_select_related = ['urun']
+    autocomplete_fields = ['satis', 'urun']
     
     def get_iade_no(self, obj):
         return f"M-İADE-{obj.pk:04d}"
@@ -286,7 +382,11 @@ class MusteriIadeAdmin(admin.ModelAdmin):
     
 @admin.register(Kasa)
 class KasaAdmin(admin.ModelAdmin):
-    list_display = ['bakiye', 'son_guncelleme']
+    list_display = ['get_guncel_bakiye', 'bakiye', 'son_guncelleme']
+    
+    def get_guncel_bakiye(self, obj):
+        return f"{kasa_bakiyesi()} TL"
+    get_guncel_bakiye.short_description = 'Güncel Bakiye'
     
     def has_add_permission(self, request):
         # Tek kayıt varsa ekleme izni yok
@@ -298,12 +398,90 @@ class KasaAdmin(admin.ModelAdmin):
     
     
     
+@admin.register(KasaHareketi)
+class KasaHareketiAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tip', 'tutar', 'aciklama', 'islem_tarihi']
+    list_filter = ['tip', 'islem_tarihi']
+    search_fields = ['aciklama']
+    show_full_result_count = False
+    
+    # Defter sadece eklenerek büyür; düzeltme için Kasa açılış bakiyesi kullanılır
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(KasaOzeti)
+class KasaOzetiAdmin(admin.ModelAdmin):
+    list_display = ['son_hareket_id', 'bakiye', 'olusturma_tarihi']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+
+@admin.register(GunlukSatisOzet)
+class GunlukSatisOzetAdmin(admin.ModelAdmin):
+    list_display = ['tarih', 'urun', 'kategori', 'miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi']
+    list_filter = ['tarih', 'kategori']
+    list_select_related = ['urun', 'kategori']
+    date_hierarchy = 'tarih'
+    show_full_result_count = False
+    
+    # Satış ve iadelerden türetilir; düzeltme için gunluk_ozet_olustur komutu kullanılır
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    
+@admin.register(SktUyarisi)
+class SktUyarisiAdmin(admin.ModelAdmin):
+    list_display = ['lot', 'kademe', 'son_kullanma_tarihi', 'bildirim_tarihi']
+    list_filter = ['kademe', 'bildirim_tarihi']
+    list_select_related = ['lot__urun']
+    show_full_result_count = False
+    
+    # skt_kontrol komutu yazar; silinen kayıt bir sonraki çalıştırmada yeniden bildirilir
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MusteriGrubu)
+class MusteriGrubuAdmin(admin.ModelAdmin):
+    list_display = ['ad']
+    search_fields = ['ad']
+
+
+@admin.register(DonemselFiyat)
+class DonemselFiyatAdmin(admin.ModelAdmin):
+    list_display = ['urun', 'musteri_grubu', 'satis_fiyati', 'gecerlilik_baslangic', 'gecerlilik_bitis']
+    list_filter = ['musteri_grubu', 'gecerlilik_baslangic']
+    list_select_related = ['urun', 'musteri_grubu']
+    search_fields = ['urun__urun_adi', 'urun__stok_no']
+    autocomplete_fields = ['urun', 'musteri_grubu']
+    date_hierarchy = 'gecerlilik_baslangic'
+
+
 # Alış Detay Inline
 class AlisDetayInline(admin.TabularInline):
     model = AlisDetay
     extra = 3
     fields = ['urun', 'miktar', 'birim_fiyat', 'toplam_fiyat', 'konum', 'son_kullanma_tarihi']
     readonly_fields = ['toplam_fiyat']
+    autocomplete_fields = ['urun']
 
 
 @admin.register(AlisFisi)
@@ -313,10 +491,16 @@ class AlisFisiAdmin(admin.ModelAdmin):
     search_fields = ['fis_no', 'lot_no']
     readonly_fields = ['lot_no', 'toplam_tutar', 'kayit_tarihi']
     inlines = [AlisDetayInline]
+    list_select_related = ['tedarikci']
+    autocomplete_fields = ['tedarikci', 'kullanici']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(urun_sayisi=Count('detaylar'))
     
     def get_urun_sayisi(self, obj):
-        return obj.detaylar.count()
+        return obj.urun_sayisi
     get_urun_sayisi.short_description = 'Ürün Çeşidi'
+    get_urun_sayisi.admin_order_field = 'urun_sayisi'
     
     fieldsets = (
         ('Fiş Bilgileri', {
@@ -334,6 +518,9 @@ class AlisDetayAdmin(admin.ModelAdmin):
     list_filter = ['fis__fis_tarihi']
     search_fields = ['fis__fis_no', 'urun__urun_adi']
     readonly_fields = ['toplam_fiyat']
+    list_select_related = ['fis', 'urun']
+    autocomplete_fields = ['fis', 'urun']
+    show_full_result_count = False
     
     def get_fis_no(self, obj):
         return obj.fis.fis_no
@@ -345,6 +532,8 @@ class OdemeKasaAdmin(admin.ModelAdmin):
     list_filter = ['odeme_tipi', 'odeme_tarihi']
     search_fields = ['aciklama']
     readonly_fields = ['islem_tarihi']
+    list_select_related = ['kullanici']
+    autocomplete_fields = ['kullanici']
     
     def get_odeme_no(self, obj):
         return f"OD-{obj.pk:04d}"
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StokTakipConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stok_takip'
+
+    def ready(self):
+        from . import signals  # noqa: F401
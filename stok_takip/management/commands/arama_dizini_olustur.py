@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from stok_takip.servisler.arama import arama_dizinini_yeniden_olustur
+
+
+class Command(BaseCommand):
+    help = 'Ürün arama dizinini (UrunAramaTerimi) tüm ürünlerden yeniden kurar'
+
+    def handle(self, *args, **options):
+        # Toplu ürün yüklemeleri (bulk_create) sinyal üretmez; sonrasında çalıştırılır
+        with transaction.atomic():
+            sayi = arama_dizinini_yeniden_olustur()
+        self.stdout.write(self.style.SUCCESS(f'✅ {sayi} ürün dizinlendi'))
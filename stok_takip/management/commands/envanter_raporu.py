@@ -1,33 +1,81 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Sum
-from stok_takip.models import Urun, UrunYerlesimYeri
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from stok_takip.servisler.envanter import (
+    SAYFA_BOYUTU, csv_parcalari, envanter_lotlari, envanter_satirlari, json_parcalari, urunlere_grupla
+)
 from datetime import date
 
 
 class Command(BaseCommand):
-    help = 'Envanter raporu oluşturur'
+    help = 'Envanter raporu oluşturur (metin, CSV veya JSON; stoktaki lotlar)'
+
+    # Kaç lotta bir ilerleme yazılır
+    ILERLEME_ARALIGI = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['metin', 'csv', 'json'], default='metin', help='Çıktı biçimi')
+        parser.add_argument('--kategori', help='Kategori id veya adı')
+        parser.add_argument('--konum', help='Konum öneki (ör. A- ile A rafı)')
+        parser.add_argument('--output', help='Çıktı dosyası (verilmezse ekrana yazılır)')
+        parser.add_argument('--parca', type=int, default=SAYFA_BOYUTU, help='Veritabanından tek seferde okunan lot sayısı')
 
     def handle(self, *args, **options):
+        if options['parca'] < 1:
+            raise CommandError('--parca en az 1 olmalı')
+
+        self.lot_sayisi = 0
+        satirlar = self.say(envanter_satirlari(options['kategori'], options['konum'], sayfa_boyutu=options['parca']))
+
+        # İlerleme yalnızca dosyaya yazarken gösterilir (ekran çıktısına karışmasın)
+        if options['output'] and options['verbosity'] >= 1:
+            toplam = envanter_lotlari(options['kategori'], options['konum']).count()
+            satirlar = self.ilerleme_goster(satirlar, toplam)
+
+        if options['format'] == 'metin':
+            parcalar = self.metin_parcalari(satirlar, renkli=not options['output'])
+        else:
+            parcalar = {'csv': csv_parcalari, 'json': json_parcalari}[options['format']](satirlar)
+
+        if not options['output']:
+            for parca in parcalar:
+                self.stdout.write(parca, ending='')
+            return
+
+        baslangic = time.perf_counter()
+        with open(options['output'], 'w', encoding='utf-8', newline='') as dosya:
+            for parca in parcalar:
+                dosya.write(parca)
+        sure = time.perf_counter() - baslangic
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ {self.lot_sayisi} lot {options['output']} dosyasına yazıldı ({sure:.1f} sn)"
+        ))
+
+    def say(self, satirlar):
+        for satir in satirlar:
+            self.lot_sayisi += 1
+            yield satir
+
+    def ilerleme_goster(self, satirlar, toplam):
+        for sira, satir in enumerate(satirlar, 1):
+            yield satir
+            if sira % self.ILERLEME_ARALIGI == 0:
+                self.stderr.write(f'  {sira}/{toplam} lot', ending='\r')
+        self.stderr.write('')
+
+    def metin_parcalari(self, satirlar, renkli=True):
         bugun = date.today()
-        
-        self.stdout.write(self.style.WARNING('\n' + '='*80))
-        self.stdout.write(self.style.WARNING(f'ENVANTER RAPORU - {bugun.strftime("%B %Y")}'))
-        self.stdout.write(self.style.WARNING('='*80 + '\n'))
-        
-        # Tüm ürünleri al
-        urunler = Urun.objects.all()
-        
-        for urun in urunler:
-            # Bu ürünün tüm lotlarını al
-            lotlar = UrunYerlesimYeri.objects.filter(urun=urun)
-            
-            if lotlar.exists():
-                toplam_miktar = lotlar.aggregate(toplam=Sum('miktar'))['toplam'] or 0
-                
-                self.stdout.write(f"\n{urun.stok_no} - {urun.urun_adi}")
-                self.stdout.write(f"  Toplam: {toplam_miktar} {urun.birim}")
-                
-                for lot in lotlar:
-                    self.stdout.write(f"    • Lot: {lot.lot_no}, Konum: {lot.konum}, Miktar: {lot.miktar}")
-        
-        self.stdout.write(self.style.WARNING('\n' + '='*80 + '\n'))
\ No newline at end of file
+        uyari = self.style.WARNING if renkli else str
+
+        yield uyari('\n' + '='*80) + '\n'
+        yield uyari(f'ENVANTER RAPORU - {bugun.strftime("%B %Y")}') + '\n'
+        yield uyari('='*80 + '\n') + '\n'
+
+        for grup in urunlere_grupla(satirlar):
+            urun = grup['urun']
+            yield f"\n{urun['stok_no']} - {urun['urun_adi']}\n"
+            yield f"  Toplam: {urun['toplam_stok']} {urun['birim']}\n"
+            for lot in grup['lotlar']:
+                yield f"    • Lot: {lot['lot_no']}, Konum: {lot['konum']}, Miktar: {lot['miktar']}\n"
+
+        yield uyari('\n' + '='*80 + '\n') + '\n'
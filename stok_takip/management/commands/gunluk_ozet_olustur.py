@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from stok_takip.servisler.gunluk_ozet import gunluk_ozeti_yeniden_olustur
+
+
+class Command(BaseCommand):
+    help = 'Günlük satış özetini satış ve iade kayıtlarından yeniden oluşturur (ilk kurulum veya düzeltme)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baslangic', type=date.fromisoformat, help='İlk gün (YYYY-AA-GG), verilmezse en baştan')
+        parser.add_argument('--bitis', type=date.fromisoformat, help='Son gün (YYYY-AA-GG, dahil), verilmezse bugüne kadar')
+
+    def handle(self, *args, **options):
+        baslangic = options['baslangic']
+        bitis = options['bitis']
+        if baslangic and bitis and baslangic > bitis:
+            raise CommandError('--baslangic, --bitis tarihinden sonra olamaz')
+        
+        satir_sayisi = gunluk_ozeti_yeniden_olustur(baslangic, bitis)
+        
+        aralik = f"{baslangic or 'başlangıç'} - {bitis or 'bugün'}"
+        self.stdout.write(self.style.SUCCESS(f'✅ Günlük satış özeti oluşturuldu ({aralik}): {satir_sayisi} satır'))
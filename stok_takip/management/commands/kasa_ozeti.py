@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from stok_takip.servisler.kasa import kasa_ozeti_al, kasa_bakiyesi
+
+
+class Command(BaseCommand):
+    help = 'Kasa defterinin bakiye özetini alır (periyodik çalıştırılmalı, örn. cron ile saatlik)'
+
+    def handle(self, *args, **options):
+        ozet = kasa_ozeti_al()
+        
+        if ozet:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Özet #{ozet.pk} alındı: {ozet.hareketler.count()} hareket, bakiye {ozet.bakiye} TL'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING('Özete eklenecek yeni hareket yok'))
+        
+        self.stdout.write(f'Güncel kasa bakiyesi: {kasa_bakiyesi()} TL')
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from stok_takip.servisler.maliyet import maliyetleri_yeniden_hesapla
+
+
+class Command(BaseCommand):
+    help = (
+        'Ürünlerin hareketli ortalama maliyetini alış/satış/iade geçmişinden yeniden hesaplar ve '
+        'sapmaları raporlar. Elle/admin/API ile açılan lotlar geçmişte görünmez; stoğu alış '
+        'fişleriyle açıklanamayan ürünler atlanır'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duzelt',
+            action='store_true',
+            help='Sapan ortalamaları hesaplananla değiştir (varsayılan: sadece raporla)'
+        )
+        parser.add_argument(
+            '--fiyatlari-guncelleme',
+            action='store_true',
+            help='Düzeltmede satış fiyatlarına aktarma, sadece maliyetleri güncelle'
+        )
+
+    def handle(self, *args, **options):
+        sapmalar, atlananlar = maliyetleri_yeniden_hesapla(
+            duzelt=options['duzelt'],
+            fiyatlari_guncelle=not options['fiyatlari_guncelleme']
+        )
+
+        for stok_no, kayitli, hesaplanan in sapmalar:
+            self.stdout.write(self.style.ERROR(f'  • {stok_no}: kayıtlı {kayitli}, geçmişten {hesaplanan}'))
+        for stok_no, sayac, oynatilan in atlananlar:
+            self.stdout.write(self.style.WARNING(
+                f'  • {stok_no}: atlandı, stok sayacı {sayac} ama alış/satış geçmişi {oynatilan} veriyor'
+            ))
+
+        if not sapmalar:
+            self.stdout.write(self.style.SUCCESS('✅ Hesaplanabilen tüm ortalama maliyetler geçmişle uyumlu'))
+        elif options['duzelt']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(sapmalar)} ürünün ortalama maliyeti güncellendi'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {len(sapmalar)} ürünün ortalama maliyeti farklı (düzeltmek için --duzelt)'
+            ))
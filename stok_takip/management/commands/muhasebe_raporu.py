@@ -1,78 +1,70 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Sum
-from stok_takip.models import Kasa, SatisKasa, AlisFisi, OdemeKasa
-from datetime import date, datetime
-from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from stok_takip.servisler.kasa import kasa_bakiyesi
+from stok_takip.servisler.muhasebe import aylik_raporlar, donem_raporu
+from datetime import date, timedelta
 
 
 class Command(BaseCommand):
     help = 'Aylık muhasebe raporu'
-    
+
     def add_arguments(self, parser):
         parser.add_argument('--ay', type=int, help='Ay (1-12)')
         parser.add_argument('--yil', type=int, help='Yıl')
+        parser.add_argument('--ay-sayisi', type=int, default=1, help='Seçilen ay ve önceki aylar yan yana (1-12)')
+        parser.add_argument('--baslangic', type=date.fromisoformat, help='Aralık başı (YYYY-AA-GG)')
+        parser.add_argument('--bitis', type=date.fromisoformat, help='Aralık sonu (YYYY-AA-GG, dahil)')
 
     def handle(self, *args, **options):
-        ay = options.get('ay') or date.today().month
-        yil = options.get('yil') or date.today().year
-        
-        # Ay başı ve sonu
-        ay_basi = datetime(yil, ay, 1)
-        if ay == 12:
-            ay_sonu = datetime(yil + 1, 1, 1)
+        if bool(options['baslangic']) != bool(options['bitis']):
+            raise CommandError('--baslangic ve --bitis birlikte verilmeli')
+        if not 1 <= options['ay_sayisi'] <= 12:
+            raise CommandError('--ay-sayisi 1 ile 12 arasında olmalı')
+
+        if options['baslangic']:
+            raporlar = [donem_raporu(options['baslangic'], options['bitis'] + timedelta(days=1))]
+            baslik = f"{options['baslangic'].strftime('%d.%m.%Y')} - {options['bitis'].strftime('%d.%m.%Y')}"
         else:
-            ay_sonu = datetime(yil, ay + 1, 1)
-        
+            ay = options.get('ay') or date.today().month
+            yil = options.get('yil') or date.today().year
+
+            # Seçilen ay ve ondan önceki ay_sayisi - 1 ay
+            ilk_ay = (yil * 12 + ay - 1) - (options['ay_sayisi'] - 1)
+            raporlar = aylik_raporlar(date(ilk_ay // 12, ilk_ay % 12 + 1, 1), options['ay_sayisi'])
+            baslik = raporlar[-1].baslangic.strftime('%B %Y')
+
+        rapor = raporlar[-1]
+
         self.stdout.write(self.style.WARNING('\n' + '='*80))
-        self.stdout.write(self.style.WARNING(f'MUHASEBE RAPORU - {ay_basi.strftime("%B %Y")}'))
+        self.stdout.write(self.style.WARNING(f'MUHASEBE RAPORU - {baslik}'))
         self.stdout.write(self.style.WARNING('='*80 + '\n'))
-        
-        # Kasa bakiye
-        kasa = Kasa.objects.first()
-        self.stdout.write(self.style.SUCCESS(f"\nGÜNCEL KASA BAKİYESİ: {kasa.bakiye} TL\n"))
-        
-        # Satış toplamı
-        satislar = SatisKasa.objects.filter(
-            islem_tarihi__gte=ay_basi,
-            islem_tarihi__lt=ay_sonu
-        )
-        satis_toplam = satislar.aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-        
+
+        # Kasa bakiye (kasa defterinden)
+        self.stdout.write(self.style.SUCCESS(f"\nGÜNCEL KASA BAKİYESİ: {kasa_bakiyesi()} TL\n"))
+
+        # Satış toplamı (günlük satış özetinden; brüt, müşteri iadeleri düşülmeden)
         self.stdout.write(self.style.SUCCESS(f"GELİRLER:"))
-        self.stdout.write(f"  Satış Geliri: {satis_toplam} TL ({satislar.count()} işlem)")
-        
+        self.stdout.write(f"  Satış Geliri: {rapor.satis_toplam} TL ({rapor.satis_adet} işlem)")
+
         # Giderler
         self.stdout.write(self.style.ERROR(f"\nGİDERLER:"))
-        
-        # Alış giderleri
-        alislar = AlisFisi.objects.filter(
-            fis_tarihi__gte=ay_basi.date(),
-            fis_tarihi__lt=ay_sonu.date()
-        )
-        alis_toplam = alislar.aggregate(toplam=Sum('toplam_tutar'))['toplam'] or Decimal('0.00')
-        self.stdout.write(f"  Alış: {alis_toplam} TL ({alislar.count()} fiş)")
-        
-        # Ödemeler
-        odemeler = OdemeKasa.objects.filter(
-            odeme_tarihi__gte=ay_basi.date(),
-            odeme_tarihi__lt=ay_sonu.date()
-        )
-        
-        for odeme_tip in OdemeKasa.ODEME_TIP:
-            tip_kod = odeme_tip[0]
-            tip_adi = odeme_tip[1]
-            tip_toplam = odemeler.filter(odeme_tipi=tip_kod).aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-            if tip_toplam > 0:
-                self.stdout.write(f"  {tip_adi}: {tip_toplam} TL")
-        
-        odeme_toplam = odemeler.aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-        
+        self.stdout.write(f"  Alış: {rapor.alis_toplam} TL ({rapor.alis_adet} fiş)")
+        for odeme in rapor.odeme_detay:
+            self.stdout.write(f"  {odeme['tip']}: {odeme['tutar']} TL")
+
         # Özet
-        toplam_gider = alis_toplam + odeme_toplam
-        net_kar = satis_toplam - toplam_gider
-        
         self.stdout.write(self.style.WARNING(f"\n{'='*80}"))
-        self.stdout.write(f"TOPLAM GELİR: {satis_toplam} TL")
-        self.stdout.write(f"TOPLAM GİDER: {toplam_gider} TL")
-        self.stdout.write(self.style.SUCCESS(f"NET KAR/ZARAR: {net_kar} TL"))
-        self.stdout.write(self.style.WARNING('='*80 + '\n'))
\ No newline at end of file
+        self.stdout.write(f"TOPLAM GELİR: {rapor.satis_toplam} TL")
+        self.stdout.write(f"TOPLAM GİDER: {rapor.toplam_gider} TL")
+        self.stdout.write(self.style.SUCCESS(f"NET KAR/ZARAR: {rapor.net_kar} TL"))
+        self.stdout.write(self.style.WARNING('='*80 + '\n'))
+
+        # Aylık karşılaştırma
+        if len(raporlar) > 1:
+            self.stdout.write(self.style.WARNING('AYLIK KARŞILAŞTIRMA'))
+            self.stdout.write(f"  {'Ay':<10} {'Gelir':>14} {'Alış':>14} {'Diğer Gider':>14} {'Net':>14}")
+            for donem in raporlar:
+                self.stdout.write(
+                    f"  {donem.baslangic.strftime('%m.%Y'):<10} {donem.satis_toplam:>14} {donem.alis_toplam:>14} "
+                    f"{donem.odeme_toplam:>14} {donem.net_kar:>14}"
+                )
+            self.stdout.write(self.style.WARNING('='*80 + '\n'))
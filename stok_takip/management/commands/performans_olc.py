@@ -0,0 +1,306 @@
+import os
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+from decimal import Decimal
+
+from stok_takip.models import (
+    Kategori, Urun, UrunYerlesimYeri, SatisFiyati, SatisFisi, Satis, Kasa, KasaHareketi,
+    AlisFisi, AlisDetay, Tedarikci
+)
+
+
+class GeriAl(Exception):
+    """Ölçüm verisini veritabanında bırakmamak için transaction'ı geri alır"""
+
+
+class Command(BaseCommand):
+    help = 'Performans ölçümleri (tüm veriler işlem sonunda geri alınır)'
+
+    SENARYOLAR = ['fifo', 'kasa', 'alis', 'sepet', 'envanter', 'arama']
+    # Birden çok bağlantıyla çalışan senaryolar; her iş parçacığı kendi transaction'ını geri alır
+    ESZAMANLI_SENARYOLAR = ['kasa']
+
+    def add_arguments(self, parser):
+        parser.add_argument('senaryo', choices=self.SENARYOLAR, help='Ölçülecek senaryo')
+        parser.add_argument('--tekrar', type=int, default=5, help='Her ölçümün tekrar sayısı')
+        parser.add_argument('--kasiyer', type=int, default=8, help='Eşzamanlı senaryolarda iş parçacığı sayısı')
+        parser.add_argument('--urun', type=int, default=100000, help='envanter/arama senaryolarında ürün sayısı (envanterde her biri bir lotlu)')
+
+    def handle(self, *args, **options):
+        self.tekrar = options['tekrar']
+        if self.tekrar < 1:
+            raise CommandError('--tekrar en az 1 olmalı')
+
+        self.kasiyer = options['kasiyer']
+        self.urun_sayisi = options['urun']
+
+        self.stdout.write(self.style.WARNING(f"\nPERFORMANS: {options['senaryo']}"))
+        self.stdout.write(self.style.WARNING('=' * 60))
+
+        if options['senaryo'] in self.ESZAMANLI_SENARYOLAR:
+            getattr(self, f"olc_{options['senaryo']}")()
+            self.stdout.write(self.style.WARNING('=' * 60 + '\n'))
+            return
+
+        try:
+            with transaction.atomic():
+                self.kullanici = User.objects.create_user('_performans_olc')
+                self.kategori = Kategori.objects.create(kategori_adi='_performans_olc')
+                getattr(self, f"olc_{options['senaryo']}")()
+                raise GeriAl
+        except GeriAl:
+            pass
+
+        self.stdout.write(self.style.WARNING('=' * 60 + '\n'))
+
+    def olc(self, etiket, hazirla, islem):
+        """islem()'i tekrar sayısı kadar çalıştırır; ortalama süre ve sorgu sayısını yazar"""
+        sureler = []
+        sorgu_sayisi = 0
+        for _ in range(self.tekrar):
+            veri = hazirla()
+            with CaptureQueriesContext(connection) as sorgular:
+                baslangic = time.perf_counter()
+                islem(veri)
+                sureler.append(time.perf_counter() - baslangic)
+            sorgu_sayisi = len(sorgular)
+
+        ortalama_ms = sum(sureler) / len(sureler) * 1000
+        self.stdout.write(f'  {etiket:<30} {ortalama_ms:8.2f} ms  {sorgu_sayisi:5d} sorgu')
+
+    def urun_olustur(self, lot_sayisi, lot_miktari):
+        sira = Urun.objects.filter(kategori=self.kategori).count()
+        urun = Urun.objects.create(
+            stok_no=f'PERF{sira:08d}',
+            barkod=f'9{sira:012d}',
+            urun_adi=f'Performans {sira}',
+            kategori=self.kategori,
+        )
+        UrunYerlesimYeri.objects.bulk_create([
+            UrunYerlesimYeri(urun=urun, miktar=lot_miktari, konum='PERF', lot_no=f'PERF-{sira}-{i}')
+            for i in range(lot_sayisi)
+        ])
+        SatisFiyati.objects.create(
+            urun=urun, alim_fiyati=Decimal('10.00'), kar_orani=Decimal('25.00'), satis_fiyati=0
+        )
+        return urun
+
+    def olc_fifo(self):
+        """500 adetlik satışın farklı sayıda lota yayılması"""
+        for lot_sayisi in (1, 10, 100, 500):
+            lot_miktari = 500 // lot_sayisi
+
+            def hazirla():
+                urun = self.urun_olustur(lot_sayisi, lot_miktari)
+                fis = SatisFisi.objects.create(kullanici=self.kullanici)
+                return urun, fis
+
+            def sat(veri):
+                urun, fis = veri
+                Satis.objects.create(fis=fis, urun=urun, miktar=Decimal('500'))
+
+            self.olc(f'500 adet / {lot_sayisi} lot', hazirla, sat)
+
+    def olc_alis(self):
+        """Mal kabul: farklı satır sayılı alış faturası (her satır ayrı ürün, 20 mevcut lot)"""
+        tedarikci = Tedarikci.objects.create(firma_adi='_performans_olc')
+        for satir_sayisi in (1, 10, 50):
+
+            def hazirla():
+                urunler = [self.urun_olustur(20, 10) for _ in range(satir_sayisi)]
+                fis = AlisFisi.objects.create(
+                    fis_no=f'PERF-{AlisFisi.objects.count()}', tedarikci=tedarikci,
+                    fis_tarihi=date.today(), kullanici=self.kullanici
+                )
+                return fis, urunler
+
+            def kabul_et(veri):
+                fis, urunler = veri
+                for urun in urunler:
+                    AlisDetay.objects.create(
+                        fis=fis, urun=urun, miktar=10, birim_fiyat=Decimal('12.00'), konum='PERF'
+                    )
+
+            self.olc(f'{satir_sayisi} satırlık alış faturası', hazirla, kabul_et)
+
+    def olc_sepet(self):
+        """POS ödemesi: satır satır Satis kaydı ve tek seferde checkout (1/10/100 satır)"""
+        from stok_takip.servisler.satis import sepeti_sat
+
+        for satir_sayisi in (1, 10, 100):
+
+            def hazirla():
+                return [self.urun_olustur(5, 10) for _ in range(satir_sayisi)]
+
+            def satir_satir(urunler):
+                fis = SatisFisi.objects.create(kullanici=self.kullanici)
+                for urun in urunler:
+                    Satis.objects.create(fis=fis, urun=urun, miktar=Decimal('12'))
+
+            def checkout(urunler):
+                sepeti_sat(self.kullanici, [(urun.pk, 12) for urun in urunler])
+
+            self.olc(f'eski: {satir_sayisi} satır tek tek', hazirla, satir_satir)
+            self.olc(f'yeni: {satir_sayisi} satır checkout', hazirla, checkout)
+
+    # envanter_raporu komutunun 100.000 ürünlük depoda hedef süresi (saniye, format başına)
+    ENVANTER_HEDEF_SN = 15
+
+    def olc_envanter(self):
+        """envanter_raporu komutu: --urun kadar tek lotlu ürünün metin/CSV/JSON dökümü"""
+        urunler = Urun.objects.bulk_create([
+            Urun(
+                stok_no=f'PERF{sira:08d}', barkod=f'9{sira:012d}', urun_adi=f'Performans {sira}',
+                kategori=self.kategori, toplam_stok=10,
+            )
+            for sira in range(self.urun_sayisi)
+        ], batch_size=2000)
+        UrunYerlesimYeri.objects.bulk_create([
+            UrunYerlesimYeri(urun=urun, miktar=10, konum='PERF', lot_no=f'PERF-{sira}')
+            for sira, urun in enumerate(urunler)
+        ], batch_size=2000)
+
+        hedef_sn = self.ENVANTER_HEDEF_SN * self.urun_sayisi / 100000
+        for bicim in ('metin', 'csv', 'json'):
+            baslangic = time.perf_counter()
+            with open(os.devnull, 'w') as cikti:
+                call_command('envanter_raporu', format=bicim, kategori=self.kategori.pk, stdout=cikti)
+            sure = time.perf_counter() - baslangic
+            durum = self.style.SUCCESS('hedefte') if sure <= hedef_sn else self.style.ERROR('hedef aşıldı')
+            self.stdout.write(
+                f'  {bicim + ": " + str(self.urun_sayisi) + " lot":<30} {sure:8.2f} sn  '
+                f'(hedef {hedef_sn:.1f} sn, {durum})'
+            )
+
+    # /api/urunler/ara/ için 100.000 ürünlük katalogda p95 hedefi (milisaniye)
+    ARAMA_HEDEF_P95_MS = 100
+    ARAMA_KELIMELERI = [
+        'vida', 'civata', 'somun', 'pul', 'dubel', 'çivi', 'matkap', 'ucu', 'tornavida', 'pense',
+        'çekiç', 'şerit', 'metre', 'silikon', 'köpük', 'boya', 'fırça', 'rulo', 'zımpara', 'kablo',
+        'priz', 'anahtar', 'ampul', 'bant', 'yapıştırıcı', 'menteşe', 'kilit', 'kulp', 'galvaniz', 'çelik',
+    ]
+
+    def olc_arama(self):
+        """Ürün arama API'si: --urun kadar ürünlü katalogda karışık sorguların gecikme dağılımı"""
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from stok_takip.servisler.arama import arama_dizinini_yeniden_olustur
+        from stok_takip.viewsets import UrunViewSet
+
+        rastgele = random.Random(7)
+        kategoriler = [self.kategori] + [
+            Kategori.objects.create(kategori_adi=f'_performans_olc {ad}') for ad in ('Hırdavat', 'Elektrik', 'Boya', 'Bahçe')
+        ]
+        Urun.objects.bulk_create([
+            Urun(
+                stok_no=f'PERF{sira:08d}', barkod=f'9{sira:012d}', kategori=rastgele.choice(kategoriler),
+                urun_adi=' '.join(rastgele.sample(self.ARAMA_KELIMELERI, 3)).title() + f' {rastgele.randint(1, 200)}x{rastgele.randint(1, 200)}',
+            )
+            for sira in range(self.urun_sayisi)
+        ], batch_size=2000)
+
+        baslangic = time.perf_counter()
+        arama_dizinini_yeniden_olustur()
+        self.stdout.write(f'  {"dizin: " + str(self.urun_sayisi) + " ürün":<30} {time.perf_counter() - baslangic:8.2f} sn')
+
+        sorgular = []
+        for _ in range(self.tekrar * 40):
+            kelime = rastgele.choice(self.ARAMA_KELIMELERI)
+            sorgular.append(rastgele.choice([
+                kelime[:rastgele.randint(2, len(kelime))].upper(),
+                f'{kelime} {rastgele.choice(self.ARAMA_KELIMELERI)[:3]}',
+                f'PERF{rastgele.randrange(self.urun_sayisi):08d}'[:rastgele.randint(6, 12)],
+                f'9{rastgele.randrange(self.urun_sayisi):012d}',
+            ]))
+
+        fabrika = APIRequestFactory()
+        gorunum = UrunViewSet.as_view({'get': 'ara'})
+        sureler = []
+        for sorgu in sorgular:
+            istek = fabrika.get('/api/urunler/ara/', {'q': sorgu})
+            force_authenticate(istek, user=self.kullanici)
+            baslangic = time.perf_counter()
+            yanit = gorunum(istek)
+            yanit.render()
+            sureler.append((time.perf_counter() - baslangic) * 1000)
+
+        sureler.sort()
+        p50 = sureler[len(sureler) // 2]
+        p95 = sureler[min(len(sureler) - 1, int(len(sureler) * 0.95))]
+        durum = self.style.SUCCESS('hedefte') if p95 <= self.ARAMA_HEDEF_P95_MS else self.style.ERROR('hedef aşıldı')
+        self.stdout.write(
+            f'  {str(len(sureler)) + " sorgu":<30} p50 {p50:6.1f} ms  p95 {p95:6.1f} ms  '
+            f'(hedef p95 {self.ARAMA_HEDEF_P95_MS} ms, {durum})'
+        )
+
+    def olc_eszamanli(self, etiket, islem, islem_suresi=0.005):
+        """
+        --kasiyer iş parçacığı islem()'i --tekrar kez çalıştırır. Her çağrı kendi
+        transaction'ında yapılır, satışın geri kalanını temsilen islem_suresi
+        kadar bekler ve geri alınır; tutulan satır kilitleri ölçüme yansır.
+        """
+        baslat = threading.Barrier(self.kasiyer + 1)
+        hatalar = []
+
+        def kasiyer():
+            try:
+                baslat.wait()
+                for _ in range(self.tekrar):
+                    try:
+                        with transaction.atomic():
+                            islem()
+                            time.sleep(islem_suresi)
+                            raise GeriAl
+                    except GeriAl:
+                        pass
+            except Exception as hata:
+                hatalar.append(hata)
+            finally:
+                connections.close_all()
+
+        kasiyerler = [threading.Thread(target=kasiyer) for _ in range(self.kasiyer)]
+        for t in kasiyerler:
+            t.start()
+        baslat.wait()
+        baslangic = time.perf_counter()
+        for t in kasiyerler:
+            t.join()
+        sure = time.perf_counter() - baslangic
+
+        if hatalar:
+            raise CommandError(f'{etiket}: {hatalar[0]}')
+        islem_sayisi = self.kasiyer * self.tekrar
+        self.stdout.write(
+            f'  {etiket:<30} {islem_sayisi / sure:8.1f} işlem/sn  ({self.kasiyer} kasiyer, {islem_sayisi} işlem)'
+        )
+
+    def olc_kasa(self):
+        """Eşzamanlı satışların kasa yazımı: tek bakiye satırı ve kasa defteri"""
+        if not connection.features.has_select_for_update:
+            self.stdout.write(self.style.ERROR('  Bu ölçüm satır kilidi destekleyen bir veritabanı gerektirir (MySQL vb.)'))
+            return
+
+        kasa = Kasa.objects.first()
+        if kasa is None:
+            raise CommandError('Ölçüm için kayıtlı bir Kasa gerekli')
+
+        def eski_bakiye_satiri():
+            # Deftere geçmeden önceki yöntem: ortak satırı kilitle ve güncelle.
+            # Kasa.save deftere düzeltme hareketi de yazacağından doğrudan UPDATE
+            satir = Kasa.objects.select_for_update().filter(pk=kasa.pk)
+            satir.values_list('pk', flat=True).get()
+            satir.update(bakiye=F('bakiye') + Decimal('10.00'))
+
+        def kasa_defteri():
+            KasaHareketi.ekle(Decimal('10.00'), 'satis', '_performans_olc')
+
+        self.olc_eszamanli('eski: Kasa.bakiye satırı', eski_bakiye_satiri)
+        self.olc_eszamanli('yeni: KasaHareketi defteri', kasa_defteri)
@@ -1,69 +1,52 @@
-from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.conf import settings
-from stok_takip.models import UrunYerlesimYeri
-from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from stok_takip.servisler.skt import GECMIS, kademe_adi, skt_taramasi, skt_ufuklari, skt_uyarilarini_gonder
 
 
 class Command(BaseCommand):
-    help = 'Son kullanma tarihi yaklaşan ürünleri kontrol eder'
+    help = 'Son kullanma tarihi yaklaşan ürünleri kontrol eder ve yeni uyarıları bildirir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ufuk', type=int, nargs='+', help='Kademeler (gün), ör. --ufuk 7 30 90 (varsayılan settings.SKT_UFUKLARI)')
+        parser.add_argument('--bildirim-yok', action='store_true', help='Sadece raporla, bildirim gönderme')
 
     def handle(self, *args, **options):
-        bugun = date.today()
-        
-        # 30 gün içinde süresi dolacak ürünler
-        uyari_30_gun = bugun + timedelta(days=30)
-        
-        # Süresi geçmiş ürünler
-        suresi_gecmis = UrunYerlesimYeri.objects.filter(
-            son_kullanma_tarihi__lt=bugun,
-            son_kullanma_tarihi__isnull=False
-        )
-        
-        # 30 gün içinde dolacaklar
-        yakinda_dolacak = UrunYerlesimYeri.objects.filter(
-            son_kullanma_tarihi__gte=bugun,
-            son_kullanma_tarihi__lte=uyari_30_gun,
-            son_kullanma_tarihi__isnull=False
-        )
-        
+        bugun = timezone.localdate()
+        ufuklar = sorted(options['ufuk'] or skt_ufuklari())
+        if ufuklar[0] < 1:
+            raise CommandError('--ufuk değerleri en az 1 olmalı')
+
+        # Tek sorgu: her lot en yakın kademesiyle
+        satirlar = skt_taramasi(bugun, ufuklar)
+        kademeler = {kademe: [] for kademe in [GECMIS] + ufuklar}
+        for satir in satirlar:
+            kademeler[satir['kademe']].append(satir)
+
         # Konsola yazdır
         self.stdout.write(self.style.WARNING('\n' + '='*60))
         self.stdout.write(self.style.WARNING('SON KULLANMA TARİHİ KONTROL RAPORU'))
         self.stdout.write(self.style.WARNING(f'Tarih: {bugun.strftime("%d.%m.%Y")}'))
         self.stdout.write(self.style.WARNING('='*60 + '\n'))
-        
-        # Süresi geçmiş
-        if suresi_gecmis.exists():
-            self.stdout.write(self.style.ERROR(f'\n🔴 SÜRESİ GEÇMİŞ ÜRÜNLER ({suresi_gecmis.count()} adet):'))
-            for item in suresi_gecmis:
-                kalan = (bugun - item.son_kullanma_tarihi).days
-                self.stdout.write(self.style.ERROR(
-                    f'  • {item.urun.urun_adi} (Lot: {item.lot_no}) - {item.konum} - '
-                    f'{kalan} gün önce süresi doldu - {item.miktar} adet'
-                ))
-        else:
-            self.stdout.write(self.style.SUCCESS('✅ Süresi geçmiş ürün yok\n'))
-        
-        # Yakında dolacak
-        if yakinda_dolacak.exists():
-            self.stdout.write(self.style.WARNING(f'\n🟠 30 GÜN İÇİNDE SÜRESİ DOLACAK ({yakinda_dolacak.count()} adet):'))
-            for item in yakinda_dolacak:
-                kalan = (item.son_kullanma_tarihi - bugun).days
-                self.stdout.write(self.style.WARNING(
-                    f'  • {item.urun.urun_adi} (Lot: {item.lot_no}) - {item.konum} - '
-                    f'{kalan} gün kaldı - {item.miktar} adet'
+
+        for kademe, lotlar in kademeler.items():
+            stil = self.style.ERROR if kademe == GECMIS else self.style.WARNING
+            if not lotlar:
+                self.stdout.write(self.style.SUCCESS(f'✅ {kademe_adi(kademe)} ürün yok'))
+                continue
+
+            self.stdout.write(stil(f'\n{"🔴" if kademe == GECMIS else "🟠"} {kademe_adi(kademe).upper()} ({len(lotlar)} lot):'))
+            for lot in lotlar:
+                kalan = (lot['son_kullanma_tarihi'] - bugun).days
+                durum = f'{-kalan} gün önce süresi doldu' if kalan < 0 else f'{kalan} gün kaldı'
+                self.stdout.write(stil(
+                    f"  • {lot['urun_adi']} (Lot: {lot['lot_no']}) - {lot['konum']} - {durum} - {lot['miktar']} adet"
                 ))
-        else:
-            self.stdout.write(self.style.SUCCESS('✅ 30 gün içinde dolacak ürün yok\n'))
-        
+
         self.stdout.write(self.style.WARNING('\n' + '='*60 + '\n'))
-        
-        # Email gönder (opsiyonel)
-        if suresi_gecmis.exists() or yakinda_dolacak.exists():
-            self.send_email_alert(suresi_gecmis, yakinda_dolacak)
-    
-    def send_email_alert(self, suresi_gecmis, yakinda_dolacak):
-        """Email uyarısı gönder"""
-        # Şimdilik atla, isterseniz sonra ekleriz
-        pass
\ No newline at end of file
+
+        if options['bildirim_yok']:
+            return
+
+        # Daha önce aynı kademe ve SKT ile bildirilmemiş lotlar
+        yeniler = skt_uyarilarini_gonder(satirlar, bugun)
+        self.stdout.write(self.style.SUCCESS(f'📨 {len(yeniler)} yeni uyarı bildirildi'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from stok_takip.servisler.stok import stok_sayaclarini_yeniden_hesapla
+
+
+class Command(BaseCommand):
+    help = 'Ürün stok sayaçlarını lot miktarlarından yeniden hesaplar ve sapmaları raporlar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sadece-kontrol',
+            action='store_true',
+            help='Sapmaları raporla, sayaçları düzeltme'
+        )
+
+    def handle(self, *args, **options):
+        duzelt = not options['sadece_kontrol']
+        sapmalar = stok_sayaclarini_yeniden_hesapla(duzelt=duzelt)
+        
+        self.stdout.write(self.style.WARNING('\n' + '='*60))
+        self.stdout.write(self.style.WARNING('STOK SAYACI KONTROLÜ'))
+        self.stdout.write(self.style.WARNING('='*60 + '\n'))
+        
+        if not sapmalar:
+            self.stdout.write(self.style.SUCCESS('✅ Tüm stok sayaçları lotlarla uyumlu\n'))
+            return
+        
+        for stok_no, sayac, gercek in sapmalar:
+            self.stdout.write(self.style.ERROR(
+                f'  • {stok_no}: sayaç {sayac}, lotlar {gercek} (fark {gercek - sayac:+d})'
+            ))
+        
+        if duzelt:
+            self.stdout.write(self.style.SUCCESS(f'\n✅ {len(sapmalar)} ürünün sayacı düzeltildi\n'))
+        else:
+            self.stdout.write(self.style.WARNING(f'\n⚠️ {len(sapmalar)} ürünün sayacı hatalı (düzeltilmedi)\n'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0008_remove_alisfisi_son_kullanma_tarihi_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='satis',
+            options={'ordering': ['-fis__olusturma_tarihi'], 'verbose_name': 'Satış', 'verbose_name_plural': 'Satışlar'},
+        ),
+        migrations.CreateModel(
+            name='SatisLotHareketi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('miktar', models.IntegerField(verbose_name='Miktar')),
+                ('satis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lot_hareketleri', to='stok_takip.satis', verbose_name='Satış')),
+                ('yerlesim', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='satis_hareketleri', to='stok_takip.urunyerlesimyeri', verbose_name='Lot/Yerleşim')),
+            ],
+            options={
+                'verbose_name': 'Satış Lot Hareketi',
+                'verbose_name_plural': 'Satış Lot Hareketleri',
+            },
+        ),
+    ]
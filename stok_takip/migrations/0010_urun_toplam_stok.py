@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:02
+
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def sayaclari_doldur(apps, schema_editor):
+    Urun = apps.get_model('stok_takip', 'Urun')
+    UrunYerlesimYeri = apps.get_model('stok_takip', 'UrunYerlesimYeri')
+    lot_toplami = Subquery(
+        UrunYerlesimYeri.objects.filter(urun=OuterRef('pk'))
+        .order_by()
+        .values('urun')
+        .annotate(toplam=Sum('miktar'))
+        .values('toplam'),
+        output_field=IntegerField(),
+    )
+    Urun.objects.update(toplam_stok=Coalesce(lot_toplami, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0009_satislothareketi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urun',
+            name='toplam_stok',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Toplam Stok'),
+        ),
+        migrations.RunPython(sayaclari_doldur, migrations.RunPython.noop),
+    ]
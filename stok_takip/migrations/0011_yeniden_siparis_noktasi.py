@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0010_urun_toplam_stok'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kategori',
+            name='yeniden_siparis_noktasi',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Yeniden Sipariş Noktası'),
+        ),
+        migrations.AddField(
+            model_name='urun',
+            name='yeniden_siparis_noktasi',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Yeniden Sipariş Noktası'),
+        ),
+        migrations.AddIndex(
+            model_name='urun',
+            index=models.Index(fields=['toplam_stok'], name='urun_toplam_stok_idx'),
+        ),
+    ]
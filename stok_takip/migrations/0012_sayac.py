@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0011_yeniden_siparis_noktasi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sayac',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anahtar', models.CharField(max_length=50, unique=True, verbose_name='Anahtar')),
+                ('deger', models.PositiveBigIntegerField(default=0, verbose_name='Son Değer')),
+            ],
+            options={
+                'verbose_name': 'Sayaç',
+                'verbose_name_plural': 'Sayaçlar',
+            },
+        ),
+    ]
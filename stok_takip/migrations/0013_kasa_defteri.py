@@ -0,0 +1,56 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+def acilis_ozeti_olustur(apps, schema_editor):
+    # Deftere geçişte mevcut kasa bakiyesi ilk özet olur
+    Kasa = apps.get_model('stok_takip', 'Kasa')
+    KasaOzeti = apps.get_model('stok_takip', 'KasaOzeti')
+    kasa = Kasa.objects.first()
+    KasaOzeti.objects.create(bakiye=kasa.bakiye if kasa else 0, son_hareket_id=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0012_sayac'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KasaHareketi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tip', models.CharField(choices=[('satis', 'Satış'), ('alis', 'Alış'), ('odeme', 'Ödeme'), ('musteri_iade', 'Müşteri İade'), ('duzeltme', 'Düzeltme')], max_length=20, verbose_name='Hareket Tipi')),
+                ('tutar', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Tutar')),
+                ('aciklama', models.CharField(blank=True, max_length=255, verbose_name='Açıklama')),
+                ('islem_tarihi', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='İşlem Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Kasa Hareketi',
+                'verbose_name_plural': 'Kasa Hareketleri',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='KasaOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bakiye', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Bakiye')),
+                ('son_hareket_id', models.PositiveBigIntegerField(unique=True, verbose_name='Son Hareket')),
+                ('olusturma_tarihi', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Kasa Özeti',
+                'verbose_name_plural': 'Kasa Özetleri',
+                'ordering': ['-son_hareket_id'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='kasa',
+            name='bakiye',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Açılış Bakiyesi'),
+        ),
+        migrations.RunPython(acilis_ozeti_olustur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def maliyetleri_doldur(apps, schema_editor):
+    # Başlangıç ortalaması mevcut alım fiyatıdır (tam geçmiş için: manage.py maliyet_hesapla)
+    Urun = apps.get_model('stok_takip', 'Urun')
+    SatisFiyati = apps.get_model('stok_takip', 'SatisFiyati')
+    alim_fiyati = Subquery(
+        SatisFiyati.objects.filter(urun=OuterRef('pk')).values('alim_fiyati')[:1]
+    )
+    Urun.objects.update(ortalama_maliyet=Coalesce(alim_fiyati, 0, output_field=models.DecimalField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0013_kasa_defteri'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urun',
+            name='ortalama_maliyet',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=12, verbose_name='Ortalama Maliyet'),
+        ),
+        migrations.RunPython(maliyetleri_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:23
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def ozeti_doldur(apps, schema_editor):
+    # Mevcut satış ve onaylı müşteri iadelerinden özet kurulur; maliyet, o güne
+    # kadar da kullanılan ürünün mevcut ortalama maliyetinden hesaplanır
+    Satis = apps.get_model('stok_takip', 'Satis')
+    MusteriIade = apps.get_model('stok_takip', 'MusteriIade')
+    GunlukSatisOzet = apps.get_model('stok_takip', 'GunlukSatisOzet')
+    kurus = Decimal('0.01')
+    satirlar = {}
+
+    def satir(tarih, urun_id, kategori_id):
+        return satirlar.setdefault((tarih, urun_id), GunlukSatisOzet(
+            tarih=tarih, urun_id=urun_id, kategori_id=kategori_id
+        ))
+
+    satislar = (
+        Satis.objects.annotate(gun=TruncDate('fis__olusturma_tarihi'))
+        .values('gun', 'urun_id', 'urun__kategori_id', 'urun__ortalama_maliyet')
+        .annotate(miktar_toplam=Sum('miktar'), ciro=Sum('toplam_fiyat'), fis_sayisi=Count('fis', distinct=True))
+        .order_by()
+    )
+    for toplam in satislar:
+        ozet = satir(toplam['gun'], toplam['urun_id'], toplam['urun__kategori_id'])
+        ozet.miktar += toplam['miktar_toplam']
+        ozet.ciro += toplam['ciro'] or 0
+        ozet.maliyet += (toplam['urun__ortalama_maliyet'] * toplam['miktar_toplam']).quantize(kurus)
+        ozet.fis_sayisi += toplam['fis_sayisi']
+
+    iadeler = MusteriIade.objects.filter(durum='onaylandi').values_list(
+        'urun_id', 'urun__kategori_id', 'urun__ortalama_maliyet', 'iade_tarihi', 'miktar', 'cozum_tipi', 'iade_tutari'
+    )
+    for urun_id, kategori_id, ortalama, iade_tarihi, miktar, cozum_tipi, iade_tutari in iadeler.iterator(chunk_size=2000):
+        ozet = satir(timezone.localdate(iade_tarihi), urun_id, kategori_id)
+        ozet.miktar -= miktar
+        ozet.maliyet -= (ortalama * miktar).quantize(kurus)
+        if cozum_tipi == 'para':
+            ozet.ciro -= iade_tutari
+
+    GunlukSatisOzet.objects.bulk_create(satirlar.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0014_urun_ortalama_maliyet'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='satisfisi',
+            name='olusturma_tarihi',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Satış Tarihi'),
+        ),
+        migrations.CreateModel(
+            name='GunlukSatisOzet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='Tarih')),
+                ('miktar', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Miktar')),
+                ('ciro', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ciro')),
+                ('maliyet', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Maliyet')),
+                ('fis_sayisi', models.IntegerField(default=0, verbose_name='Fiş Sayısı')),
+                ('kategori', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stok_takip.kategori', verbose_name='Kategori')),
+                ('urun', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gunluk_ozetler', to='stok_takip.urun', verbose_name='Ürün')),
+            ],
+            options={
+                'verbose_name': 'Günlük Satış Özeti',
+                'verbose_name_plural': 'Günlük Satış Özetleri',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gunluksatisozet',
+            constraint=models.UniqueConstraint(fields=('tarih', 'urun'), name='gunluk_ozet_tarih_urun_uniq'),
+        ),
+        migrations.RunPython(ozeti_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0015_gunluk_satis_ozet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SktUyarisi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kademe', models.PositiveSmallIntegerField(verbose_name='Kademe')),
+                ('son_kullanma_tarihi', models.DateField(verbose_name='Son Kullanma Tarihi')),
+                ('bildirim_tarihi', models.DateTimeField(auto_now_add=True, verbose_name='Bildirim Tarihi')),
+            ],
+            options={
+                'verbose_name': 'SKT Uyarısı',
+                'verbose_name_plural': 'SKT Uyarıları',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='urunyerlesimyeri',
+            index=models.Index(fields=['son_kullanma_tarihi', 'miktar'], name='yerlesim_skt_miktar_idx'),
+        ),
+        migrations.AddField(
+            model_name='sktuyarisi',
+            name='lot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skt_uyarilari', to='stok_takip.urunyerlesimyeri', verbose_name='Lot'),
+        ),
+        migrations.AddConstraint(
+            model_name='sktuyarisi',
+            constraint=models.UniqueConstraint(fields=('lot', 'kademe', 'son_kullanma_tarihi'), name='skt_uyarisi_lot_kademe_uniq'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0016_skt_uyarisi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MusteriGrubu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ad', models.CharField(max_length=100, unique=True, verbose_name='Grup Adı')),
+            ],
+            options={
+                'verbose_name': 'Müşteri Grubu',
+                'verbose_name_plural': 'Müşteri Grupları',
+                'ordering': ['ad'],
+            },
+        ),
+        migrations.AddField(
+            model_name='satisfisi',
+            name='musteri_grubu',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stok_takip.musterigrubu', verbose_name='Müşteri Grubu'),
+        ),
+        migrations.CreateModel(
+            name='DonemselFiyat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('satis_fiyati', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Satış Fiyatı')),
+                ('gecerlilik_baslangic', models.DateTimeField(verbose_name='Geçerlilik Başlangıcı')),
+                ('gecerlilik_bitis', models.DateTimeField(blank=True, null=True, verbose_name='Geçerlilik Bitişi')),
+                ('olusturma_tarihi', models.DateTimeField(auto_now_add=True)),
+                ('urun', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donemsel_fiyatlar', to='stok_takip.urun', verbose_name='Ürün')),
+                ('musteri_grubu', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='stok_takip.musterigrubu', verbose_name='Müşteri Grubu')),
+            ],
+            options={
+                'verbose_name': 'Dönemsel Fiyat',
+                'verbose_name_plural': 'Dönemsel Fiyatlar',
+                'indexes': [models.Index(fields=['urun', 'musteri_grubu', 'gecerlilik_baslangic'], name='donemsel_fiyat_zaman_idx')],
+            },
+        ),
+    ]
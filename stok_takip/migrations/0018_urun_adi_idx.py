@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0017_donemsel_fiyat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='urun',
+            index=models.Index(fields=['urun_adi'], name='urun_adi_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def dizini_doldur(apps, schema_editor):
+    # Terim üretimi modelden bağımsızdır; sonradan yeniden kurmak için: manage.py arama_dizini_olustur
+    from stok_takip.servisler.arama import PARCA, urun_terimleri
+
+    Urun = apps.get_model('stok_takip', 'Urun')
+    UrunAramaTerimi = apps.get_model('stok_takip', 'UrunAramaTerimi')
+    satirlar = []
+    for stok_no, barkod, urun_adi, kategori_adi in Urun.objects.values_list(
+        'stok_no', 'barkod', 'urun_adi', 'kategori__kategori_adi'
+    ).iterator(chunk_size=PARCA):
+        satirlar += [
+            UrunAramaTerimi(urun_id=stok_no, terim=terim, agirlik=agirlik)
+            for terim, agirlik in urun_terimleri(stok_no, barkod, urun_adi, kategori_adi)
+        ]
+        if len(satirlar) >= PARCA:
+            UrunAramaTerimi.objects.bulk_create(satirlar)
+            satirlar = []
+    UrunAramaTerimi.objects.bulk_create(satirlar)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0018_urun_adi_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrunAramaTerimi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terim', models.CharField(max_length=100, verbose_name='Terim')),
+                ('agirlik', models.PositiveSmallIntegerField(verbose_name='Ağırlık')),
+                ('urun', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='arama_terimleri', to='stok_takip.urun', verbose_name='Ürün')),
+            ],
+            options={
+                'verbose_name': 'Ürün Arama Terimi',
+                'verbose_name_plural': 'Ürün Arama Terimleri',
+                'indexes': [models.Index(fields=['terim', 'urun', 'agirlik'], name='arama_terimi_idx')],
+            },
+        ),
+        migrations.RunPython(dizini_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0019_urun_arama_terimi'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='satislothareketi',
+            name='yerlesim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='satis_hareketleri', to='stok_takip.urunyerlesimyeri', verbose_name='Lot/Yerleşim'),
+        ),
+    ]
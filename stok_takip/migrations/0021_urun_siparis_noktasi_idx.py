@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0020_satis_lot_hareketi_yerlesim_set_null'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='urun',
+            index=models.Index(fields=['yeniden_siparis_noktasi'], name='urun_siparis_noktasi_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def ozetleri_isaretle(apps, schema_editor):
+    # Mevcut özetler id aralığını kapsıyordu: (önceki özetin son id'si, son id]
+    KasaHareketi = apps.get_model('stok_takip', 'KasaHareketi')
+    KasaOzeti = apps.get_model('stok_takip', 'KasaOzeti')
+    onceki = 0
+    for ozet in KasaOzeti.objects.order_by('son_hareket_id'):
+        KasaHareketi.objects.filter(pk__gt=onceki, pk__lte=ozet.son_hareket_id).update(ozet=ozet)
+        onceki = ozet.son_hareket_id
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0021_urun_siparis_noktasi_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='kasaozeti',
+            options={'ordering': ['-id'], 'verbose_name': 'Kasa Özeti', 'verbose_name_plural': 'Kasa Özetleri'},
+        ),
+        migrations.AddField(
+            model_name='kasahareketi',
+            name='ozet',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='hareketler', to='stok_takip.kasaozeti', verbose_name='Özet'),
+        ),
+        migrations.RunPython(ozetleri_isaretle, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:16
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def maliyetleri_doldur(apps, schema_editor):
+    # Eski satırlara ürünün mevcut ortalama maliyeti yazılır (özet satırları
+    # o güne kadar yine bu ortalamayla artımlı yazılıyordu)
+    Satis = apps.get_model('stok_takip', 'Satis')
+    Urun = apps.get_model('stok_takip', 'Urun')
+    ortalama = Subquery(Urun.objects.filter(pk=OuterRef('urun_id')).values('ortalama_maliyet')[:1])
+    Satis.objects.update(maliyet=ortalama * F('miktar'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0022_kasa_hareketi_ozet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='satis',
+            name='maliyet',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Maliyet'),
+        ),
+        migrations.RunPython(maliyetleri_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def satislardan_doldur(apps, schema_editor):
+    # Brüt ciro ve satır sayısı sadece satışlardan gelir; iadeler etkilemez
+    Satis = apps.get_model('stok_takip', 'Satis')
+    GunlukSatisOzet = apps.get_model('stok_takip', 'GunlukSatisOzet')
+    toplamlar = (
+        Satis.objects.annotate(gun=TruncDate('fis__olusturma_tarihi'))
+        .values('gun', 'urun_id')
+        .annotate(ciro=Sum('toplam_fiyat'), satir_sayisi=Count('pk'))
+        .order_by()
+    )
+    for toplam in toplamlar.iterator(chunk_size=2000):
+        GunlukSatisOzet.objects.filter(tarih=toplam['gun'], urun_id=toplam['urun_id']).update(
+            brut_ciro=toplam['ciro'] or 0, satir_sayisi=toplam['satir_sayisi']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0023_satis_maliyet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gunluksatisozet',
+            name='brut_ciro',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Brüt Ciro'),
+        ),
+        migrations.AddField(
+            model_name='gunluksatisozet',
+            name='satir_sayisi',
+            field=models.IntegerField(default=0, verbose_name='Satış Satırı'),
+        ),
+        migrations.RunPython(satislardan_doldur, migrations.RunPython.noop),
+    ]
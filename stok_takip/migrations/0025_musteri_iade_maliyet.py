@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:02
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def maliyetleri_doldur(apps, schema_editor):
+    # Onaylı eski iadelere ürünün mevcut ortalama maliyeti yazılır (özet
+    # satırları o güne kadar yine bu ortalamayla artımlı düşülüyordu)
+    MusteriIade = apps.get_model('stok_takip', 'MusteriIade')
+    Urun = apps.get_model('stok_takip', 'Urun')
+    ortalama = Subquery(Urun.objects.filter(pk=OuterRef('urun_id')).values('ortalama_maliyet')[:1])
+    MusteriIade.objects.filter(durum='onaylandi').update(maliyet=ortalama * F('miktar'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stok_takip', '0024_gunluk_ozet_brut_ciro_satir_sayisi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musteriiade',
+            name='maliyet',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Maliyet'),
+        ),
+        migrations.RunPython(maliyetleri_doldur, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from typing import Iterable
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from decimal import Decimal
 from django.core.exceptions import ValidationError
@@ -8,6 +8,7 @@ from django.core.exceptions import ValidationError
     # Kategori
 class Kategori(models.Model):
     kategori_adi = models.CharField(max_length=100 , unique=True , verbose_name='Kategori Adı')
+    yeniden_siparis_noktasi = models.PositiveIntegerField(blank=True, null=True, verbose_name='Yeniden Sipariş Noktası')  # Ürünlerin varsayılan düşük stok eşiği
     
     def __str__(self) :
         return self.kategori_adi
@@ -55,9 +56,36 @@ class Urun(models.Model):
     )
     barkod = models.CharField(max_length=13, unique=True,default='869000000100', blank=True)
     barkod_resim = models.ImageField(upload_to='barkodlar/', blank=True, null=True)
+    toplam_stok = models.IntegerField(default=0, editable=False, verbose_name='Toplam Stok')  # Lot miktarlarının toplamı
+    ortalama_maliyet = models.DecimalField(max_digits=12, decimal_places=4, default=0, editable=False, verbose_name='Ortalama Maliyet')  # Hareketli ağırlıklı ortalama
+    yeniden_siparis_noktasi = models.PositiveIntegerField(blank=True, null=True, verbose_name='Yeniden Sipariş Noktası')  # Boşsa kategorinin eşiği
     olusturma_tarihi = models.DateTimeField(auto_now_add=True)
     guncelleme_tarihi = models.DateTimeField(auto_now=True)
     
+    # Sadece F() güncellemeleriyle değişen alanlar; bellekteki eski değerle ezilmemeli
+    SAYAC_ALANLARI = ('toplam_stok', 'ortalama_maliyet')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._kayitli_pk = instance.pk
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Sayaçlar yalnızca aynı satır güncellenirken dışarıda bırakılır; stok_no
+        # değiştirilmişse Django'nun normal kaydı (yeni satır) korunur
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and getattr(self, '_kayitli_pk', None) == self.pk
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SAYAC_ALANLARI
+            ]
+        super().save(*args, **kwargs)
+        self._kayitli_pk = self.pk
+    
     def __str__(self):
         return f"{self.stok_no} - {self.urun_adi}"
     
@@ -65,6 +93,30 @@ class Urun(models.Model):
         verbose_name = 'Ürün'
         verbose_name_plural = 'Ürünler'
         ordering = ['kategori', 'urun_adi']
+        indexes = [
+            models.Index(fields=['toplam_stok'], name='urun_toplam_stok_idx'),
+            models.Index(fields=['yeniden_siparis_noktasi'], name='urun_siparis_noktasi_idx'),  # Düşük stokta en yüksek eşik
+            models.Index(fields=['urun_adi'], name='urun_adi_idx'),  # Ürün seçicide ön ek araması
+        ]
+
+
+# Ürün arama dizini: ad, stok no, barkod ve kategori adının normalleştirilmiş
+# kelimeleri (servisler.arama). Urun/Kategori kaydedilince sinyalle yenilenir.
+class UrunAramaTerimi(models.Model):
+    urun = models.ForeignKey(Urun, on_delete=models.CASCADE, related_name='arama_terimleri', verbose_name='Ürün')
+    terim = models.CharField(max_length=100, verbose_name='Terim')
+    agirlik = models.PositiveSmallIntegerField(verbose_name='Ağırlık')  # Kelimenin geldiği alan
+    
+    def __str__(self):
+        return f"{self.urun_id} - {self.terim}"
+    
+    class Meta:
+        verbose_name = 'Ürün Arama Terimi'
+        verbose_name_plural = 'Ürün Arama Terimleri'
+        indexes = [
+            # Ön ek araması (terim LIKE 'x%') tabloya dönmeden bu indeksten yanıtlanır
+            models.Index(fields=['terim', 'urun', 'agirlik'], name='arama_terimi_idx'),
+        ]
 
 
 # Yerleşim modeli
@@ -76,29 +128,37 @@ class UrunYerlesimYeri(models.Model):
     son_kullanma_tarihi = models.DateField(blank=True, null=True, verbose_name='Son Kullanma Tarihi')  # YENİ
     giris_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='Giriş Tarihi')  # YENİ
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'urun_id' in field_names and 'miktar' in field_names:
+            instance.kayitli_stogu_isaretle()
+        return instance
+    
+    def kayitli_stogu_isaretle(self):
+        """Veritabanındaki (ürün, miktar) değerini stok sayacı farkı için sakla"""
+        self._kayitli_stok = (self.urun_id, self.miktar)
+    
     def save(self, *args, **kwargs):
-        # Lot no boşsa otomatik oluştur
-        if not self.lot_no:
-            from datetime import date
-            bugun = date.today()
-            
-            # Bugün eklenen son lot numarasını bul
-            son_lot = UrunYerlesimYeri.objects.filter(
-                lot_no__startswith=f'L{bugun.strftime("%Y%m%d")}'
-            ).order_by('-lot_no').first()
+        from .servisler.stok import stok_sayacini_guncelle
+        from .servisler.numara import lot_no_ayir
+        
+        eski_urun_id, eski_miktar = getattr(self, '_kayitli_stok', (None, 0))
+        
+        with transaction.atomic():
+            # Lot no boşsa günün lot sayacından al (Format: L20251002-001)
+            if not self.lot_no:
+                self.lot_no = lot_no_ayir()
             
-            if son_lot:
-                # Son lot'tan sıra numarasını al ve 1 artır
-                son_sira = int(son_lot.lot_no.split('-')[-1])
-                yeni_sira = son_sira + 1
-            else:
-                # Bugün ilk lot
-                yeni_sira = 1
+            super().save(*args, **kwargs)
             
-            # Format: L20251002-001
-            self.lot_no = f'L{bugun.strftime("%Y%m%d")}-{yeni_sira:03d}'
+            # Ürünün stok sayacını sadece fark kadar güncelle
+            if eski_urun_id is not None and eski_urun_id != self.urun_id:
+                stok_sayacini_guncelle(eski_urun_id, -eski_miktar)
+                eski_miktar = 0
+            stok_sayacini_guncelle(self.urun_id, self.miktar - eski_miktar)
         
-        super().save(*args, **kwargs)
+        self.kayitli_stogu_isaretle()
     
     def __str__(self):
         lot_bilgi = f" - Lot: {self.lot_no}" if self.lot_no else ""
@@ -108,6 +168,30 @@ class UrunYerlesimYeri(models.Model):
         verbose_name = 'Ürün Yerleşim Yeri'
         verbose_name_plural = 'Ürün Yerleşim Yerleri'
         ordering = ['son_kullanma_tarihi', 'konum']  # SKT'ye göre sırala
+        indexes = [
+            # SKT taraması: tarih aralığı + stoktaki lotlar
+            models.Index(fields=['son_kullanma_tarihi', 'miktar'], name='yerlesim_skt_miktar_idx'),
+        ]
+
+
+# SKT uyarı durumu: bir lot aynı kademe ve SKT için yalnızca bir kez bildirilir
+class SktUyarisi(models.Model):
+    GECMIS = 0  # Süresi geçmiş kademesi; diğer kademeler gün sayısıdır (7, 30, 90)
+    
+    lot = models.ForeignKey(UrunYerlesimYeri, on_delete=models.CASCADE, related_name='skt_uyarilari', verbose_name='Lot')
+    kademe = models.PositiveSmallIntegerField(verbose_name='Kademe')
+    son_kullanma_tarihi = models.DateField(verbose_name='Son Kullanma Tarihi')  # Bildirim anındaki SKT; değişirse yeniden bildirilir
+    bildirim_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='Bildirim Tarihi')
+    
+    def __str__(self):
+        return f"{self.lot_id} - {self.kademe} - {self.son_kullanma_tarihi}"
+    
+    class Meta:
+        verbose_name = 'SKT Uyarısı'
+        verbose_name_plural = 'SKT Uyarıları'
+        constraints = [
+            models.UniqueConstraint(fields=['lot', 'kademe', 'son_kullanma_tarihi'], name='skt_uyarisi_lot_kademe_uniq'),
+        ]
         
         
     
@@ -127,17 +211,19 @@ class SatisFiyati(models.Model):
     satis_fiyati = models.DecimalField(max_digits=10,decimal_places=2,verbose_name='Net Satis Fiyatı')
     guncelleme_tarihi=models.DateTimeField( auto_now=True)
 
-    def save(self, *args, **kwargs):
+    def satis_fiyati_hesapla(self):
+        """Net satış fiyatı; toplu güncellemedeki SQL karşılığı servisler/fiyat.py içindedir"""
         # Decimal'leri kullanarak hesaplama yap
         kar_tutari = self.alim_fiyati * (self.kar_orani / Decimal('100'))
         kdv_tutari = (self.alim_fiyati + kar_tutari) * (Decimal(self.kdv) / Decimal('100'))
         liste_satis_fiyati = self.alim_fiyati + kar_tutari + kdv_tutari
         iskonto_tutari = liste_satis_fiyati * (self.iskonto_orani / Decimal('100'))
-        self.satis_fiyati = liste_satis_fiyati - iskonto_tutari
         
         # 2 ondalık basamağa yuvarla
-        self.satis_fiyati = self.satis_fiyati.quantize(Decimal('0.01'))
-        
+        return (liste_satis_fiyati - iskonto_tutari).quantize(Decimal('0.01'))
+    
+    def save(self, *args, **kwargs):
+        self.satis_fiyati = self.satis_fiyati_hesapla()
         super().save(*args, **kwargs)
             
     def __str__(self):
@@ -146,9 +232,62 @@ class SatisFiyati(models.Model):
     class Meta:
         verbose_name = 'Ürün Satış Fiyatı'
         verbose_name_plural = 'Ürün Satış Fiyatları'
+
+
+# Müşteri grupları (bayi, toptan vb.) - gruba özel dönemsel fiyatlar için
+class MusteriGrubu(models.Model):
+    ad = models.CharField(max_length=100, unique=True, verbose_name='Grup Adı')
+    
+    def __str__(self):
+        return self.ad
+    
+    class Meta:
+        verbose_name = 'Müşteri Grubu'
+        verbose_name_plural = 'Müşteri Grupları'
+        ordering = ['ad']
+
+
+# Dönemsel (planlı) fiyat: geçerlilik aralığında SatisFiyati'nin yerine kullanılır.
+# Çakışan kayıtlarda gruba özel olan, sonra başlangıcı en yeni olan geçerlidir.
+class DonemselFiyat(models.Model):
+    urun = models.ForeignKey(Urun, on_delete=models.CASCADE, related_name='donemsel_fiyatlar', verbose_name='Ürün')
+    musteri_grubu = models.ForeignKey(MusteriGrubu, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Müşteri Grubu')  # Boşsa herkes
+    satis_fiyati = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Satış Fiyatı')
+    gecerlilik_baslangic = models.DateTimeField(verbose_name='Geçerlilik Başlangıcı')
+    gecerlilik_bitis = models.DateTimeField(null=True, blank=True, verbose_name='Geçerlilik Bitişi')  # Hariç; boşsa süresiz
+    olusturma_tarihi = models.DateTimeField(auto_now_add=True)
+    
+    def clean(self):
+        super().clean()
+        if self.gecerlilik_bitis and self.gecerlilik_baslangic and self.gecerlilik_bitis <= self.gecerlilik_baslangic:
+            raise ValidationError({'gecerlilik_bitis': 'Bitiş, başlangıçtan sonra olmalı.'})
+    
+    def __str__(self):
+        return f"{self.urun_id} - {self.satis_fiyati} TL ({self.gecerlilik_baslangic:%d.%m.%Y})"
+    
+    class Meta:
+        verbose_name = 'Dönemsel Fiyat'
+        verbose_name_plural = 'Dönemsel Fiyatlar'
+        indexes = [
+            # "T anındaki fiyat": ürün + grup eşitliği, başlangıç <= T aralığı
+            models.Index(fields=['urun', 'musteri_grubu', 'gecerlilik_baslangic'], name='donemsel_fiyat_zaman_idx'),
+        ]
         
 
 
+# Numara sayaçları (fiş no, lot no vb.) - her anahtar için tek satır, kilitli artırılır
+class Sayac(models.Model):
+    anahtar = models.CharField(max_length=50, unique=True, verbose_name='Anahtar')
+    deger = models.PositiveBigIntegerField(default=0, verbose_name='Son Değer')
+    
+    def __str__(self):
+        return f"{self.anahtar}: {self.deger}"
+    
+    class Meta:
+        verbose_name = 'Sayaç'
+        verbose_name_plural = 'Sayaçlar'
+
+
 class SatisFisi(models.Model):
     fis_no = models.PositiveIntegerField(
         unique=True,
@@ -159,13 +298,17 @@ class SatisFisi(models.Model):
     )
     kullanici = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='kullanici')
     toplam_tutar = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Toplam Tutar')
-    olusturma_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='Satış Tarihi')
+    musteri_grubu = models.ForeignKey(MusteriGrubu, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Müşteri Grubu')  # Fiyat çözümünde kullanılır
+    olusturma_tarihi = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Satış Tarihi')
     
     def save(self, *args, **kwargs):
-        if not self.fis_no:
-            son_fis = SatisFisi.objects.order_by('-fis_no').first()
-            self.fis_no = 1 if not son_fis else (son_fis.fis_no or 0) + 1
-        super().save(*args, **kwargs)
+        from .servisler.numara import satis_fisi_no_ayir
+        
+        # Numara fişle aynı transaction'da ayrılır: kayıt geri alınırsa numara da geri alınır
+        with transaction.atomic():
+            if not self.fis_no:
+                self.fis_no = satis_fisi_no_ayir()
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Fiş #{self.fis_no} - {self.kullanici.username} - {self.toplam_tutar} TL"
@@ -182,6 +325,7 @@ class Satis(models.Model):
     miktar = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Miktar')
     birim_fiyat = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Birim Fiyat', editable=False, null=True, blank=True)
     toplam_fiyat = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Toplam Fiyat', editable=False, null=True, blank=True)
+    maliyet = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Maliyet')  # Satış anındaki ortalama maliyetten; özetten aynen geri alınır
     
     def clean(self):
         """Form validasyonu - admin panelinde hata gösterir"""
@@ -190,12 +334,8 @@ class Satis(models.Model):
         if not self.urun or not self.miktar:
             return
         
-        # Toplam stok kontrolü (tüm lotların toplamı)
-        from django.db.models import Sum
-        
-        toplam_stok = UrunYerlesimYeri.objects.filter(
-            urun=self.urun
-        ).aggregate(toplam=Sum('miktar'))['toplam'] or 0
+        # Toplam stok kontrolü (tüm lotların toplamı, ürünün stok sayacından)
+        toplam_stok = self.urun.toplam_stok
         
         # Eğer bu kayıt güncelleme ise, önceki miktarı geri ekle
         if self.pk:
@@ -217,69 +357,63 @@ class Satis(models.Model):
             })
     
     def save(self, *args, **kwargs):
-        # 1. Birim fiyatı çek
-        try:
-            fiyat_bilgisi = SatisFiyati.objects.get(urun=self.urun)
-            self.birim_fiyat = fiyat_bilgisi.satis_fiyati
-        except SatisFiyati.DoesNotExist:
+        from .servisler.stok import fifo_tahsis_et, tahsisleri_kaydet, satis_tahsisini_geri_al
+        from .servisler.gunluk_ozet import satisi_ozete_yaz
+        from .servisler.fiyat_listesi import satis_fiyatlari
+        
+        # 1. Birim fiyatı çek (geçerli dönemsel fiyat, yoksa SatisFiyati)
+        self.birim_fiyat = satis_fiyatlari([self.urun_id], self.fis.musteri_grubu_id).get(self.urun_id)
+        if self.birim_fiyat is None:
             raise ValidationError(f"{self.urun.urun_adi} için satış fiyatı tanımlanmamış!")
         
         # 2. Toplam fiyatı hesapla
         self.toplam_fiyat = (self.birim_fiyat * self.miktar).quantize(Decimal('0.01'))
         
-        # 3. Stok güncelleme - FIFO mantığı ile
-        if self.pk:  # Güncelleme ise eski miktarı geri ekle
-            try:
-                eski_satis = Satis.objects.get(pk=self.pk)
-                eski_yerlesim = UrunYerlesimYeri.objects.filter(
-                    urun=self.urun,
-                    miktar__gt=0
-                ).order_by('son_kullanma_tarihi', 'giris_tarihi').first()
-                if eski_yerlesim:
-                    eski_yerlesim.miktar += int(eski_satis.miktar)
-                    eski_yerlesim.save()
-            except Satis.DoesNotExist:
-                pass
-        
-        # Yeni satış için stok düş - FIFO mantığıyla
-        kalan_miktar = int(self.miktar)
-        
-        while kalan_miktar > 0:
-            # En eski SKT'li ve stokta olan lot'u bul
-            yerlesim = UrunYerlesimYeri.objects.filter(
-                urun=self.urun,
-                miktar__gt=0
-            ).order_by('son_kullanma_tarihi', 'giris_tarihi').first()
+        with transaction.atomic():
+            # Düzenlemede günlük özete yazılacak fark için önceki değerler
+            eski = None
+            if self.pk:
+                eski = Satis.objects.filter(pk=self.pk).only('fis_id', 'urun_id', 'miktar', 'toplam_fiyat', 'maliyet').first()
             
-            if not yerlesim:
-                raise ValidationError(f'{self.urun.urun_adi} için yeterli stok yok!')
+            # 3. Stok güncelleme - FIFO mantığı ile
+            if self.pk:  # Güncelleme ise eski miktarı düşüldüğü lotlara geri ekle
+                if satis_tahsisini_geri_al(self) is None:
+                    # Lot defteri olmayan eski kayıt: ilk FIFO lotuna ekle
+                    try:
+                        eski_satis = Satis.objects.get(pk=self.pk)
+                        eski_yerlesim = UrunYerlesimYeri.objects.filter(
+                            urun=self.urun,
+                            miktar__gt=0
+                        ).order_by('son_kullanma_tarihi', 'giris_tarihi').first()
+                        if eski_yerlesim:
+                            eski_yerlesim.miktar += int(eski_satis.miktar)
+                            eski_yerlesim.save()
+                    except Satis.DoesNotExist:
+                        pass
             
-            # Bu lot'tan ne kadar düşülebilir?
-            if yerlesim.miktar >= kalan_miktar:
-                # Bu lot yeterli
-                yerlesim.miktar -= kalan_miktar
-                yerlesim.save()
-                kalan_miktar = 0
-            else:
-                # Bu lot'u tamamen bitir, kalanı bir sonraki lot'tan düş
-                kalan_miktar -= yerlesim.miktar
-                yerlesim.miktar = 0
-                yerlesim.save()
-        
-        # 4. Kaydet
-        super().save(*args, **kwargs)
-        
-        # 5. Fiş toplamını güncelle
-        self.fis.toplam_tutar = sum(
-            satis.toplam_fiyat for satis in self.fis.satislar.all()
-        )
-        self.fis.save()
-        
-        # 6. KASA KAYDI OLUŞTUR
-        SatisKasa.objects.get_or_create(
-            satis=self,
-            defaults={'tutar': self.toplam_fiyat}
-        )
+            # Yeni satış için stok düş - lotlar tek seferde kilitlenir ve toplu güncellenir
+            self.lot_tahsisleri = fifo_tahsis_et(self.urun, self.miktar)
+            ortalama_maliyet = Urun.objects.filter(pk=self.urun_id).values_list('ortalama_maliyet', flat=True).get()
+            self.maliyet = (ortalama_maliyet * self.miktar).quantize(Decimal('0.01'))
+            
+            # 4. Kaydet ve hangi lottan ne kadar düşüldüğünü deftere yaz
+            super().save(*args, **kwargs)
+            tahsisleri_kaydet(self, self.lot_tahsisleri)
+            
+            # 5. Fiş toplamını güncelle
+            self.fis.toplam_tutar = sum(
+                satis.toplam_fiyat for satis in self.fis.satislar.all()
+            )
+            self.fis.save()
+            
+            # 6. KASA KAYDI OLUŞTUR
+            SatisKasa.objects.get_or_create(
+                satis=self,
+                defaults={'tutar': self.toplam_fiyat}
+            )
+            
+            # 7. Günlük satış özeti
+            satisi_ozete_yaz(self, eski)
         
     def __str__(self):
         return f"Satış #{self.fis.fis_no} - {self.urun.urun_adi} - {self.miktar} adet"
@@ -288,7 +422,47 @@ class Satis(models.Model):
         verbose_name = 'Satış'
         verbose_name_plural = 'Satışlar'
         ordering = ['-fis__olusturma_tarihi']
-        
+
+
+# Satışın hangi lottan ne kadar düştüğü (düzenleme ve iadede aynı lotlara geri eklenir)
+class SatisLotHareketi(models.Model):
+    satis = models.ForeignKey(Satis, on_delete=models.CASCADE, related_name='lot_hareketleri', verbose_name='Satış')
+    # Lot silinirse defter satırı kalır; o miktar geri alınırken silinmiş lota eklenmez
+    yerlesim = models.ForeignKey(UrunYerlesimYeri, on_delete=models.SET_NULL, null=True, blank=True, related_name='satis_hareketleri', verbose_name='Lot/Yerleşim')
+    miktar = models.IntegerField(verbose_name='Miktar')
+    
+    def __str__(self):
+        lot_no = self.yerlesim.lot_no if self.yerlesim_id else 'silinmiş'
+        return f"Satış #{self.satis_id} - Lot: {lot_no} - {self.miktar} adet"
+    
+    class Meta:
+        verbose_name = 'Satış Lot Hareketi'
+        verbose_name_plural = 'Satış Lot Hareketleri'
+        
+# Günlük satış özeti (tarih + ürün): raporlar satış satırlarını taramadan buradan okunur.
+# Satış ve müşteri iadesinde artımlı güncellenir (servisler.gunluk_ozet), gunluk_ozet_olustur ile yeniden kurulur
+class GunlukSatisOzet(models.Model):
+    tarih = models.DateField(verbose_name='Tarih')
+    urun = models.ForeignKey(Urun, on_delete=models.CASCADE, related_name='gunluk_ozetler', verbose_name='Ürün')
+    kategori = models.ForeignKey(Kategori, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Kategori')
+    miktar = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Miktar')
+    ciro = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ciro')  # Para iadeleri düşülmüş
+    maliyet = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Maliyet')  # Ortalama maliyetten
+    fis_sayisi = models.IntegerField(default=0, verbose_name='Fiş Sayısı')  # Ürünün geçtiği fiş sayısı
+    brut_ciro = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Brüt Ciro')  # Satış tutarı, iadeler düşülmeden
+    satir_sayisi = models.IntegerField(default=0, verbose_name='Satış Satırı')  # Satış satırı sayısı
+    
+    def __str__(self):
+        return f"{self.tarih} - {self.urun_id} - {self.ciro} TL"
+    
+    class Meta:
+        verbose_name = 'Günlük Satış Özeti'
+        verbose_name_plural = 'Günlük Satış Özetleri'
+        constraints = [
+            models.UniqueConstraint(fields=['tarih', 'urun'], name='gunluk_ozet_tarih_urun_uniq'),
+        ]
+
+
 class TedarikciIade(models.Model):
     IADE_DURUM = [
         ('beklemede', 'İade Beklemede'),
@@ -346,6 +520,7 @@ class MusteriIade(models.Model):
     durum = models.CharField(max_length=20, choices=IADE_DURUM, default='beklemede', verbose_name='Durum')
     cozum_tipi = models.CharField(max_length=20, choices=COZUM_TIP, blank=True, verbose_name='Çözüm Tipi')
     iade_tutari = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='İade Tutarı')
+    maliyet = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Maliyet')  # Onay anındaki ortalama maliyetten; özetten bu değerle düşülür
     iade_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='İade Tarihi')
     islem_tarihi = models.DateTimeField(blank=True, null=True, verbose_name='İşlem Tarihi')
     not_lar = models.TextField(blank=True, verbose_name='Notlar')
@@ -362,26 +537,37 @@ class MusteriIade(models.Model):
             if self.durum == 'onaylandi':
                 yeni_onay = True
         
-        super().save(*args, **kwargs)
-        
-        # İade onaylanınca stok artar ve para iadesi yapılırsa kasa düşer
-        if yeni_onay:
-            # 1. Stoka geri ekle
-            yerlesim = UrunYerlesimYeri.objects.filter(
-                urun=self.urun,
-                miktar__gt=0
-            ).order_by('son_kullanma_tarihi', 'giris_tarihi').first()
-            
-            if yerlesim:
-                yerlesim.miktar += self.miktar
-                yerlesim.save()
+        with transaction.atomic():
+            if yeni_onay:
+                ortalama_maliyet = Urun.objects.filter(pk=self.urun_id).values_list('ortalama_maliyet', flat=True).get()
+                self.maliyet = (ortalama_maliyet * self.miktar).quantize(Decimal('0.01'))
+            super().save(*args, **kwargs)
             
-            # 2. Para iadesi ise kasadan düş
-            if self.cozum_tipi == 'para':
-                kasa = Kasa.objects.first()
-                if kasa:
-                    kasa.bakiye -= self.iade_tutari
-                    kasa.save()
+            # İade onaylanınca stok artar ve para iadesi yapılırsa kasa düşer
+            if yeni_onay:
+                # 1. Stoka geri ekle - önce satışın düştüğü lotlara
+                kalan_miktar = self.miktar
+                if self.satis_id:
+                    from .servisler.stok import satis_tahsisini_geri_al
+                    kalan_miktar -= satis_tahsisini_geri_al(self.satis, self.miktar) or 0
+                
+                if kalan_miktar > 0:
+                    yerlesim = UrunYerlesimYeri.objects.filter(
+                        urun=self.urun,
+                        miktar__gt=0
+                    ).order_by('son_kullanma_tarihi', 'giris_tarihi').first()
+                    
+                    if yerlesim:
+                        yerlesim.miktar += kalan_miktar
+                        yerlesim.save()
+                
+                # 2. Para iadesi ise kasadan düş
+                if self.cozum_tipi == 'para':
+                    KasaHareketi.ekle(-self.iade_tutari, 'musteri_iade', f'Müşteri iade #{self.pk}')
+                
+                # 3. Günlük satış özetinden düş
+                from .servisler.gunluk_ozet import musteri_iadesini_ozete_yaz
+                musteri_iadesini_ozete_yaz(self)
     
     def __str__(self):
         return f"Müşteri İade #{self.pk} - {self.urun.urun_adi} - {self.miktar} adet"
@@ -393,11 +579,13 @@ class MusteriIade(models.Model):
         
         
 class Kasa(models.Model):
-    bakiye = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Güncel Bakiye')
+    # Güncel bakiye KasaHareketi defterinden hesaplanır (servisler.kasa.kasa_bakiyesi);
+    # bu alan deftere geçişteki açılış bakiyesidir
+    bakiye = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Açılış Bakiyesi')
     son_guncelleme = models.DateTimeField(auto_now=True, verbose_name='Son Güncelleme')
     
     def __str__(self):
-        return f"Kasa Bakiyesi: {self.bakiye} TL"
+        return f"Kasa (Açılış: {self.bakiye} TL)"
     
     class Meta:
         verbose_name = 'Kasa'
@@ -407,7 +595,62 @@ class Kasa(models.Model):
         # Tek kayıt olsun
         if not self.pk and Kasa.objects.exists():
             raise ValidationError('Sadece bir kasa kaydı olabilir!')
-        super().save(*args, **kwargs)
+        
+        # Açılış bakiyesi ve sonradan yapılan değişiklikler deftere düzeltme olarak yazılır
+        eski_bakiye = Decimal('0.00')
+        if self.pk:
+            eski_bakiye = Kasa.objects.filter(pk=self.pk).values_list('bakiye', flat=True).first() or Decimal('0.00')
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            KasaHareketi.ekle(self.bakiye - eski_bakiye, 'duzeltme', 'Kasa açılış bakiyesi')
+
+
+# Kasa defteri: her para hareketi tek bir INSERT, ortak bakiye satırı güncellenmez
+class KasaHareketi(models.Model):
+    HAREKET_TIP = [
+        ('satis', 'Satış'),
+        ('alis', 'Alış'),
+        ('odeme', 'Ödeme'),
+        ('musteri_iade', 'Müşteri İade'),
+        ('duzeltme', 'Düzeltme'),
+    ]
+    
+    tip = models.CharField(max_length=20, choices=HAREKET_TIP, verbose_name='Hareket Tipi')
+    tutar = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Tutar')  # Giriş +, çıkış -
+    aciklama = models.CharField(max_length=255, blank=True, verbose_name='Açıklama')
+    islem_tarihi = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='İşlem Tarihi')
+    ozet = models.ForeignKey('KasaOzeti', on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name='hareketler', verbose_name='Özet')  # Boşsa henüz özete girmedi
+    
+    @classmethod
+    def ekle(cls, tutar, tip, aciklama=''):
+        """Sıfırdan farklı tutarlar için deftere hareket ekler"""
+        if tutar:
+            return cls.objects.create(tutar=tutar, tip=tip, aciklama=aciklama)
+        return None
+    
+    def __str__(self):
+        return f"{self.get_tip_display()} - {self.tutar} TL"
+    
+    class Meta:
+        verbose_name = 'Kasa Hareketi'
+        verbose_name_plural = 'Kasa Hareketleri'
+        ordering = ['-id']
+
+
+# Periyodik bakiye özeti: bakiye = son özet + henüz özete girmemiş hareketlerin toplamı
+class KasaOzeti(models.Model):
+    bakiye = models.DecimalField(max_digits=14, decimal_places=2, verbose_name='Bakiye')
+    son_hareket_id = models.PositiveBigIntegerField(unique=True, verbose_name='Son Hareket')  # Bu özete giren en büyük hareket id'si
+    olusturma_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Tarihi')
+    
+    def __str__(self):
+        return f"Kasa Özeti #{self.son_hareket_id} - {self.bakiye} TL"
+    
+    class Meta:
+        verbose_name = 'Kasa Özeti'
+        verbose_name_plural = 'Kasa Özetleri'
+        ordering = ['-id']
         
 # İŞLEM KAYITLARI
 
@@ -417,12 +660,14 @@ class SatisKasa(models.Model):
     islem_tarihi = models.DateTimeField(auto_now_add=True, verbose_name='İşlem Tarihi')
     
     def save(self, *args, **kwargs):
-        # Kasayı güncelle (Para GİRİŞİ)
-        super().save(*args, **kwargs)
-        kasa = Kasa.objects.first()
-        if kasa:
-            kasa.bakiye += self.tutar
-            kasa.save()
+        yeni_kayit = self.pk is None
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Kasa defterine yaz (Para GİRİŞİ)
+            if yeni_kayit:
+                KasaHareketi.ekle(self.tutar, 'satis', f'Satış #{self.satis_id}')
     
     def __str__(self):
         return f"Satış #{self.satis.fis.fis_no} - {self.tutar} TL"
@@ -445,21 +690,11 @@ class AlisFisi(models.Model):
     kullanici = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='İşlemi Yapan')
     
     def save(self, *args, **kwargs):
-        # Lot no otomatik oluştur
+        from .servisler.numara import lot_no_ayir
+        
+        # Lot no otomatik oluştur (yerleşimlerle ortak günlük lot sayacı)
         if not self.lot_no:
-            from datetime import date
-            bugun = date.today()
-            son_lot = AlisFisi.objects.filter(
-                lot_no__startswith=f'L{bugun.strftime("%Y%m%d")}'
-            ).order_by('-lot_no').first()
-            
-            if son_lot:
-                son_sira = int(son_lot.lot_no.split('-')[-1])
-                yeni_sira = son_sira + 1
-            else:
-                yeni_sira = 1
-            
-            self.lot_no = f'L{bugun.strftime("%Y%m%d")}-{yeni_sira:03d}'
+            self.lot_no = lot_no_ayir()
         
         # Eski toplam tutarı sakla
         eski_tutar = Decimal('0.00')
@@ -470,15 +705,12 @@ class AlisFisi(models.Model):
             except AlisFisi.DoesNotExist:
                 pass
         
-        super().save(*args, **kwargs)
-        
-        # Kasa farkını güncelle
-        fark = self.toplam_tutar - eski_tutar
-        if fark != 0:
-            kasa = Kasa.objects.first()
-            if kasa:
-                kasa.bakiye -= fark
-                kasa.save()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Kasa farkını deftere yaz
+            fark = self.toplam_tutar - eski_tutar
+            KasaHareketi.ekle(-fark, 'alis', f'Alış fişi {self.fis_no}')
             
     def __str__(self):
         return f"Alış Fişi #{self.fis_no} - {self.tedarikci.firma_adi}"
@@ -499,78 +731,42 @@ class AlisDetay(models.Model):
     konum = models.CharField(max_length=50, verbose_name='Yerleşim Konumu')
     son_kullanma_tarihi = models.DateField(blank=True, null=True, verbose_name='Son Kullanma Tarihi')
     def save(self, *args, **kwargs):
+        from .servisler.stok import stok_sayacini_guncelle
+        from .servisler.maliyet import satis_fiyatina_aktar
+        
         # Toplam fiyat hesapla
         self.toplam_fiyat = self.birim_fiyat * self.miktar
-    
-        super().save(*args, **kwargs)
         
-        # UrunYerlesimYeri oluştur veya güncelle
-        yerlesim, created = UrunYerlesimYeri.objects.get_or_create(
-            urun=self.urun,
-            lot_no=self.fis.lot_no,
-            konum=self.konum,
-            defaults={
-                'miktar': self.miktar,
-                'son_kullanma_tarihi': self.son_kullanma_tarihi
-            }
-        )
-        
-        if not created:
-            yerlesim.miktar += self.miktar
-            yerlesim.save()
-        
-        # Fiş toplamını güncelle
-        self.fis.toplam_tutar = sum(
-            detay.toplam_fiyat for detay in self.fis.detaylar.all()
-        )
-        self.fis.save()
-        
-        # ORTALAMA MALİYET HESAPLA VE SATIŞ FİYATINI GÜNCELLE
-        from django.db.models import Sum, F
-        
-        # Tüm lotlardaki toplam stok ve toplam maliyet
-        lotlar = UrunYerlesimYeri.objects.filter(
-            urun=self.urun,
-            miktar__gt=0
-        )
-        
-        if lotlar.exists():
-            # Her lot için (miktar × birim_fiyat) hesapla
-            toplam_maliyet = Decimal('0.00')
-            toplam_miktar = 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
             
-            for lot in lotlar:
-                # Bu lotun alış fiyatını bul
-                alis = AlisDetay.objects.filter(
-                    urun=self.urun,
-                    fis__lot_no=lot.lot_no
-                ).first()
-                
-                if alis:
-                    toplam_maliyet += alis.birim_fiyat * lot.miktar
-                    toplam_miktar += lot.miktar
+            # UrunYerlesimYeri oluştur veya güncelle
+            guncellenen = UrunYerlesimYeri.objects.filter(
+                urun=self.urun,
+                lot_no=self.fis.lot_no,
+                konum=self.konum
+            ).update(miktar=models.F('miktar') + self.miktar)
             
-            if toplam_miktar > 0:
-                ortalama_maliyet = toplam_maliyet / toplam_miktar
-                
-                # SatisFiyati'ni güncelle veya oluştur
-                satis_fiyati, created = SatisFiyati.objects.get_or_create(
+            if not guncellenen:
+                UrunYerlesimYeri.objects.bulk_create([UrunYerlesimYeri(
                     urun=self.urun,
-                    defaults={
-                        'alim_fiyati': ortalama_maliyet,
-                        'kar_orani': Decimal('25.00'),
-                        'kdv': 20,
-                        'iskonto_orani': Decimal('0.00'),
-                        'satis_fiyati': Decimal('0.00')
-                    }
-                )
-                
-                if not created:
-                    # Mevcut kayıt var, sadece alım fiyatını güncelle
-                    satis_fiyati.alim_fiyati = ortalama_maliyet
-                
-                # Satış fiyatını yeniden hesapla (SatisFiyati modelinin save metodu otomatik hesaplar)
-                satis_fiyati.save()
+                    lot_no=self.fis.lot_no,
+                    konum=self.konum,
+                    miktar=self.miktar,
+                    son_kullanma_tarihi=self.son_kullanma_tarihi
+                )])
+            
+            # Stok sayacı ve hareketli ortalama maliyet tek UPDATE ile güncellenir
+            stok_sayacini_guncelle(self.urun_id, self.miktar, birim_maliyet=self.birim_fiyat)
+            
+            # Fiş toplamını güncelle
+            self.fis.toplam_tutar = sum(
+                detay.toplam_fiyat for detay in self.fis.detaylar.all()
+            )
+            self.fis.save()
+            
+            # Ortalama maliyeti satış fiyatına aktar
+            satis_fiyatina_aktar([self.urun_id])
     
     def __str__(self):
         return f"{self.urun.urun_adi} - {self.miktar} adet"
@@ -603,14 +799,12 @@ class OdemeKasa(models.Model):
     def save(self, *args, **kwargs):
         yeni_kayit = self.pk is None
         
-        super().save(*args, **kwargs)
-        
-        # Kasayı güncelle (Sadece ilk kayıtta)
-        if yeni_kayit:
-            kasa = Kasa.objects.first()
-            if kasa:
-                kasa.bakiye -= self.tutar
-                kasa.save()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Kasa defterine yaz (Sadece ilk kayıtta)
+            if yeni_kayit:
+                KasaHareketi.ekle(-self.tutar, 'odeme', self.get_odeme_tipi_display())
     
     def __str__(self):
         return f"{self.get_odeme_tipi_display()} - {self.tutar} TL"
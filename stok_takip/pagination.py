@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class StokSayfalama(PageNumberPagination):
+    """
+    Küçük tablolar için sayfalı liste: ?page=2&sayfa_boyutu=50
+    (boyut varsayılanı PAGE_SIZE). Yanıttaki count tek bir COUNT sorgusudur.
+    """
+    page_size_query_param = 'sayfa_boyutu'
+    max_page_size = 200
+
+
+class HareketSayfalama(CursorPagination):
+    """
+    Hızla büyüyen hareket tabloları için imleçli sayfalama (?cursor=...).
+    OFFSET ve COUNT kullanmaz; sıralama birincil anahtar indeksi üzerindendir,
+    bu yüzden derin sayfalar da ilk sayfa kadar hızlıdır.
+    """
+    ordering = '-id'
+    page_size_query_param = 'sayfa_boyutu'
+    max_page_size = 200
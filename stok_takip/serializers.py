@@ -2,7 +2,7 @@ from rest_framework import serializers
 from .models import (
     Kategori, Tedarikci, Urun, UrunYerlesimYeri, SatisFiyati,
     SatisFisi, Satis, TedarikciIade, MusteriIade, 
-    Kasa, SatisKasa, AlisFisi, AlisDetay, OdemeKasa
+    Kasa, KasaHareketi, SatisKasa, AlisFisi, AlisDetay, OdemeKasa, MusteriGrubu
 )
 from django.contrib.auth.models import User
 
@@ -31,7 +31,6 @@ class TedarikciSerializer(serializers.ModelSerializer):
 # 4. ÜRÜN SERİALİZER
 class UrunSerializer(serializers.ModelSerializer):
     kategori_adi = serializers.CharField(source='kategori.kategori_adi', read_only=True)
-    toplam_stok = serializers.SerializerMethodField()
     satis_fiyati = serializers.SerializerMethodField()
     
     class Meta:
@@ -39,17 +38,13 @@ class UrunSerializer(serializers.ModelSerializer):
         fields = ['stok_no', 'urun_adi', 'kategori', 'kategori_adi', 
                   'birim', 'barkod', 'barkod_resim', 'toplam_stok', 'satis_fiyati',
                   'olusturma_tarihi', 'guncelleme_tarihi']
-    
-    def get_toplam_stok(self, obj):
-        """Tüm lotlardaki toplam stok miktarı"""
-        from django.db.models import Sum
-        toplam = UrunYerlesimYeri.objects.filter(urun=obj).aggregate(
-            toplam=Sum('miktar')
-        )['toplam']
-        return toplam or 0
+        read_only_fields = ['toplam_stok']
     
     def get_satis_fiyati(self, obj):
-        """Ürünün satış fiyatı"""
+        """Ürünün satış fiyatı (sorguda annotate edildiyse oradan okunur)"""
+        if hasattr(obj, 'satis_fiyati_deger'):
+            fiyat = obj.satis_fiyati_deger
+            return float(fiyat) if fiyat is not None else None
         try:
             fiyat = SatisFiyati.objects.get(urun=obj)
             return float(fiyat.satis_fiyati)
@@ -77,6 +72,38 @@ class SatisFiyatiSerializer(serializers.ModelSerializer):
         read_only_fields = ['satis_fiyati', 'guncelleme_tarihi']
 
 
+class TopluFiyatGuncelleSerializer(serializers.Serializer):
+    """Toplu fiyat güncelleme (POST /api/satis-fiyatlari/toplu-guncelle/)"""
+    kategoriler = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    tedarikciler = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    urunler = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+    tumu = serializers.BooleanField(required=False, default=False)
+    kar_orani = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, required=False)
+    kdv = serializers.ChoiceField(choices=SatisFiyati.KDV_ORANLARI, required=False)
+    iskonto_orani = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False)
+    kuru_calisma = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, data):
+        if not (data['kategoriler'] or data['tedarikciler'] or data['urunler'] or data['tumu']):
+            raise serializers.ValidationError('kategoriler, tedarikciler, urunler veya tumu verilmeli')
+        if not any(alan in data for alan in ('kar_orani', 'kdv', 'iskonto_orani')):
+            raise serializers.ValidationError('kar_orani, kdv veya iskonto_orani verilmeli')
+        return data
+    
+    def save(self):
+        from .servisler.fiyat import fiyat_hedefi, toplu_fiyat_guncelle
+        
+        veri = self.validated_data
+        fiyatlar = fiyat_hedefi(veri['kategoriler'], veri['tedarikciler'], veri['urunler'])
+        return toplu_fiyat_guncelle(
+            fiyatlar,
+            kar_orani=veri.get('kar_orani'),
+            kdv=veri.get('kdv'),
+            iskonto_orani=veri.get('iskonto_orani'),
+            kuru_calisma=veri['kuru_calisma'],
+        )
+
+
 # 7. SATIŞ SERİALİZERLERİ
 class SatisSerializer(serializers.ModelSerializer):
     urun_adi = serializers.CharField(source='urun.urun_adi', read_only=True)
@@ -85,7 +112,7 @@ class SatisSerializer(serializers.ModelSerializer):
     class Meta:
         model = Satis
         fields = '__all__'
-        read_only_fields = ['birim_fiyat', 'toplam_fiyat']
+        read_only_fields = ['birim_fiyat', 'toplam_fiyat', 'maliyet']
 
 
 class SatisFisiSerializer(serializers.ModelSerializer):
@@ -98,6 +125,18 @@ class SatisFisiSerializer(serializers.ModelSerializer):
         read_only_fields = ['fis_no', 'toplam_tutar', 'olusturma_tarihi']
 
 
+class SatisFisiOzetSerializer(serializers.ModelSerializer):
+    """Liste ekranları için satır detayı olmayan fiş özeti (?view=ozet)"""
+    kullanici_adi = serializers.CharField(source='kullanici.get_full_name', read_only=True)
+    urun_sayisi = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = SatisFisi
+        fields = ['id', 'fis_no', 'kullanici', 'kullanici_adi', 'toplam_tutar',
+                  'urun_sayisi', 'olusturma_tarihi']
+        read_only_fields = fields
+
+
 # 8. İADE SERİALİZERLERİ
 class TedarikciIadeSerializer(serializers.ModelSerializer):
     urun_adi = serializers.CharField(source='urun.urun_adi', read_only=True)
@@ -118,10 +157,29 @@ class MusteriIadeSerializer(serializers.ModelSerializer):
 
 # 9. KASA SERİALİZERLERİ
 class KasaSerializer(serializers.ModelSerializer):
+    acilis_bakiyesi = serializers.DecimalField(source='bakiye', max_digits=12, decimal_places=2, read_only=True)
+    bakiye = serializers.SerializerMethodField()
+    
     class Meta:
         model = Kasa
-        fields = '__all__'
+        fields = ['id', 'bakiye', 'acilis_bakiyesi', 'son_guncelleme']
         read_only_fields = ['son_guncelleme']
+    
+    def get_bakiye(self, obj):
+        """Kasa defterinden güncel bakiye (viewset bağlamda bir kez hesaplar)"""
+        bakiye = self.context.get('kasa_bakiyesi')
+        if bakiye is None:
+            from .servisler.kasa import kasa_bakiyesi
+            bakiye = kasa_bakiyesi()
+        return f'{bakiye:.2f}'
+
+
+class KasaHareketiSerializer(serializers.ModelSerializer):
+    tip_display = serializers.CharField(source='get_tip_display', read_only=True)
+    
+    class Meta:
+        model = KasaHareketi
+        fields = '__all__'
 
 
 class SatisKasaSerializer(serializers.ModelSerializer):
@@ -159,4 +217,93 @@ class AlisFisiSerializer(serializers.ModelSerializer):
     class Meta:
         model = AlisFisi
         fields = '__all__'
-        read_only_fields = ['lot_no', 'toplam_tutar', 'kayit_tarihi']
\ No newline at end of file
+        read_only_fields = ['lot_no', 'toplam_tutar', 'kayit_tarihi']
+
+
+class AlisFisiOzetSerializer(serializers.ModelSerializer):
+    """Liste ekranları için satır detayı olmayan alış fişi özeti (?view=ozet)"""
+    tedarikci_adi = serializers.CharField(source='tedarikci.firma_adi', read_only=True)
+    kullanici_adi = serializers.CharField(source='kullanici.get_full_name', read_only=True)
+    urun_sayisi = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = AlisFisi
+        fields = ['id', 'fis_no', 'tedarikci', 'tedarikci_adi', 'lot_no', 'toplam_tutar',
+                  'urun_sayisi', 'fis_tarihi', 'kayit_tarihi', 'kullanici', 'kullanici_adi']
+        read_only_fields = fields
+
+class AlisTopluSatirSerializer(serializers.Serializer):
+    """Toplu mal kabulde fatura satırı (ürünler üst serializer'da tek sorguda doğrulanır)"""
+    urun = serializers.CharField(max_length=100)
+    miktar = serializers.IntegerField(min_value=1)
+    birim_fiyat = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    konum = serializers.CharField(max_length=50)
+    son_kullanma_tarihi = serializers.DateField(required=False, allow_null=True)
+
+
+class AlisFisiTopluSerializer(serializers.ModelSerializer):
+    """Alış fişi ve tüm satırları tek istekte (POST /api/alis-fisleri/toplu/)"""
+    detaylar = AlisTopluSatirSerializer(many=True, allow_empty=False)
+    
+    class Meta:
+        model = AlisFisi
+        fields = ['fis_no', 'tedarikci', 'fis_tarihi', 'detaylar']
+    
+    def validate_detaylar(self, detaylar):
+        urun_idleri = {satir['urun'] for satir in detaylar}
+        mevcut = set(Urun.objects.filter(pk__in=urun_idleri).values_list('pk', flat=True))
+        
+        hatalar = [
+            {} if satir['urun'] in mevcut else {'urun': [f"Geçersiz ürün: {satir['urun']}"]}
+            for satir in detaylar
+        ]
+        if any(hatalar):
+            raise serializers.ValidationError(hatalar)
+        return detaylar
+    
+    def create(self, validated_data):
+        from .servisler.alis import toplu_mal_kabul
+        
+        detaylar = validated_data.pop('detaylar')
+        satirlar = [
+            AlisDetay(
+                urun_id=satir['urun'],
+                miktar=satir['miktar'],
+                birim_fiyat=satir['birim_fiyat'],
+                konum=satir['konum'],
+                son_kullanma_tarihi=satir.get('son_kullanma_tarihi'),
+            )
+            for satir in detaylar
+        ]
+        return toplu_mal_kabul(AlisFisi(**validated_data), satirlar)
+
+
+class SepetKalemiSerializer(serializers.Serializer):
+    urun = serializers.CharField(max_length=100)
+    miktar = serializers.IntegerField(min_value=1)
+
+
+class SepetSerializer(serializers.Serializer):
+    """POS sepeti (POST /api/satis-fisleri/checkout/)"""
+    kalemler = SepetKalemiSerializer(many=True, allow_empty=False)
+    musteri_grubu = serializers.PrimaryKeyRelatedField(
+        queryset=MusteriGrubu.objects.all(), required=False, allow_null=True
+    )
+    
+    def create(self, validated_data):
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from .servisler.satis import sepeti_sat
+        
+        kalemler = validated_data['kalemler']
+        try:
+            return sepeti_sat(
+                validated_data['kullanici'],
+                [(kalem['urun'], kalem['miktar']) for kalem in kalemler],
+                musteri_grubu=validated_data.get('musteri_grubu'),
+            )
+        except DjangoValidationError as hata:
+            # Satır hataları kalem sırasıyla döner (hatasız satırlar boş)
+            raise serializers.ValidationError({'kalemler': [
+                {'miktar': hata.message_dict[str(sira)]} if str(sira) in hata.message_dict else {}
+                for sira in range(len(kalemler))
+            ]})
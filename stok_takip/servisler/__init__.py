@@ -0,0 +1 @@
+"""Modellerin save() metotlarından ve API'den ortak kullanılan iş servisleri"""
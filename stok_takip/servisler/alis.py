@@ -0,0 +1,55 @@
+from django.db import transaction
+
+from ..models import AlisDetay, UrunYerlesimYeri
+from .maliyet import satis_fiyatina_aktar
+from .stok import mal_kabul_sayaclarini_guncelle
+
+
+def toplu_mal_kabul(fis, satirlar):
+    """
+    Alış fişini tüm satırlarıyla tek transaction'da kaydeder.
+
+    AlisDetay.save satır başına fiş toplamını, kasayı ve fiyatları yeniden
+    hesapladığı için çok satırlı faturalarda maliyet satır sayısının karesiyle
+    artar. Burada fiş toplamı baştan hesaplanıp fiş (ve kasa hareketi) bir kez
+    yazılır; satırlar ve lotlar bulk_create ile oluşturulur, stok sayacı ve
+    ortalama maliyet tek bulk_update ile, satış fiyatları ürün başına bir kez
+    güncellenir.
+
+    fis: kaydedilmemiş AlisFisi, satirlar: kaydedilmemiş AlisDetay listesi
+    """
+    for satir in satirlar:
+        satir.toplam_fiyat = satir.birim_fiyat * satir.miktar
+    fis.toplam_tutar = sum(satir.toplam_fiyat for satir in satirlar)
+
+    with transaction.atomic():
+        fis.save()
+
+        for satir in satirlar:
+            satir.fis = fis
+        AlisDetay.objects.bulk_create(satirlar)
+
+        # Aynı ürün/konumdaki satırlar fişin lotunda birleşir (AlisDetay.save ile aynı)
+        lotlar = {}
+        girisler = {}
+        for satir in satirlar:
+            lot = lotlar.get((satir.urun_id, satir.konum))
+            if lot is None:
+                lotlar[(satir.urun_id, satir.konum)] = UrunYerlesimYeri(
+                    urun_id=satir.urun_id,
+                    lot_no=fis.lot_no,
+                    konum=satir.konum,
+                    miktar=satir.miktar,
+                    son_kullanma_tarihi=satir.son_kullanma_tarihi
+                )
+            else:
+                lot.miktar += satir.miktar
+
+            miktar, tutar = girisler.get(satir.urun_id, (0, 0))
+            girisler[satir.urun_id] = (miktar + satir.miktar, tutar + satir.toplam_fiyat)
+
+        UrunYerlesimYeri.objects.bulk_create(lotlar.values())
+        mal_kabul_sayaclarini_guncelle(girisler)
+        satis_fiyatina_aktar(list(girisler))
+
+    return fis
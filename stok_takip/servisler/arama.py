@@ -0,0 +1,167 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Max, Q, When
+
+from ..models import Urun, UrunAramaTerimi
+
+
+# Kelimenin geldiği alana göre puanı; tam eşleşme iki katı sayılır
+STOK_NO = BARKOD = 8
+URUN_ADI = 4
+KATEGORI = 1
+
+ARAMA_LIMITI = 20
+EN_FAZLA_SONUC = 100
+EN_FAZLA_KELIME = 8
+ADAY_SINIRI = 1000
+TERIM_UZUNLUGU = 100  # UrunAramaTerimi.terim max_length
+PARCA = 2000
+
+# Türkçe büyük/küçük harf: I -> ı, İ -> i. Ardından ı ve aksanlar sadeleştirilir;
+# "ÇİVİ", "çivi", "civi" ve "CIVI" aynı terime düşer.
+_TURKCE_KUCUK_HARF = str.maketrans({'I': 'ı', 'İ': 'i'})
+_NOKTASIZ_I = str.maketrans({'ı': 'i'})
+_KELIME = re.compile(r'\w+')
+
+
+def normallestir(metin):
+    """Aramada karşılaştırılan biçim: küçük harf, Türkçe harfler ve aksanlar sade"""
+    metin = (metin or '').translate(_TURKCE_KUCUK_HARF).lower().translate(_NOKTASIZ_I)
+    return ''.join(
+        harf for harf in unicodedata.normalize('NFKD', metin) if not unicodedata.combining(harf)
+    )
+
+
+def kelimeler(metin):
+    return [kelime[:TERIM_UZUNLUGU] for kelime in _KELIME.findall(normallestir(metin))]
+
+
+def urun_terimleri(stok_no, barkod, urun_adi, kategori_adi):
+    """{(terim, agirlik)} - bir ürünün dizin satırları"""
+    return {
+        (terim, agirlik)
+        for metin, agirlik in ((stok_no, STOK_NO), (barkod, BARKOD), (urun_adi, URUN_ADI), (kategori_adi, KATEGORI))
+        for terim in kelimeler(metin)
+    }
+
+
+def arama_terimlerini_guncelle(urunler):
+    """Ürünlerin dizin satırlarını yeniden yazar (silme + toplu ekleme)"""
+    UrunAramaTerimi.objects.filter(urun_id__in=[urun.pk for urun in urunler]).delete()
+    UrunAramaTerimi.objects.bulk_create([
+        UrunAramaTerimi(urun_id=urun.pk, terim=terim, agirlik=agirlik)
+        for urun in urunler
+        for terim, agirlik in urun_terimleri(urun.stok_no, urun.barkod, urun.urun_adi, urun.kategori.kategori_adi)
+    ], batch_size=PARCA)
+
+
+def kategori_terimlerini_guncelle(kategori):
+    """
+    Kategori adı değişince yalnızca o kategorideki ürünlerin kategori terimleri
+    yenilenir. Terimler değişmediyse (ör. sadece sipariş eşiği) dokunulmaz.
+    """
+    terimler = {terim for terim, _ in urun_terimleri(None, None, None, kategori.kategori_adi)}
+    urunler = Urun.objects.filter(kategori=kategori)
+    ornek = urunler.values_list('pk', flat=True).first()
+    if ornek is None or set(
+        UrunAramaTerimi.objects.filter(urun_id=ornek, agirlik=KATEGORI).values_list('terim', flat=True)
+    ) == terimler:
+        return
+
+    urun_idleri = list(urunler.values_list('pk', flat=True))
+    UrunAramaTerimi.objects.filter(agirlik=KATEGORI, urun_id__in=urunler.values('pk')).delete()
+    UrunAramaTerimi.objects.bulk_create([
+        UrunAramaTerimi(urun_id=urun_id, terim=terim, agirlik=KATEGORI)
+        for urun_id in urun_idleri
+        for terim in terimler
+    ], batch_size=PARCA)
+
+
+def arama_dizinini_yeniden_olustur(parca=PARCA):
+    """Tüm dizini ürünlerden yeniden kurar; ürünler birincil anahtar sırasıyla parça parça okunur"""
+    UrunAramaTerimi.objects.all().delete()
+    sayi = 0
+    son = None
+    while True:
+        urunler = Urun.objects.select_related('kategori').order_by('pk')
+        if son is not None:
+            urunler = urunler.filter(pk__gt=son)
+        urunler = list(urunler[:parca])
+        if not urunler:
+            return sayi
+        arama_terimlerini_guncelle(urunler)
+        sayi += len(urunler)
+        son = urunler[-1].pk
+
+
+def _ile_baslar(kelime):
+    """
+    terim kelime ile başlar. MySQL'de LIKE 'x%' indeks aralığıdır; diğer
+    arka uçlarda (SQLite BINARY sütun, PostgreSQL) LIKE indeks kullanmadığından
+    aynı önek aralık olarak verilir. Terimler zaten küçük harflidir.
+    """
+    if connection.vendor == 'mysql':
+        return Q(terim__istartswith=kelime)
+    return Q(terim__gte=kelime, terim__lt=kelime + '\U0010ffff')
+
+
+def _adaylar(sorgu_kelimeleri):
+    """
+    Puanlanacak ürünler: en seçici kelimeyle başlayan terimlerin ürünleri.
+    Kelimeler uzundan kısaya denenir; ADAY_SINIRI kadar ya da daha az terimle
+    eşleşen ilk kelimenin ürünlerinin hepsi alınır (sonuç kesindir). Tüm
+    kelimeler genelse (ör. ortak stok no öneki) en uzun kelimenin indeks
+    sırasındaki ilk terimleri kullanılır; tam eşleşen terim aralığın başındadır.
+    """
+    ilk = None
+    for kelime in sorted(sorgu_kelimeleri, key=len, reverse=True):
+        urun_idleri = list(
+            UrunAramaTerimi.objects.filter(_ile_baslar(kelime))
+            .order_by('terim', 'urun_id')
+            .values_list('urun_id', flat=True)[:ADAY_SINIRI + 1]
+        )
+        if len(urun_idleri) <= ADAY_SINIRI:
+            return set(urun_idleri)
+        if ilk is None:
+            ilk = set(urun_idleri[:ADAY_SINIRI])
+    return ilk
+
+
+def urun_ara(sorgu, limit=ARAMA_LIMITI):
+    """
+    Sorgudaki her kelimeyle başlayan bir terimi olan ürünlerin id'leri, puana
+    göre sıralı. Bir ürünün puanı, her kelime için eşleşen en iyi terimin
+    ağırlığıdır; terimle tam eşleşme iki kat sayılır. Puanlama _adaylar()
+    ile sınırlanan ürünler üzerinde yapılır (aday sorgusu + puan sorgusu).
+    """
+    sorgu_kelimeleri = list(dict.fromkeys(kelimeler(sorgu)))[:EN_FAZLA_KELIME]
+    if not sorgu_kelimeleri:
+        return []
+    adaylar = _adaylar(sorgu_kelimeleri)
+    if not adaylar:
+        return []
+
+    eslesme = Q()
+    puanlar = {}
+    for sira, kelime in enumerate(sorgu_kelimeleri):
+        eslesme |= _ile_baslar(kelime)
+        puanlar[f'puan_{sira}'] = Max(Case(
+            When(terim=kelime, then=F('agirlik') * 2),
+            When(_ile_baslar(kelime), then=F('agirlik')),
+            output_field=IntegerField(),
+        ))
+
+    toplam = None
+    for ad in puanlar:
+        toplam = F(ad) if toplam is None else toplam + F(ad)
+    return list(
+        UrunAramaTerimi.objects.filter(eslesme, urun_id__in=adaylar)
+        .values('urun_id')
+        .annotate(**puanlar)
+        .filter(**{f'{ad}__isnull': False for ad in puanlar})  # Her kelime eşleşmeli
+        .annotate(puan=toplam)
+        .order_by('-puan', 'urun_id')
+        .values_list('urun_id', flat=True)[:limit]
+    )
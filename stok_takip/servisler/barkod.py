@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .onbellek import simdi_ve_commit_sonrasi
+
+
+# Önbellek settings.CACHES içindeki 'barkod' tanımını kullanır (yoksa 'default').
+# Süre (TIMEOUT), boyut sınırı ve LRU silme arka ucun ayarlarıdır (locmem: MAX_ENTRIES)
+BARKOD_ONBELLEGI = 'barkod' if 'barkod' in settings.CACHES else 'default'
+
+# Sayaçlar ölçtükleri kayıtlardan ayrı tutulur: barkod önbelleğinin boyut
+# sınırı ya da temizliği isabet oranını sıfırlamamalı
+SAYAC_ONBELLEGI = 'barkod_sayac' if 'barkod_sayac' in settings.CACHES else 'default'
+
+ISABET_ANAHTARI = 'barkod_sayac:isabet'
+ISKALAMA_ANAHTARI = 'barkod_sayac:iskalama'
+
+
+def _onbellek():
+    return caches[BARKOD_ONBELLEGI]
+
+
+def _barkod_anahtari(barkod):
+    return f'barkod:{barkod}'
+
+
+def _urun_anahtari(urun_id):
+    # Ürün değiştiğinde hangi barkod kaydının silineceğini bulmak için
+    return f'barkod_urun:{urun_id}'
+
+
+def _sayac_artir(anahtar):
+    onbellek = caches[SAYAC_ONBELLEGI]
+    try:
+        onbellek.incr(anahtar)
+    except ValueError:
+        if not onbellek.add(anahtar, 1, timeout=None):
+            onbellek.incr(anahtar)
+
+
+def barkod_ara(barkod, yukle):
+    """
+    Barkoda ait ürün yanıtını önbellekten döner; yoksa yukle()'yi çağırıp
+    sonucu (urun_id, veri) saklar. yukle() ürün bulunamazsa None döner;
+    bulunamayan barkodlar önbelleğe alınmaz.
+    """
+    onbellek = _onbellek()
+    veri = onbellek.get(_barkod_anahtari(barkod))
+    if veri is not None:
+        _sayac_artir(ISABET_ANAHTARI)
+        return veri
+
+    _sayac_artir(ISKALAMA_ANAHTARI)
+    sonuc = yukle()
+    if sonuc is None:
+        return None
+
+    urun_id, veri = sonuc
+    onbellek.set_many({
+        _barkod_anahtari(barkod): veri,
+        _urun_anahtari(urun_id): barkod,
+    })
+    return veri
+
+
+def _temizle(urun_idleri, barkodlar):
+    onbellek = _onbellek()
+    urun_anahtarlari = [_urun_anahtari(urun_id) for urun_id in urun_idleri]
+    barkodlar = set(barkodlar) | set(onbellek.get_many(urun_anahtarlari).values())
+    onbellek.delete_many(urun_anahtarlari + [_barkod_anahtari(barkod) for barkod in barkodlar if barkod])
+
+
+def barkod_onbellegini_temizle(urun_idleri, barkodlar=()):
+    """Ürünlerin önbellekteki barkod yanıtlarını siler (commit sonrasında da tekrar)"""
+    urun_idleri = list(urun_idleri)
+    barkodlar = list(barkodlar)
+    if urun_idleri or barkodlar:
+        simdi_ve_commit_sonrasi(lambda: _temizle(urun_idleri, barkodlar))
+
+
+def barkod_onbellek_istatistigi():
+    """Önbellek isabet/ıskalama sayaçları"""
+    sayaclar = caches[SAYAC_ONBELLEGI].get_many([ISABET_ANAHTARI, ISKALAMA_ANAHTARI])
+    isabet = sayaclar.get(ISABET_ANAHTARI, 0)
+    iskalama = sayaclar.get(ISKALAMA_ANAHTARI, 0)
+    toplam = isabet + iskalama
+    return {
+        'isabet': isabet,
+        'iskalama': iskalama,
+        'isabet_orani': round(isabet / toplam, 4) if toplam else None,
+    }
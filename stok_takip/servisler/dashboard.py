@@ -0,0 +1,86 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from ..models import GunlukSatisOzet, SatisFisi, Urun
+from . import kasa
+from .onbellek import simdi_ve_commit_sonrasi
+
+
+# Önbellek settings.CACHES içindeki 'dashboard' tanımını kullanır (yoksa 'default');
+# kısa TIMEOUT ile tutulur, yazma yollarında ayrıca silinir
+DASHBOARD_ONBELLEGI = 'dashboard' if 'dashboard' in settings.CACHES else 'default'
+
+
+def _onbellek():
+    return caches[DASHBOARD_ONBELLEGI]
+
+
+def _anahtar(ad):
+    return f'dashboard:{ad}'
+
+
+def _onbellekten(ad, hesapla):
+    onbellek = _onbellek()
+    deger = onbellek.get(_anahtar(ad))
+    if deger is None:
+        deger = hesapla()
+        onbellek.set(_anahtar(ad), deger)
+    return deger
+
+
+def dashboard_onbellegini_temizle(*adlar):
+    """Verilen dashboard değerlerini önbellekten siler (commit sonrasında da tekrar)"""
+    anahtarlar = [_anahtar(ad) for ad in adlar]
+    simdi_ve_commit_sonrasi(lambda: _onbellek().delete_many(anahtarlar))
+
+
+def satis_ozeti():
+    """
+    Bugünün ve bu ayın brüt satış toplamı (günlük satış özetinden, iadeler
+    düşülmeden; Satis tablosu toplamıyla aynı) ile bugünkü
+    fiş sayısı (günün başından itibaren, indeksli aralık sorgusu)
+    """
+
+    def hesapla():
+        bugun = timezone.localdate()
+        ozet = GunlukSatisOzet.objects.filter(tarih__gte=bugun.replace(day=1), tarih__lte=bugun).aggregate(
+            bugun=Sum('brut_ciro', filter=Q(tarih=bugun)),
+            bu_ay=Sum('brut_ciro'),
+        )
+        gun_basi = timezone.make_aware(datetime.combine(bugun, time.min))
+        return {
+            'bugun': float(ozet['bugun'] or 0),
+            'bu_ay': float(ozet['bu_ay'] or 0),
+            'fis_sayisi': SatisFisi.objects.filter(olusturma_tarihi__gte=gun_basi).count(),
+        }
+
+    return _onbellekten('satis_ozeti', hesapla)
+
+
+def urun_sayisi():
+    return _onbellekten('urun_sayisi', Urun.objects.count)
+
+
+def dusuk_stok_sayisi():
+    """Varsayılan eşikle düşük stoklu ürün sayısı"""
+    from .stok import dusuk_stoklu_urunler  # stok servisi bu modülü içe aktarır
+
+    return _onbellekten('dusuk_stok_sayisi', lambda: dusuk_stoklu_urunler(Urun.objects.all()).count())
+
+
+def kasa_bakiyesi():
+    return _onbellekten('kasa_bakiyesi', kasa.kasa_bakiyesi)
+
+
+def dashboard_verisi():
+    """Dashboard rakamlarının tamamı"""
+    return {
+        'satis_ozeti': satis_ozeti(),
+        'urun_sayisi': urun_sayisi(),
+        'dusuk_stok_sayisi': dusuk_stok_sayisi(),
+        'kasa_bakiyesi': f'{kasa_bakiyesi():.2f}',
+    }
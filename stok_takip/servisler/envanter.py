@@ -0,0 +1,208 @@
+import csv
+import json
+import re
+import zipfile
+from datetime import date
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from ..models import UrunYerlesimYeri
+
+
+# (alan, başlık) — CSV/XLSX sütunları bu sırayla yazılır
+SUTUNLAR = [
+    ('stok_no', 'Stok No'),
+    ('urun_adi', 'Ürün Adı'),
+    ('kategori', 'Kategori'),
+    ('birim', 'Birim'),
+    ('toplam_stok', 'Toplam Stok'),
+    ('lot_no', 'Lot No'),
+    ('konum', 'Konum'),
+    ('miktar', 'Miktar'),
+    ('son_kullanma_tarihi', 'SKT'),
+]
+
+SAYFA_BOYUTU = 2000
+
+
+def envanter_lotlari(kategori=None, konum=None):
+    """Rapora girecek lotlar (stoktakiler); kategori: id veya ad, konum: konum öneki"""
+    lotlar = UrunYerlesimYeri.objects.filter(miktar__gt=0)
+    if kategori:
+        if str(kategori).isdigit():
+            lotlar = lotlar.filter(urun__kategori_id=kategori)
+        else:
+            lotlar = lotlar.filter(urun__kategori__kategori_adi__iexact=kategori)
+    if konum:
+        lotlar = lotlar.filter(konum__istartswith=konum)
+    return lotlar
+
+
+def envanter_satirlari(kategori=None, konum=None, sayfa_boyutu=SAYFA_BOYUTU):
+    """
+    Stoktaki lotları ürünleriyle birlikte (stok_no, lot) sırasıyla üretir;
+    her satır SUTUNLAR alanlarını içeren bir sözlüktür. Lot ve ürün tek
+    birleşik sorguda okunur, sayfalama (urun_id, pk) üzerinden anahtar
+    tabanlıdır; böylece MySQL'de de bellek kullanımı sayfa boyutuyla
+    sınırlı kalır. Süzgeçler envanter_lotlari() ile aynıdır.
+    """
+    lotlar = envanter_lotlari(kategori, konum).order_by('urun_id', 'pk').values_list(
+        'pk', 'urun_id', 'urun__urun_adi', 'urun__kategori__kategori_adi', 'urun__birim',
+        'urun__toplam_stok', 'lot_no', 'konum', 'miktar', 'son_kullanma_tarihi',
+    )
+
+    sayfa = lotlar[:sayfa_boyutu]
+    while True:
+        satirlar = list(sayfa)
+        for pk, *degerler in satirlar:
+            yield dict(zip((alan for alan, _ in SUTUNLAR), degerler))
+        if len(satirlar) < sayfa_boyutu:
+            return
+        son_pk, son_urun_id = satirlar[-1][:2]
+        sayfa = lotlar.filter(Q(urun_id__gt=son_urun_id) | Q(urun_id=son_urun_id, pk__gt=son_pk))[:sayfa_boyutu]
+
+
+def urunlere_grupla(satirlar):
+    """Satırları ürün başına {'urun': ilk satır, 'lotlar': [...]} olarak gruplar"""
+    for _, lotlar in groupby(satirlar, key=lambda satir: satir['stok_no']):
+        lotlar = list(lotlar)
+        yield {'urun': lotlar[0], 'lotlar': lotlar}
+
+
+class _Tampon:
+    """Yazılanı biriktirip parça parça veren, konumlanamayan dosya nesnesi"""
+
+    def __init__(self):
+        self.parcalar = []
+
+    def write(self, veri):
+        self.parcalar.append(veri)
+        return len(veri)
+
+    def flush(self):
+        pass
+
+    def bosalt(self):
+        veri = b''.join(self.parcalar)
+        self.parcalar = []
+        return veri
+
+
+class _Yanki:
+    """csv.writer için: yazılan satırı geri döner"""
+
+    def write(self, veri):
+        return veri
+
+
+def csv_parcalari(satirlar):
+    """Envanter satırlarını UTF-8 (BOM'lu, Excel uyumlu) CSV satırları olarak üretir"""
+    yazici = csv.writer(_Yanki())
+    yield '\ufeff' + yazici.writerow([baslik for _, baslik in SUTUNLAR])
+    for satir in satirlar:
+        yield yazici.writerow([
+            satir[alan].isoformat() if isinstance(satir[alan], date) else satir[alan]
+            for alan, _ in SUTUNLAR
+        ])
+
+
+def json_parcalari(satirlar):
+    """Envanter satırlarını tek bir JSON dizisi olarak (satır başına bir nesne) üretir"""
+    yield '['
+    for sira, satir in enumerate(satirlar):
+        yield (',\n' if sira else '\n') + json.dumps(satir, cls=DjangoJSONEncoder, ensure_ascii=False)
+    yield '\n]\n'
+
+
+# XML 1.0'da izin verilmeyen kontrol karakterleri
+_GECERSIZ_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EXCEL_TARIH_BASI = date(1899, 12, 30)
+
+_XLSX_DOSYALARI = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Envanter" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Stil 1: tarih hücreleri (yerleşik tarih biçimi 14)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _xlsx_hucre(deger):
+    if deger is None:
+        return '<c/>'
+    if isinstance(deger, date):
+        return f'<c s="1"><v>{(deger - _EXCEL_TARIH_BASI).days}</v></c>'
+    if isinstance(deger, (int, float)) and not isinstance(deger, bool):
+        return f'<c><v>{deger}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(_GECERSIZ_XML.sub("", str(deger)))}</t></is></c>'
+
+
+def _xlsx_satir(degerler):
+    return '<row>' + ''.join(_xlsx_hucre(deger) for deger in degerler) + '</row>'
+
+
+def xlsx_parcalari(satirlar, parca_satir_sayisi=500):
+    """
+    Envanter satırlarını tek sayfalık bir XLSX dosyası olarak parça parça
+    üretir. Sayfa XML'i zip akışına satır satır yazılır (satır içi metin
+    hücreleri, paylaşılan metin tablosu yok); dosyanın tamamı bellekte
+    tutulmaz.
+    """
+    tampon = _Tampon()
+    with zipfile.ZipFile(tampon, 'w', zipfile.ZIP_DEFLATED) as arsiv:
+        for ad, icerik in _XLSX_DOSYALARI.items():
+            arsiv.writestr(ad, icerik)
+        yield tampon.bosalt()
+
+        with arsiv.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sayfa:
+            sayfa.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_satir(baslik for _, baslik in SUTUNLAR)
+            ).encode())
+            for sira, satir in enumerate(satirlar, 1):
+                sayfa.write(_xlsx_satir(satir[alan] for alan, _ in SUTUNLAR).encode())
+                if sira % parca_satir_sayisi == 0:
+                    yield tampon.bosalt()
+            sayfa.write(b'</sheetData></worksheet>')
+    yield tampon.bosalt()
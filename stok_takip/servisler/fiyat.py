@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, DecimalField, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Cast, Mod, Round
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from ..models import AlisDetay, SatisFiyati, Urun
+from .barkod import barkod_onbellegini_temizle
+
+
+# Tam sayı hesabın (pay, 10^-12 TL biriminde) BIGINT sınırını aşmadığı satırlar:
+# pay = alim * (100 + kar) * (100 + kdv) * (100 - iskonto) * 10^6 < 2^63
+PAY_SINIRI = Decimal('9000000000000')
+KURUS = Decimal('0.01')
+BOLEN = 10 ** 10
+
+
+def _yuzde_bir(ifade):
+    """İki ondalıklı değerin 100 katı, tam sayı olarak"""
+    return Cast(Round(ifade * Value(100)), BigIntegerField())
+
+
+def _ifade(deger, alan):
+    return F(alan) if deger is None else Value(deger)
+
+
+def satis_fiyati_ifadesi(kar_orani=None, kdv=None, iskonto_orani=None):
+    """
+    SatisFiyati.satis_fiyati_hesapla() formülünün SQL karşılığı; None verilen
+    oranlar satırdaki değerden okunur. Hesap tam sayılarla yapılır (SQLite'ta
+    ondalık alanlar kayan noktalıdır):
+
+        pay = alim*100 * (10000 + kar*100) * (100 + kdv) * (10000 - iskonto*100)
+        satis_fiyati = pay / 10^12, kuruşa quantize() gibi yarımı çifte yuvarlanır
+
+    Kalan r = pay mod 10^10 iken 2r + (bölüm mod 2) > 10^10 ise yukarı yuvarlanır.
+    """
+    pay = ExpressionWrapper(
+        _yuzde_bir(F('alim_fiyati'))
+        * (Value(10000) + _yuzde_bir(_ifade(kar_orani, 'kar_orani')))
+        * (Value(100) + _ifade(kdv, 'kdv'))
+        * (Value(10000) - _yuzde_bir(_ifade(iskonto_orani, 'iskonto_orani'))),
+        output_field=BigIntegerField(),
+    )
+    kalan = Mod(pay, Value(BOLEN))
+    bolum = ExpressionWrapper((pay - kalan) / Value(BOLEN), output_field=BigIntegerField())
+    yukari = Case(
+        When(GreaterThan(kalan * Value(2) + Mod(bolum, Value(2)), Value(BOLEN)), then=Value(1)),
+        default=Value(0),
+    )
+    return ExpressionWrapper(
+        (bolum + yukari) * Value(KURUS),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def _tam_sayiya_sigar(kar_orani=None, kdv=None, iskonto_orani=None):
+    """Tam sayı hesabın taşmadığı ve fiyatın negatif olmadığı satırlar"""
+    tahmin = ExpressionWrapper(
+        F('alim_fiyati')
+        * (Value(100) + _ifade(kar_orani, 'kar_orani'))
+        * (Value(100) + _ifade(kdv, 'kdv'))
+        * (Value(100) - _ifade(iskonto_orani, 'iskonto_orani')),
+        output_field=DecimalField(),
+    )
+    return Q(GreaterThan(tahmin, Value(-1)) & ~Q(GreaterThan(tahmin, Value(PAY_SINIRI))))
+
+
+def fiyat_hedefi(kategoriler=(), tedarikciler=(), urunler=()):
+    """
+    Güncellenecek SatisFiyati satırları; verilen süzgeçlerin hepsine uyanlar.
+    Tedarikçi, ürünün o tedarikçiden alış faturası olmasıdır. Süzgeçler
+    başka tablolara alt sorgu olduğundan UPDATE tabloya JOIN eklemez.
+    """
+    fiyatlar = SatisFiyati.objects.all()
+    if kategoriler:
+        fiyatlar = fiyatlar.filter(urun_id__in=Urun.objects.filter(kategori_id__in=kategoriler).values('pk'))
+    if tedarikciler:
+        fiyatlar = fiyatlar.filter(urun_id__in=AlisDetay.objects.filter(fis__tedarikci_id__in=tedarikciler).values('urun_id'))
+    if urunler:
+        fiyatlar = fiyatlar.filter(urun_id__in=urunler)
+    return fiyatlar
+
+
+def toplu_fiyat_guncelle(fiyatlar, kar_orani=None, kdv=None, iskonto_orani=None, kuru_calisma=False, ornek_sayisi=20):
+    """
+    fiyatlar'daki satırlara yeni kâr/KDV/iskonto oranlarını (None olanlar
+    değişmez) uygular ve satış fiyatını tek UPDATE ile yeniden hesaplar.
+    Sorgu güncellemesi sinyal göndermediğinden barkod önbelleği burada
+    temizlenir. Tam sayı sınırını aşan (pratikte olmayan) satırlar tek tek
+    save() ile hesaplanır. kuru_calisma=True ise hiçbir şey yazılmaz.
+    Dönüş: {'guncellenen': satır sayısı, 'ornekler': [ilk satırların eski/yeni fiyatı]}
+    """
+    oranlar = {'kar_orani': kar_orani, 'kdv': kdv, 'iskonto_orani': iskonto_orani}
+    yeni_fiyat = satis_fiyati_ifadesi(**oranlar)
+    sigar = _tam_sayiya_sigar(**oranlar)
+    degisenler = {alan: deger for alan, deger in oranlar.items() if deger is not None}
+
+    ornekler = [
+        {'urun': urun_id, 'urun_adi': urun_adi, 'eski_fiyat': eski, 'yeni_fiyat': yeni.quantize(KURUS)}
+        for urun_id, urun_adi, eski, yeni in fiyatlar.filter(sigar).annotate(yeni=yeni_fiyat)
+        .order_by('urun_id', 'pk').values_list('urun_id', 'urun__urun_adi', 'satis_fiyati', 'yeni')[:ornek_sayisi]
+    ]
+    if kuru_calisma:
+        return {'guncellenen': fiyatlar.count(), 'ornekler': ornekler}
+
+    with transaction.atomic():
+        urun_idleri = set(fiyatlar.values_list('urun_id', flat=True))
+        guncellenen = fiyatlar.filter(sigar).update(
+            satis_fiyati=yeni_fiyat, guncelleme_tarihi=timezone.now(), **degisenler
+        )
+        for fiyat in fiyatlar.exclude(sigar):
+            for alan, deger in degisenler.items():
+                setattr(fiyat, alan, deger)
+            fiyat.save()
+            guncellenen += 1
+
+    barkod_onbellegini_temizle(urun_idleri)
+    return {'guncellenen': guncellenen, 'ornekler': ornekler}
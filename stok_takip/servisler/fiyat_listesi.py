@@ -0,0 +1,134 @@
+from collections import namedtuple
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from ..models import DonemselFiyat, SatisFiyati
+from .barkod import barkod_onbellegini_temizle
+from .onbellek import simdi_ve_commit_sonrasi
+
+
+# Etkin dönemsel fiyat tablosu her süreçte bellekte tutulur. Değişiklikte
+# ortak önbellekteki sürüm anahtarı yenilenir; süreçler bir sonraki
+# çözümlemede sürüm farkını görüp tabloyu yeniden yükler. Tablo ayrıca
+# içindeki en yakın başlangıç/bitiş anında kendiliğinden geçersizleşir.
+SURUM_ANAHTARI = 'fiyat_listesi:surum'
+
+AktifTablo = namedtuple('AktifTablo', 'surum gecerli_bitis fiyatlar')  # fiyatlar: {(urun_id, grup_id): fiyat}
+
+_tablo = AktifTablo(None, None, {})
+
+
+def _onbellek():
+    return caches['default']
+
+
+def aktif_fiyat_tablosunu_yenile():
+    """Tüm süreçlerin etkin fiyat tablosunu geçersiz kılar (commit sonrasında da tekrar)"""
+    simdi_ve_commit_sonrasi(lambda: _onbellek().set(SURUM_ANAHTARI, uuid4().hex, None))
+
+
+def _gecerli(zaman):
+    return Q(gecerlilik_baslangic__lte=zaman) & (Q(gecerlilik_bitis__isnull=True) | Q(gecerlilik_bitis__gt=zaman))
+
+
+def _tabloyu_yukle(surum, simdi):
+    """Şu an geçerli kayıtlar ve tablonun değişeceği ilk an (iki sorgu)"""
+    fiyatlar = {}
+    gecerli_bitis = None
+    for urun_id, grup_id, fiyat, bitis in (
+        DonemselFiyat.objects.filter(_gecerli(simdi))
+        .order_by('gecerlilik_baslangic', 'pk')
+        .values_list('urun_id', 'musteri_grubu_id', 'satis_fiyati', 'gecerlilik_bitis')
+    ):
+        fiyatlar[(urun_id, grup_id)] = fiyat  # Başlangıcı yeni olan eskinin üzerine yazar
+        if bitis is not None and (gecerli_bitis is None or bitis < gecerli_bitis):
+            gecerli_bitis = bitis
+
+    sonraki = DonemselFiyat.objects.filter(gecerlilik_baslangic__gt=simdi).aggregate(
+        ilk=Min('gecerlilik_baslangic')
+    )['ilk']
+    if sonraki is not None and (gecerli_bitis is None or sonraki < gecerli_bitis):
+        gecerli_bitis = sonraki
+    return AktifTablo(surum, gecerli_bitis, fiyatlar)
+
+
+def aktif_fiyat_tablosu():
+    """Süreç içindeki etkin fiyat tablosu; sürüm değiştiyse veya süresi geçtiyse yeniden yüklenir"""
+    global _tablo
+
+    simdi = timezone.now()
+    surum = _onbellek().get_or_set(SURUM_ANAHTARI, lambda: uuid4().hex, None)
+    tablo = _tablo
+    if tablo.surum == surum and (tablo.gecerli_bitis is None or simdi < tablo.gecerli_bitis):
+        return tablo.fiyatlar
+
+    yeni = _tabloyu_yukle(surum, simdi)
+    if tablo.surum == surum:
+        # Zamanla değişen fiyatlar barkod yanıtlarında da eskimesin
+        degisen = {
+            urun_id for urun_id, grup_id in tablo.fiyatlar.keys() | yeni.fiyatlar.keys()
+            if tablo.fiyatlar.get((urun_id, grup_id)) != yeni.fiyatlar.get((urun_id, grup_id))
+        }
+        barkod_onbellegini_temizle(degisen)
+    _tablo = yeni
+    return yeni.fiyatlar
+
+
+def aktif_liste_fiyatlari(urun_idleri, musteri_grubu_id=None):
+    """
+    {urun_id: fiyat} - ürünlerin şu an geçerli dönemsel fiyatları (gruba özel
+    olan önce); dönemsel fiyatı olmayan ürünler sonuçta yer almaz.
+    Tablo güncelse sorgu atılmaz.
+    """
+    fiyatlar = aktif_fiyat_tablosu()
+    sonuc = {}
+    for urun_id in urun_idleri:
+        fiyat = fiyatlar.get((urun_id, musteri_grubu_id)) if musteri_grubu_id is not None else None
+        if fiyat is None:
+            fiyat = fiyatlar.get((urun_id, None))
+        if fiyat is not None:
+            sonuc[urun_id] = fiyat
+    return sonuc
+
+
+def satis_fiyatlari(urun_idleri, musteri_grubu_id=None):
+    """
+    {urun_id: fiyat} - sepet için toplu fiyat çözümü: geçerli dönemsel fiyat,
+    yoksa SatisFiyati.satis_fiyati. Fiyatı olmayan ürünler sonuçta yer almaz.
+    """
+    urun_idleri = set(urun_idleri)
+    liste = aktif_liste_fiyatlari(urun_idleri, musteri_grubu_id)
+    sonuc = {}
+    eksik = urun_idleri - liste.keys()
+    if eksik:
+        for urun_id, fiyat in SatisFiyati.objects.filter(urun_id__in=eksik).order_by('-pk').values_list('urun_id', 'satis_fiyati'):
+            sonuc.setdefault(urun_id, fiyat)
+    sonuc.update(liste)
+    return sonuc
+
+
+def zamandaki_liste_fiyatlari(urun_idleri, zaman, musteri_grubu_id=None):
+    """
+    {urun_id: fiyat} - verilen andaki dönemsel fiyatlar, tek sorguda
+    (donemsel_fiyat_zaman_idx). SatisFiyati geçmişi tutulmadığından o anda
+    dönemsel fiyatı olmayan ürünler sonuçta yer almaz.
+    """
+    gruplar = Q(musteri_grubu__isnull=True)
+    if musteri_grubu_id is not None:
+        gruplar |= Q(musteri_grubu_id=musteri_grubu_id)
+
+    sonuc = {}
+    oncelik = {}
+    for urun_id, grup_id, fiyat in (
+        DonemselFiyat.objects.filter(gruplar, _gecerli(zaman), urun_id__in=urun_idleri)
+        .order_by('gecerlilik_baslangic', 'pk')
+        .values_list('urun_id', 'musteri_grubu_id', 'satis_fiyati')
+    ):
+        # Gruba özel kayıt genel kayıttan önce gelir; aynı öncelikte yeni başlayan kazanır
+        if grup_id is not None or not oncelik.get(urun_id):
+            sonuc[urun_id] = fiyat
+            oncelik[urun_id] = grup_id is not None
+    return sonuc
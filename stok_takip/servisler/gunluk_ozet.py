@@ -0,0 +1,215 @@
+from dataclasses import dataclass, fields
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import Urun, Satis, MusteriIade, GunlukSatisOzet
+from .dashboard import dashboard_onbellegini_temizle
+
+
+KURUS = Decimal('0.01')
+
+
+def islem_gunu(zaman):
+    """Kaydın özette sayılacağı gün (yerel saat dilimine göre)"""
+    return timezone.localdate(zaman)
+
+
+@dataclass(frozen=True)
+class OzetFarki:
+    """Bir ürünün günlük özet satırına eklenecek fark (iade ve silmede negatif)"""
+    miktar: Decimal = Decimal('0')
+    ciro: Decimal = Decimal('0')  # Para iadeleri düşülmüş
+    brut_ciro: Decimal = Decimal('0')  # Sadece satışlar
+    maliyet: Decimal = None  # None: ürünün o anki ortalama maliyetinden
+    fis_sayisi: int = 0
+    satir_sayisi: int = 0
+
+    @classmethod
+    def satis(cls, satis, isaret=1, fis_sayisi=0, satir_sayisi=0):
+        """Satış satırının kayıtlı değerleriyle farkı (isaret=-1 geri alır)"""
+        tutar = satis.toplam_fiyat or 0
+        return cls(
+            miktar=isaret * satis.miktar, ciro=isaret * tutar, brut_ciro=isaret * tutar,
+            maliyet=isaret * satis.maliyet, fis_sayisi=fis_sayisi, satir_sayisi=satir_sayisi,
+        )
+
+    def __add__(self, diger):
+        return OzetFarki(**{
+            alan.name: getattr(self, alan.name) + getattr(diger, alan.name) for alan in fields(self)
+        })
+
+    def __bool__(self):
+        return any(getattr(self, alan.name) for alan in fields(self))
+
+
+def gunluk_ozete_yaz(tarih, farklar):
+    """
+    {urun_id: OzetFarki} farklarını günün özet satırlarına ekler. Eksik
+    satırlar önce boş olarak eklenir (eşzamanlı eklemede çakışan yok
+    sayılır), sonra satırlar kilitlenip bellekte toplanır ve tek bulk_update
+    ile yazılır; ürün sayısından bağımsız olarak sabit sayıda sorgu atılır.
+    """
+    farklar = {urun_id: fark for urun_id, fark in farklar.items() if fark}
+    if not farklar:
+        return
+
+    with transaction.atomic():
+        urunler = {
+            pk: (kategori_id, ortalama_maliyet)
+            for pk, kategori_id, ortalama_maliyet in Urun.objects.filter(pk__in=farklar)
+            .values_list('pk', 'kategori_id', 'ortalama_maliyet')
+        }
+        GunlukSatisOzet.objects.bulk_create([
+            GunlukSatisOzet(tarih=tarih, urun_id=urun_id, kategori_id=kategori_id)
+            for urun_id, (kategori_id, _) in urunler.items()
+        ], ignore_conflicts=True)
+
+        ozetler = list(GunlukSatisOzet.objects.select_for_update().filter(tarih=tarih, urun_id__in=farklar))
+        for ozet in ozetler:
+            fark = farklar[ozet.urun_id]
+            maliyet = fark.maliyet
+            if maliyet is None:
+                maliyet = (urunler[ozet.urun_id][1] * fark.miktar).quantize(KURUS)
+            ozet.miktar += fark.miktar
+            ozet.ciro += fark.ciro
+            ozet.brut_ciro += fark.brut_ciro
+            ozet.maliyet += maliyet
+            ozet.fis_sayisi += fark.fis_sayisi
+            ozet.satir_sayisi += fark.satir_sayisi
+        GunlukSatisOzet.objects.bulk_update(
+            ozetler, ['miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi']
+        )
+
+    dashboard_onbellegini_temizle('satis_ozeti')
+
+
+def satisi_ozete_yaz(satis, eski=None):
+    """
+    Satış satırını özete yazar. Düzenlemede eski satırın kayıtlı değerlerini
+    taşıyan bir Satis verilir; eski satır kendi ürün ve gününden kayıtlı
+    değerleriyle (maliyet dahil) tamamen geri alınıp yenisi eklenir, aynı
+    anahtarda kalan farklar birbirini götürür. Fiş sayısı, ürün fişte ilk kez
+    geçiyorsa artar, son kez çıkıyorsa azalır.
+    """
+    fis_idleri = {satis.fis_id} | ({eski.fis_id} if eski is not None else set())
+    fisteki_diger_urunler = set(
+        Satis.objects.filter(fis_id__in=fis_idleri).exclude(pk=satis.pk).values_list('fis_id', 'urun_id')
+    )
+    gunler = {}  # tarih: {urun_id: OzetFarki}
+
+    def ekle(kayit, fark):
+        fis = satis.fis if kayit.fis_id == satis.fis_id else kayit.fis
+        farklar = gunler.setdefault(islem_gunu(fis.olusturma_tarihi), {})
+        farklar[kayit.urun_id] = farklar.get(kayit.urun_id, OzetFarki(maliyet=Decimal('0'))) + fark
+
+    if eski is not None:
+        ekle(eski, OzetFarki.satis(
+            eski, isaret=-1, satir_sayisi=-1,
+            fis_sayisi=0 if (eski.fis_id, eski.urun_id) in fisteki_diger_urunler else -1,
+        ))
+    ekle(satis, OzetFarki.satis(
+        satis, satir_sayisi=1,
+        fis_sayisi=0 if (satis.fis_id, satis.urun_id) in fisteki_diger_urunler else 1,
+    ))
+
+    for tarih, farklar in gunler.items():
+        gunluk_ozete_yaz(tarih, farklar)
+
+
+def silinen_satisi_ozetten_dus(satis, dusulenler):
+    """
+    Silinen satış satırını günün özetinden kayıtlı miktar, ciro ve
+    maliyetiyle düşer. Fiş sayısı, fişte ürünün başka satırı kalmadıysa bir
+    kez azalır: aynı silme işleminde (ör. fişin tamamı) zaten düşülen
+    (fiş, ürün) çiftleri dusulenler kümesinde tutulur.
+    """
+    fis_sayisi = 0
+    anahtar = (satis.fis_id, satis.urun_id)
+    if anahtar not in dusulenler and not Satis.objects.filter(fis_id=satis.fis_id, urun_id=satis.urun_id).exists():
+        dusulenler.add(anahtar)
+        fis_sayisi = -1
+
+    gunluk_ozete_yaz(islem_gunu(satis.fis.olusturma_tarihi), {
+        satis.urun_id: OzetFarki.satis(satis, isaret=-1, fis_sayisi=fis_sayisi, satir_sayisi=-1)
+    })
+
+
+def musteri_iadesini_ozete_yaz(iade):
+    """Onaylanan müşteri iadesi iade gününün özetinden düşülür (ciro sadece para iadesinde)"""
+    ciro = iade.iade_tutari if iade.cozum_tipi == 'para' else 0
+    gunluk_ozete_yaz(islem_gunu(iade.iade_tarihi), {
+        iade.urun_id: OzetFarki(miktar=-iade.miktar, ciro=-ciro, maliyet=-iade.maliyet)
+    })
+
+
+def gunluk_ozeti_yeniden_olustur(baslangic=None, bitis=None):
+    """
+    Özeti satış ve onaylı müşteri iadesi kayıtlarından yeniden kurar
+    (bitis dahil). Maliyet, canlı akışta olduğu gibi satış ve iade
+    kayıtlarında saklanan maliyetlerden toplanır. Dönüş: oluşturulan satır sayısı.
+    """
+    def aralikta(tarih):
+        return (baslangic is None or tarih >= baslangic) and (bitis is None or tarih <= bitis)
+
+    def tarih_filtresi(alan):
+        filtre = {}
+        if baslangic is not None:
+            filtre[f'{alan}__date__gte'] = baslangic
+        if bitis is not None:
+            filtre[f'{alan}__date__lte'] = bitis
+        return filtre
+
+    satirlar = {}
+
+    def satir(tarih, urun_id, kategori_id):
+        return satirlar.setdefault((tarih, urun_id), GunlukSatisOzet(
+            tarih=tarih, urun_id=urun_id, kategori_id=kategori_id
+        ))
+
+    satislar = (
+        Satis.objects.filter(**tarih_filtresi('fis__olusturma_tarihi'))
+        .annotate(gun=TruncDate('fis__olusturma_tarihi'))
+        .values('gun', 'urun_id', 'urun__kategori_id')
+        .annotate(
+            miktar=Sum('miktar'), ciro=Sum('toplam_fiyat'), maliyet=Sum('maliyet'),
+            fis_sayisi=Count('fis', distinct=True), satir_sayisi=Count('pk'),
+        )
+        .order_by()
+    )
+    for toplam in satislar:
+        ozet = satir(toplam['gun'], toplam['urun_id'], toplam['urun__kategori_id'])
+        ozet.miktar += toplam['miktar']
+        ozet.ciro += toplam['ciro'] or 0
+        ozet.brut_ciro += toplam['ciro'] or 0
+        ozet.maliyet += toplam['maliyet'] or 0
+        ozet.fis_sayisi += toplam['fis_sayisi']
+        ozet.satir_sayisi += toplam['satir_sayisi']
+
+    iadeler = MusteriIade.objects.filter(
+        durum='onaylandi', **tarih_filtresi('iade_tarihi')
+    ).values_list('urun_id', 'urun__kategori_id', 'iade_tarihi', 'miktar', 'cozum_tipi', 'iade_tutari', 'maliyet')
+    for urun_id, kategori_id, iade_tarihi, miktar, cozum_tipi, iade_tutari, maliyet in iadeler.iterator(chunk_size=2000):
+        ozet = satir(islem_gunu(iade_tarihi), urun_id, kategori_id)
+        ozet.miktar -= miktar
+        ozet.maliyet -= maliyet
+        if cozum_tipi == 'para':
+            ozet.ciro -= iade_tutari
+
+    with transaction.atomic():
+        silinecek = GunlukSatisOzet.objects.all()
+        if baslangic is not None:
+            silinecek = silinecek.filter(tarih__gte=baslangic)
+        if bitis is not None:
+            silinecek = silinecek.filter(tarih__lte=bitis)
+        silinecek.delete()
+        GunlukSatisOzet.objects.bulk_create(
+            [ozet for (tarih, _), ozet in satirlar.items() if aralikta(tarih)],
+            batch_size=1000
+        )
+    dashboard_onbellegini_temizle('satis_ozeti')
+
+    return sum(1 for tarih, _ in satirlar if aralikta(tarih))
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Func, Max, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import KasaHareketi, KasaOzeti
+
+
+def _ozetsiz_hareketler_toplami():
+    """Henüz hiçbir özete girmemiş hareketlerin toplamı (GROUP BY'sız SUM alt sorgusu)"""
+    return Subquery(
+        KasaHareketi.objects.filter(ozet__isnull=True)
+        .order_by()
+        .annotate(toplam=Func(F('tutar'), function='SUM'))
+        .values('toplam')[:1],
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def kasa_bakiyesi():
+    """
+    Güncel kasa bakiyesi: son özet + özete girmemiş hareketler.
+    Özetsiz hareketler ozet indeksinden okunur; tek sorgu.
+    """
+    ozet = KasaOzeti.objects.order_by('-pk').annotate(
+        sonraki=Coalesce(_ozetsiz_hareketler_toplami(), Value(Decimal('0.00')))
+    ).values('bakiye', 'sonraki').first()
+
+    if ozet is None:
+        toplam = KasaHareketi.objects.aggregate(toplam=Sum('tutar'))['toplam']
+        return toplam or Decimal('0.00')
+    return ozet['bakiye'] + ozet['sonraki']
+
+
+def kasa_ozeti_al():
+    """
+    Özete girmemiş hareketleri yeni bir özete toplar.
+
+    Hareketler id aralığıyla değil, özete bağlanarak işaretlenir: özet
+    alınırken henüz commit edilmemiş bir hareket (id'si küçük olsa bile)
+    işaretsiz kalır, bakiyeye özetsiz hareket olarak katılır ve bir sonraki
+    özete girer. Özetin bakiyesi yalnızca kendi işaretlediği satırlardan
+    hesaplanır. Dönüş: yeni özet, eklenecek hareket yoksa None.
+    """
+    with transaction.atomic():
+        son_ozet = KasaOzeti.objects.select_for_update().order_by('-pk').first()
+        onceki_bakiye = son_ozet.bakiye if son_ozet else Decimal('0.00')
+
+        hareketler = KasaHareketi.objects.filter(ozet__isnull=True)
+        son = hareketler.aggregate(son=Max('pk'))['son']
+        if son is None:
+            return None
+
+        ozet = KasaOzeti.objects.create(bakiye=onceki_bakiye, son_hareket_id=son)
+        hareketler.filter(pk__lte=son).update(ozet=ozet)
+        ozet.bakiye += ozet.hareketler.aggregate(toplam=Sum('tutar'))['toplam']
+        ozet.save(update_fields=['bakiye'])
+
+    return ozet
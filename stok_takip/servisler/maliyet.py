@@ -0,0 +1,123 @@
+import heapq
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from ..models import Urun, SatisFiyati, AlisDetay, Satis, MusteriIade, TedarikciIade
+
+
+KURUS = Decimal('0.01')
+MALIYET_HASSASIYETI = Decimal('0.0001')
+
+
+def yeni_ortalama(ortalama, stok, miktar, tutar):
+    """
+    Mal kabulünden sonraki hareketli ortalama maliyet. Artımlı güncelleme ve
+    geçmişin yeniden oynatılması aynı adımı kullanır; her alışta aynı
+    hassasiyete yuvarlandığı için ikisi kuruşu kuruşuna aynı sonucu verir.
+    """
+    onceki = max(stok, 0)
+    return ((ortalama * onceki + tutar) / (onceki + miktar)).quantize(MALIYET_HASSASIYETI)
+
+
+def satis_fiyatina_aktar(urun_idleri):
+    """
+    Ürünlerin ortalama maliyetini SatisFiyati.alim_fiyati'na yazar ve satış
+    fiyatını yeniden hesaplatır (her ürün için bir kez). Hiç alışı olmayan
+    ürünler atlanır; sıfır maliyetli alışlar ise sıfır alım fiyatı olarak yazılır.
+    """
+    maliyetler = dict(
+        Urun.objects.filter(pk__in=urun_idleri)
+        .filter(Exists(AlisDetay.objects.filter(urun=OuterRef('pk'))))
+        .values_list('pk', 'ortalama_maliyet')
+    )
+    if not maliyetler:
+        return
+
+    fiyatlar = {fiyat.urun_id: fiyat for fiyat in SatisFiyati.objects.filter(urun_id__in=maliyetler)}
+    for urun_id, ortalama_maliyet in maliyetler.items():
+        fiyat = fiyatlar.get(urun_id)
+        if fiyat is None:
+            fiyat = SatisFiyati(
+                urun_id=urun_id,
+                kar_orani=Decimal('25.00'),
+                kdv=20,
+                iskonto_orani=Decimal('0.00'),
+            )
+        fiyat.alim_fiyati = ortalama_maliyet.quantize(KURUS)
+        # Satış fiyatını yeniden hesapla (SatisFiyati modelinin save metodu otomatik hesaplar)
+        fiyat.save()
+
+
+def maliyet_olaylari():
+    """
+    Tüm stok hareketlerini (urun_id, tarih, miktar, birim_fiyat, kaynak) olarak
+    zaman sırasıyla akıtır. birim_fiyat sadece alışlarda doludur; diğer
+    hareketler stoğu ortalama maliyetten taşır. Aynı andaki hareketlerde alış
+    önce gelir. kaynak: 'alis', 'satis', 'musteri_iade' veya 'tedarikci_iade'.
+    """
+    alislar = AlisDetay.objects.order_by('fis__kayit_tarihi', 'pk').values_list(
+        'urun_id', 'fis__kayit_tarihi', 'miktar', 'birim_fiyat'
+    )
+    satislar = Satis.objects.order_by('fis__olusturma_tarihi', 'pk').values_list(
+        'urun_id', 'fis__olusturma_tarihi', 'miktar'
+    )
+    musteri_iadeleri = MusteriIade.objects.filter(durum='onaylandi').order_by(
+        'iade_tarihi', 'pk'
+    ).values_list('urun_id', 'iade_tarihi', 'miktar')
+    tedarikci_iadeleri = TedarikciIade.objects.order_by('iade_tarihi', 'pk').values_list(
+        'urun_id', 'iade_tarihi', 'miktar'
+    )
+
+    return heapq.merge(
+        ((u, t, int(m), f, 'alis') for u, t, m, f in alislar.iterator(chunk_size=2000)),
+        ((u, t, -int(m), None, 'satis') for u, t, m in satislar.iterator(chunk_size=2000)),
+        ((u, t, int(m), None, 'musteri_iade') for u, t, m in musteri_iadeleri.iterator(chunk_size=2000)),
+        ((u, t, -int(m), None, 'tedarikci_iade') for u, t, m in tedarikci_iadeleri.iterator(chunk_size=2000)),
+        key=lambda olay: olay[1],
+    )
+
+
+def maliyetleri_yeniden_hesapla(duzelt=False, fiyatlari_guncelle=True):
+    """
+    Hareketli ortalama maliyeti tüm alış, satış ve iade geçmişini baştan
+    oynatarak yeniden hesaplar; duzelt=False ise sadece raporlanır.
+
+    Oynatma stok girişi olarak yalnızca alış fişlerini görür. Elle, admin ya
+    da API ile açılan veya miktarı değiştirilen lotların stoğu artımlı
+    ortalamaya ağırlık olarak girer ama geçmişte izi yoktur; böyle ürünlerde
+    yeniden hesaplanan ortalama yanlış olur. Oynatılan stoğu stok sayacıyla
+    tutmayan ürünler bu yüzden hesaplanmaz, ayrıca raporlanır.
+
+    Dönüş: (sapmalar, atlananlar) - sapmalar ortalaması farklı çıkan ürünlerin
+    (stok_no, kayitli, hesaplanan), atlananlar oynatılan stoğu sayaçtan farklı
+    ürünlerin (stok_no, sayac, oynatilan) listesi.
+    """
+    durumlar = {}  # urun_id: (miktar, ortalama)
+
+    for urun_id, _, fark, birim_fiyat, _ in maliyet_olaylari():
+        miktar, ortalama = durumlar.get(urun_id, (0, Decimal('0')))
+        if birim_fiyat is not None and fark > 0:
+            ortalama = yeni_ortalama(ortalama, miktar, fark, birim_fiyat * fark)
+        durumlar[urun_id] = (miktar + fark, ortalama)
+
+    sapmalar = []
+    atlananlar = []
+    degisenler = []
+    for urun in Urun.objects.only('pk', 'toplam_stok', 'ortalama_maliyet').order_by('pk').iterator(chunk_size=2000):
+        miktar, ortalama = durumlar.get(urun.pk, (0, Decimal('0')))
+        if miktar != urun.toplam_stok:
+            atlananlar.append((urun.pk, urun.toplam_stok, miktar))
+        elif urun.ortalama_maliyet != ortalama:
+            sapmalar.append((urun.pk, urun.ortalama_maliyet, ortalama))
+            urun.ortalama_maliyet = ortalama
+            degisenler.append(urun)
+
+    if duzelt and degisenler:
+        with transaction.atomic():
+            Urun.objects.bulk_update(degisenler, ['ortalama_maliyet'], batch_size=1000)
+            if fiyatlari_guncelle:
+                satis_fiyatina_aktar([urun.pk for urun in degisenler])
+
+    return sapmalar, atlananlar
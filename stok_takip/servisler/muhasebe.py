@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Sum, Value
+from django.db.models.functions import TruncMonth
+
+from ..models import GunlukSatisOzet, AlisFisi, OdemeKasa
+
+
+@dataclass
+class DonemRaporu:
+    """Bir dönemin gelir/gider özeti; bitis hariçtir"""
+    baslangic: date
+    bitis: date
+    satis_toplam: Decimal = Decimal('0.00')  # Brüt satış tutarı (müşteri iadeleri düşülmeden)
+    satis_adet: int = 0  # Satış satırı sayısı
+    alis_toplam: Decimal = Decimal('0.00')
+    alis_adet: int = 0
+    odemeler: dict = field(default_factory=dict)  # odeme_tipi: tutar
+
+    @property
+    def odeme_toplam(self):
+        return sum(self.odemeler.values(), Decimal('0.00'))
+
+    @property
+    def odeme_detay(self):
+        """Tutarı olan ödeme tipleri, ODEME_TIP sırasıyla"""
+        return [
+            {'tip': tip_adi, 'tutar': self.odemeler[tip_kod]}
+            for tip_kod, tip_adi in OdemeKasa.ODEME_TIP
+            if self.odemeler.get(tip_kod, 0) > 0
+        ]
+
+    @property
+    def toplam_gider(self):
+        return self.alis_toplam + self.odeme_toplam
+
+    @property
+    def net_kar(self):
+        return self.satis_toplam - self.toplam_gider
+
+
+def _sonraki_ay(gun):
+    return date(gun.year + gun.month // 12, gun.month % 12 + 1, 1)
+
+
+def _raporla(baslangic, bitis, raporlar, donem):
+    """
+    Raporları üç gruplu sorguyla doldurur (satış özeti, alış fişleri, ödeme
+    tipleri). donem(alan) her satırın ait olduğu dönemin başlangıcını veren
+    ifadedir; tek dönemde sabit, aylık raporda TruncMonth.
+    """
+    satislar = (
+        GunlukSatisOzet.objects.filter(tarih__gte=baslangic, tarih__lt=bitis)
+        .annotate(donem=donem('tarih')).values('donem')
+        .annotate(toplam=Sum('brut_ciro'), adet=Sum('satir_sayisi')).order_by()
+    )
+    for satir in satislar:
+        rapor = raporlar[satir['donem']]
+        rapor.satis_toplam = satir['toplam'] or Decimal('0.00')
+        rapor.satis_adet = satir['adet'] or 0
+
+    alislar = (
+        AlisFisi.objects.filter(fis_tarihi__gte=baslangic, fis_tarihi__lt=bitis)
+        .annotate(donem=donem('fis_tarihi')).values('donem')
+        .annotate(toplam=Sum('toplam_tutar'), adet=Count('pk')).order_by()
+    )
+    for satir in alislar:
+        rapor = raporlar[satir['donem']]
+        rapor.alis_toplam = satir['toplam'] or Decimal('0.00')
+        rapor.alis_adet = satir['adet']
+
+    odemeler = (
+        OdemeKasa.objects.filter(odeme_tarihi__gte=baslangic, odeme_tarihi__lt=bitis)
+        .annotate(donem=donem('odeme_tarihi')).values('donem', 'odeme_tipi')
+        .annotate(toplam=Sum('tutar')).order_by()
+    )
+    for satir in odemeler:
+        if satir['toplam'] is not None:
+            raporlar[satir['donem']].odemeler[satir['odeme_tipi']] = satir['toplam']
+
+    return list(raporlar.values())
+
+
+def donem_raporu(baslangic, bitis):
+    """[baslangic, bitis) aralığının raporu (herhangi bir tarih aralığı)"""
+    rapor = DonemRaporu(baslangic, bitis)
+    _raporla(baslangic, bitis, {baslangic: rapor}, lambda alan: Value(baslangic, output_field=DateField()))
+    return rapor
+
+
+def aylik_raporlar(ilk_ay, ay_sayisi=1):
+    """ilk_ay'dan başlayarak ay_sayisi ayın yan yana raporları (ay sayısından bağımsız üç sorgu)"""
+    raporlar = {}
+    ay_basi = ilk_ay.replace(day=1)
+    for _ in range(ay_sayisi):
+        sonraki = _sonraki_ay(ay_basi)
+        raporlar[ay_basi] = DonemRaporu(ay_basi, sonraki)
+        ay_basi = sonraki
+
+    return _raporla(ilk_ay.replace(day=1), ay_basi, raporlar, TruncMonth)
@@ -0,0 +1,86 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+
+from ..models import Sayac, SatisFisi, UrunYerlesimYeri, AlisFisi
+
+
+SATIS_FISI_SAYACI = 'satis_fisi'
+
+# Lot no sıra kısmının hane sayısı (L20251002-001); aşılırsa numara uzar, bozulmaz
+LOT_NO_HANE = getattr(settings, 'LOT_NO_HANE', 3)
+
+
+def numara_ayir(anahtar, adet=1, baslangic=None):
+    """
+    Anahtarın sayacından art arda `adet` numara ayırır ve ilkini döner.
+
+    Sayaç satırı select_for_update ile kilitlenip F() ile artırılır; eşzamanlı
+    kasalar sırayla numara alır, aynı numara iki kez verilmez. Çağıran
+    transaction geri alınırsa artış da geri alınır, böylece numaralarda boşluk
+    oluşmaz. Sayaç ilk kez oluşturulurken başlangıç değeri baslangic()
+    çağrısından alınır (mevcut kayıtların en büyük numarası gibi).
+    """
+    if adet < 1:
+        raise ValueError('adet en az 1 olmalı')
+
+    with transaction.atomic():
+        sayac = Sayac.objects.select_for_update().filter(anahtar=anahtar).first()
+
+        if sayac is None:
+            try:
+                with transaction.atomic():
+                    Sayac.objects.create(
+                        anahtar=anahtar,
+                        deger=baslangic() if baslangic else 0
+                    )
+            except IntegrityError:
+                pass  # Başka bir işlem aynı anda oluşturdu
+            sayac = Sayac.objects.select_for_update().get(anahtar=anahtar)
+
+        Sayac.objects.filter(pk=sayac.pk).update(deger=F('deger') + adet)
+
+    return sayac.deger + 1
+
+
+def satis_fisi_no_ayir():
+    """Bir sonraki satış fişi numarası"""
+    return numara_ayir(
+        SATIS_FISI_SAYACI,
+        baslangic=lambda: SatisFisi.objects.aggregate(son=Max('fis_no'))['son'] or 0
+    )
+
+
+def _gunun_son_lot_sirasi(on_ek):
+    """Sayaç yokken o gün verilmiş en büyük lot sırası (sadece günün ilk ayırmasında)"""
+    son_sira = 0
+    for model in (UrunYerlesimYeri, AlisFisi):
+        for lot_no in model.objects.filter(lot_no__startswith=f'{on_ek}-').values_list('lot_no', flat=True):
+            sira = lot_no.rsplit('-', 1)[-1]
+            if sira.isdigit():
+                son_sira = max(son_sira, int(sira))
+    return son_sira
+
+
+def lot_numaralari_ayir(adet, tarih=None, hane=None):
+    """
+    Günün lot sayacından `adet` lot numarası ayırır (toplu mal kabul için).
+    Format: L{YYYYMMDD}-{sıra}; UrunYerlesimYeri ve AlisFisi aynı sırayı kullanır.
+    """
+    tarih = tarih or date.today()
+    hane = hane or LOT_NO_HANE
+    on_ek = f'L{tarih.strftime("%Y%m%d")}'
+
+    ilk = numara_ayir(
+        f'lot_{tarih.strftime("%Y%m%d")}',
+        adet=adet,
+        baslangic=lambda: _gunun_son_lot_sirasi(on_ek)
+    )
+    return [f'{on_ek}-{sira:0{hane}d}' for sira in range(ilk, ilk + adet)]
+
+
+def lot_no_ayir(tarih=None):
+    """Bugünün bir sonraki lot numarası"""
+    return lot_numaralari_ayir(1, tarih=tarih)[0]
@@ -0,0 +1,12 @@
+from django.db import transaction
+
+
+def simdi_ve_commit_sonrasi(islem):
+    """
+    Önbellek temizliği gibi bir işlemi hemen çalıştırır; transaction içindeyse
+    commit sonrasında bir kez daha çalıştırır. Böylece commit'ten önce başka
+    bir istekçe okunup önbelleğe yazılan eski veri de silinmiş olur.
+    """
+    islem()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(islem)
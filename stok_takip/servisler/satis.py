@@ -0,0 +1,151 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from ..models import (
+    Urun, UrunYerlesimYeri, SatisFiyati, SatisFisi, Satis, SatisLotHareketi,
+    SatisKasa, KasaHareketi
+)
+from .dashboard import dashboard_onbellegini_temizle
+from .fiyat_listesi import aktif_liste_fiyatlari
+from .gunluk_ozet import OzetFarki, gunluk_ozete_yaz, islem_gunu
+from .stok import FIFO_SIRASI, stok_sayaclarini_guncelle
+
+
+def _urun_bilgileri(urun_idleri, musteri_grubu_id=None):
+    """
+    {urun_id: (urun_adi, satis_fiyati, ortalama_maliyet)} - fiyatlar tek sorguda;
+    geçerli dönemsel fiyatı olan ürünlerde süreç içi fiyat tablosundaki fiyat geçer
+    """
+    fiyat = SatisFiyati.objects.filter(urun=OuterRef('pk')).values('satis_fiyati')[:1]
+    liste = aktif_liste_fiyatlari(urun_idleri, musteri_grubu_id)
+    return {
+        pk: (urun_adi, liste.get(pk, satis_fiyati), ortalama_maliyet)
+        for pk, urun_adi, satis_fiyati, ortalama_maliyet in Urun.objects.filter(pk__in=urun_idleri)
+        .annotate(satis_fiyati=Subquery(fiyat))
+        .values_list('pk', 'urun_adi', 'satis_fiyati', 'ortalama_maliyet')
+    }
+
+
+def _stoklu_lotlar(urun_idleri):
+    """{urun_id: [lot, ...]} - tüm ürünlerin stoklu lotları tek sorguda, FIFO sırasıyla kilitli"""
+    lotlar = {}
+    for lot in (
+        UrunYerlesimYeri.objects.select_for_update()
+        .filter(urun_id__in=urun_idleri, miktar__gt=0)
+        .order_by(*FIFO_SIRASI)
+    ):
+        lotlar.setdefault(lot.urun_id, []).append(lot)
+    return lotlar
+
+
+def sepeti_sat(kullanici, kalemler, musteri_grubu=None):
+    """
+    Sepetin tamamını tek transaction'da satar (POS ödeme adımı).
+
+    kalemler: [(urun_id, miktar), ...]
+    musteri_grubu: verilirse gruba özel dönemsel fiyatlar önce uygulanır
+
+    Fiyatlar ve stoklu lotlar tüm ürünler için iki sorguda okunur, FIFO
+    tahsisi bellekte yapılır; satırlar, lot defteri, kasa kayıtları ve lot
+    değişiklikleri toplu yazılır. Satır başına Satis.save çağrısındaki fiş
+    toplamı ve kasa güncellemesi tekrarlanmadığından sorgu sayısı satır
+    sayısından bağımsızdır.
+
+    Bir satırda ürün/fiyat/stok hatası varsa hiçbir şey yazılmaz; hata
+    {satır_sırası: [mesaj]} sözlüğüyle ValidationError olarak döner.
+    """
+    urun_idleri = {urun_id for urun_id, _ in kalemler}
+
+    with transaction.atomic():
+        urunler = _urun_bilgileri(urun_idleri, getattr(musteri_grubu, 'pk', musteri_grubu))
+        lotlar = _stoklu_lotlar(urun_idleri)
+
+        hatalar = {}
+        satislar = []
+        tahsisler = []  # (satış sırası, lot, miktar)
+        degisen_lotlar = {}
+        for sira, (urun_id, miktar) in enumerate(kalemler):
+            if urun_id not in urunler:
+                hatalar[str(sira)] = [f'Geçersiz ürün: {urun_id}']
+                continue
+            urun_adi, birim_fiyat, ortalama_maliyet = urunler[urun_id]
+            if birim_fiyat is None:
+                hatalar[str(sira)] = [f'{urun_adi} için satış fiyatı tanımlanmamış!']
+                continue
+
+            kalan_miktar = int(miktar)
+            urun_lotlari = lotlar.get(urun_id, [])
+            stokta = sum(lot.miktar for lot in urun_lotlari)
+            if stokta < kalan_miktar:
+                hatalar[str(sira)] = [
+                    f'{urun_adi} için yeterli stok yok! Stokta {stokta} adet var, {kalan_miktar} adet istendi.'
+                ]
+                continue
+
+            # Aynı ürünün sonraki satırları kalan lotlardan devam eder
+            for lot in urun_lotlari:
+                if kalan_miktar == 0:
+                    break
+                dusulen = min(lot.miktar, kalan_miktar)
+                if dusulen == 0:
+                    continue
+                lot.miktar -= dusulen
+                kalan_miktar -= dusulen
+                degisen_lotlar[lot.pk] = lot
+                tahsisler.append((len(satislar), lot, dusulen))
+
+            satislar.append(Satis(
+                urun_id=urun_id,
+                miktar=Decimal(miktar),
+                birim_fiyat=birim_fiyat,
+                toplam_fiyat=(birim_fiyat * miktar).quantize(Decimal('0.01')),
+                maliyet=(ortalama_maliyet * miktar).quantize(Decimal('0.01')),
+            ))
+
+        if hatalar:
+            raise ValidationError(hatalar)
+
+        fis = SatisFisi(kullanici=kullanici, musteri_grubu_id=getattr(musteri_grubu, 'pk', musteri_grubu), toplam_tutar=sum(satis.toplam_fiyat for satis in satislar))
+        fis.save()
+        for satis in satislar:
+            satis.fis = fis
+        Satis.objects.bulk_create(satislar)
+        if satislar and satislar[0].pk is None:
+            # Eklenen kimlikleri döndürmeyen veritabanları (MySQL): ekleme sırasıyla eşle
+            idler = Satis.objects.filter(fis=fis).order_by('pk').values_list('pk', flat=True)
+            for satis, pk in zip(satislar, idler):
+                satis.pk = pk
+
+        UrunYerlesimYeri.objects.bulk_update(degisen_lotlar.values(), ['miktar'])
+        for lot in degisen_lotlar.values():
+            lot.kayitli_stogu_isaretle()
+        SatisLotHareketi.objects.bulk_create([
+            SatisLotHareketi(satis=satislar[satis_sirasi], yerlesim=lot, miktar=miktar)
+            for satis_sirasi, lot, miktar in tahsisler
+        ])
+
+        farklar = {}
+        for satis in satislar:
+            farklar[satis.urun_id] = farklar.get(satis.urun_id, 0) - int(satis.miktar)
+        stok_sayaclarini_guncelle(farklar)
+
+        SatisKasa.objects.bulk_create([
+            SatisKasa(satis=satis, tutar=satis.toplam_fiyat) for satis in satislar
+        ])
+        KasaHareketi.objects.bulk_create([
+            KasaHareketi(tutar=satis.toplam_fiyat, tip='satis', aciklama=f'Satış #{satis.pk}')
+            for satis in satislar if satis.toplam_fiyat
+        ])
+        dashboard_onbellegini_temizle('kasa_bakiyesi')
+
+        ozet_farklari = {}
+        for satis in satislar:
+            ozet_farklari[satis.urun_id] = ozet_farklari.get(
+                satis.urun_id, OzetFarki(maliyet=Decimal('0'), fis_sayisi=1)
+            ) + OzetFarki.satis(satis, satir_sayisi=1)
+        gunluk_ozete_yaz(islem_gunu(fis.olusturma_tarihi), ozet_farklari)
+
+    return fis
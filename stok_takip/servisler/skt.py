@@ -0,0 +1,134 @@
+import json
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import SktUyarisi, UrunYerlesimYeri
+
+
+GECMIS = SktUyarisi.GECMIS
+VARSAYILAN_UFUKLAR = (7, 30, 90)
+
+
+def skt_ufuklari():
+    """Uyarı kademeleri (gün), küçükten büyüğe; settings.SKT_UFUKLARI ile değiştirilebilir"""
+    return sorted(getattr(settings, 'SKT_UFUKLARI', VARSAYILAN_UFUKLAR))
+
+
+def kademe_adi(kademe):
+    return 'Süresi geçmiş' if kademe == GECMIS else f'{kademe} gün içinde'
+
+
+def skt_taramasi(bugun=None, ufuklar=None):
+    """
+    Süresi geçmiş ve en büyük ufuk içinde dolacak stoktaki lotlar; her satır
+    en yakın kademesiyle (GECMIS veya ufuk günü) işaretlenir. Kademe Case/When
+    ile veritabanında hesaplanır; (son_kullanma_tarihi, miktar) indeksi
+    üzerinde ürün bilgisiyle birlikte tek sorgu.
+    """
+    bugun = bugun or timezone.localdate()
+    ufuklar = sorted(ufuklar or skt_ufuklari())
+
+    kademe = Case(
+        When(son_kullanma_tarihi__lt=bugun, then=Value(GECMIS)),
+        *[When(son_kullanma_tarihi__lte=bugun + timedelta(days=ufuk), then=Value(ufuk)) for ufuk in ufuklar],
+        output_field=IntegerField(),
+    )
+    return list(
+        UrunYerlesimYeri.objects.filter(
+            son_kullanma_tarihi__lte=bugun + timedelta(days=ufuklar[-1]),
+            miktar__gt=0,
+        )
+        .annotate(kademe=kademe, stok_no=F('urun_id'), urun_adi=F('urun__urun_adi'))
+        .values('pk', 'stok_no', 'urun_adi', 'lot_no', 'konum', 'miktar', 'son_kullanma_tarihi', 'kademe')
+        .order_by('son_kullanma_tarihi', 'pk')
+    )
+
+
+def bildirilmemis_uyarilar(satirlar):
+    """Taramadaki satırlardan bu kademe ve SKT için daha önce bildirilmemiş olanlar (tek sorgu)"""
+    if not satirlar:
+        return []
+    bildirilenler = set(
+        SktUyarisi.objects.filter(
+            son_kullanma_tarihi__lte=max(satir['son_kullanma_tarihi'] for satir in satirlar),
+            lot__miktar__gt=0,
+        ).values_list('lot_id', 'kademe', 'son_kullanma_tarihi')
+    )
+    return [
+        satir for satir in satirlar
+        if (satir['pk'], satir['kademe'], satir['son_kullanma_tarihi']) not in bildirilenler
+    ]
+
+
+class EpostaKanali:
+    """Uyarıları settings.SKT_UYARI_ALICILARI adreslerine tek e-postayla gönderir (EMAIL_BACKEND)"""
+
+    def gonder(self, uyarilar, bugun):
+        alicilar = getattr(settings, 'SKT_UYARI_ALICILARI', [])
+        if not alicilar:
+            return
+        satirlar = [
+            f"{kademe_adi(uyari['kademe'])}: {uyari['stok_no']} - {uyari['urun_adi']} "
+            f"(Lot: {uyari['lot_no']}) - {uyari['konum']} - SKT {uyari['son_kullanma_tarihi']:%d.%m.%Y} - "
+            f"{uyari['miktar']} adet"
+            for uyari in uyarilar
+        ]
+        send_mail(
+            f'SKT uyarısı: {len(uyarilar)} lot ({bugun:%d.%m.%Y})',
+            '\n'.join(satirlar),
+            None,
+            alicilar,
+        )
+
+
+class WebhookKanali:
+    """Uyarıları settings.SKT_WEBHOOK_URL adresine JSON olarak POST eder"""
+
+    ZAMAN_ASIMI = 10
+
+    def gonder(self, uyarilar, bugun):
+        url = getattr(settings, 'SKT_WEBHOOK_URL', '')
+        if not url:
+            return
+        govde = json.dumps(
+            {'tarih': bugun, 'uyarilar': uyarilar}, cls=DjangoJSONEncoder, ensure_ascii=False
+        ).encode('utf-8')
+        istek = urllib.request.Request(
+            url, data=govde, headers={'Content-Type': 'application/json; charset=utf-8'}, method='POST'
+        )
+        with urllib.request.urlopen(istek, timeout=self.ZAMAN_ASIMI):
+            pass
+
+
+def bildirim_kanallari():
+    """settings.SKT_BILDIRIM_KANALLARI içindeki sınıf yollarından kanal nesneleri"""
+    yollar = getattr(settings, 'SKT_BILDIRIM_KANALLARI', ['stok_takip.servisler.skt.EpostaKanali'])
+    return [import_string(yol)() for yol in yollar]
+
+
+def skt_uyarilarini_gonder(satirlar, bugun=None, kanallar=None):
+    """
+    skt_taramasi() satırlarından yeni olanları tüm kanallara gönderir ve uyarı
+    durumuna kaydeder. Bir kanal hata verirse hiçbir uyarı kaydedilmez,
+    sonraki çalıştırmada yeniden denenir. Dönüş: gönderilen uyarılar.
+    """
+    bugun = bugun or timezone.localdate()
+    yeniler = bildirilmemis_uyarilar(satirlar)
+    if not yeniler:
+        return yeniler
+
+    for kanal in (bildirim_kanallari() if kanallar is None else kanallar):
+        kanal.gonder(yeniler, bugun)
+
+    SktUyarisi.objects.bulk_create([
+        SktUyarisi(lot_id=uyari['pk'], kademe=uyari['kademe'], son_kullanma_tarihi=uyari['son_kullanma_tarihi'])
+        for uyari in yeniler
+    ], ignore_conflicts=True, batch_size=1000)
+    return yeniler
@@ -0,0 +1,296 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import Kategori, Urun, UrunYerlesimYeri, SatisLotHareketi
+from .barkod import barkod_onbellegini_temizle
+from .dashboard import dashboard_onbellegini_temizle
+from .maliyet import yeni_ortalama
+
+
+# Satışta lotların tüketilme sırası: önce SKT'si en yakın, sonra en eski giriş
+FIFO_SIRASI = ('son_kullanma_tarihi', 'giris_tarihi', 'pk')
+
+# Ürün ve kategoride yeniden sipariş noktası yoksa kullanılan düşük stok eşiği
+DUSUK_STOK_LIMITI = 10
+
+
+def stok_degisti(urun_idleri):
+    """
+    Stok sayacı UPDATE'leri model sinyali üretmediği için stoğa bağlı
+    önbellekler (barkod yanıtı, dashboard düşük stok sayısı) burada temizlenir.
+    """
+    barkod_onbellegini_temizle(urun_idleri)
+    dashboard_onbellegini_temizle('dusuk_stok_sayisi')
+
+
+def stok_sayacini_guncelle(urun_id, fark, birim_maliyet=None):
+    """
+    Urun.toplam_stok sayacını yarış durumu olmadan (F ifadesiyle) fark kadar değiştirir.
+
+    birim_maliyet verilirse (mal kabul) ürün satırı kilitlenip hareketli
+    ortalama maliyet de aynı UPDATE içinde güncellenir. Satış ve iadeler stoğu ortalama maliyetten
+    taşıdığı için ortalamayı değiştirmez.
+    """
+    if not fark:
+        return
+
+    guncelleme = {'toplam_stok': F('toplam_stok') + fark}
+    if birim_maliyet is not None and fark > 0:
+        # Ortalama, kilitli satırın değerleriyle Decimal olarak hesaplanır
+        urun = Urun.objects.select_for_update().only('toplam_stok', 'ortalama_maliyet').get(pk=urun_id)
+        guncelleme['ortalama_maliyet'] = yeni_ortalama(
+            urun.ortalama_maliyet, urun.toplam_stok, fark, birim_maliyet * fark
+        )
+
+    Urun.objects.filter(pk=urun_id).update(**guncelleme)
+    stok_degisti([urun_id])
+
+
+def stok_sayaclarini_guncelle(farklar):
+    """{urun_id: fark} sözlüğündeki farkları stok sayaçlarına tek bir UPDATE ile uygular"""
+    farklar = {urun_id: fark for urun_id, fark in farklar.items() if fark}
+    if not farklar:
+        return
+
+    Urun.objects.filter(pk__in=farklar).update(
+        toplam_stok=F('toplam_stok') + Case(
+            *[When(pk=urun_id, then=Value(fark)) for urun_id, fark in farklar.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    stok_degisti(farklar)
+
+
+def mal_kabul_sayaclarini_guncelle(girisler):
+    """
+    Toplu mal kabulde {urun_id: (miktar, tutar)} girişlerini stok sayacına ve
+    hareketli ortalama maliyete uygular. Ürün satırları tek sorguda kilitlenir,
+    yeni değerler tek bir bulk_update ile yazılır.
+    """
+    if not girisler:
+        return
+
+    with transaction.atomic():
+        urunler = list(
+            Urun.objects.select_for_update()
+            .filter(pk__in=girisler)
+            .only('toplam_stok', 'ortalama_maliyet')
+        )
+        for urun in urunler:
+            miktar, tutar = girisler[urun.pk]
+            urun.ortalama_maliyet = yeni_ortalama(urun.ortalama_maliyet, urun.toplam_stok, miktar, tutar)
+            urun.toplam_stok += miktar
+
+        Urun.objects.bulk_update(urunler, ['toplam_stok', 'ortalama_maliyet'])
+    stok_degisti(girisler)
+
+
+def _en_yuksek_esik(limit):
+    """Limit ile ürün ve kategori yeniden sipariş noktalarının en büyüğü (alt sorgu)"""
+    def en_buyuk(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(yeniden_siparis_noktasi__isnull=False)
+                .order_by('-yeniden_siparis_noktasi')
+                .values('yeniden_siparis_noktasi')[:1]
+            ),
+            Value(limit),
+        )
+
+    return Greatest(Value(limit), en_buyuk(Urun), en_buyuk(Kategori))
+
+
+def dusuk_stoklu_urunler(urunler, limit=DUSUK_STOK_LIMITI):
+    """
+    Stoğu eşiğe inmiş ürünler. Eşik sırasıyla ürünün, kategorisinin yeniden
+    sipariş noktası ya da limit; toplam stok ürünün stok sayacından okunur.
+
+    Satır bazlı eşik karşılaştırmasından önce stok sayacı en yüksek eşikle
+    sınırlanır; böylece sorgu tüm kataloğu değil urun_toplam_stok_idx
+    aralığını tarar.
+    """
+    return urunler.filter(toplam_stok__lte=_en_yuksek_esik(limit)).annotate(
+        esik=Coalesce(
+            'yeniden_siparis_noktasi',
+            'kategori__yeniden_siparis_noktasi',
+            Value(limit),
+        )
+    ).filter(toplam_stok__lte=F('esik'))
+
+
+def lot_toplami_sorgusu():
+    """Her ürün için lot miktarları toplamını veren alt sorgu"""
+    return Subquery(
+        UrunYerlesimYeri.objects.filter(urun=OuterRef('pk'))
+        .order_by()
+        .values('urun')
+        .annotate(toplam=Sum('miktar'))
+        .values('toplam'),
+        output_field=IntegerField(),
+    )
+
+
+def stok_sayaclarini_yeniden_hesapla(duzelt=True):
+    """
+    Urun.toplam_stok sayaçlarını lotlardan yeniden hesaplar.
+
+    Dönüş: sayacı lot toplamından farklı olan ürünlerin
+    (stok_no, sayac, gercek) listesi. duzelt=False ise sadece raporlanır.
+    """
+    with transaction.atomic():
+        sapmalar = list(
+            Urun.objects.annotate(gercek=Coalesce(lot_toplami_sorgusu(), 0))
+            .filter(~Q(toplam_stok=F('gercek')))
+            .order_by('stok_no')
+            .values_list('stok_no', 'toplam_stok', 'gercek')
+        )
+
+        if duzelt and sapmalar:
+            Urun.objects.filter(
+                pk__in=[stok_no for stok_no, _, _ in sapmalar]
+            ).update(toplam_stok=Coalesce(lot_toplami_sorgusu(), 0))
+            stok_degisti([stok_no for stok_no, _, _ in sapmalar])
+
+    return sapmalar
+
+
+@dataclass(frozen=True)
+class LotTahsisi:
+    """Bir satış için tek bir lottan düşülen miktar"""
+    yerlesim: UrunYerlesimYeri
+    miktar: int
+
+
+def fifo_tahsis_et(urun, miktar):
+    """
+    Satılacak miktarı ürünün lotlarından FIFO sırasıyla düşer.
+
+    Stoklu lotlar tek sorguda kilitlenip (select_for_update) okunur, dağıtım
+    bellekte hesaplanır ve tüm lot değişiklikleri tek bir bulk_update ile
+    yazılır. Böylece satışın kaç lota yayıldığından bağımsız olarak sorgu
+    sayısı sabit kalır.
+
+    Dönüş: LotTahsisi listesi (hangi lottan ne kadar düşüldüğü)
+    """
+    kalan_miktar = int(miktar)
+    if kalan_miktar <= 0:
+        return []
+
+    with transaction.atomic():
+        lotlar = UrunYerlesimYeri.objects.select_for_update().filter(
+            urun=urun,
+            miktar__gt=0
+        ).order_by(*FIFO_SIRASI)
+
+        tahsisler = []
+        for lot in lotlar:
+            dusulen = min(lot.miktar, kalan_miktar)
+            lot.miktar -= dusulen
+            kalan_miktar -= dusulen
+            tahsisler.append(LotTahsisi(yerlesim=lot, miktar=dusulen))
+
+            if kalan_miktar == 0:
+                break
+
+        if kalan_miktar > 0:
+            raise ValidationError(f'{urun.urun_adi} için yeterli stok yok!')
+
+        UrunYerlesimYeri.objects.bulk_update(
+            [tahsis.yerlesim for tahsis in tahsisler],
+            ['miktar']
+        )
+        for tahsis in tahsisler:
+            tahsis.yerlesim.kayitli_stogu_isaretle()
+        stok_sayacini_guncelle(urun.pk, -int(miktar))
+
+    return tahsisler
+
+
+def tahsisleri_kaydet(satis, tahsisler):
+    """FIFO tahsisini satışın lot defterine tek sorguda yazar"""
+    SatisLotHareketi.objects.bulk_create([
+        SatisLotHareketi(satis=satis, yerlesim=tahsis.yerlesim, miktar=tahsis.miktar)
+        for tahsis in tahsisler
+    ])
+
+
+def lotlara_geri_ekle(miktarlar):
+    """
+    {yerlesim_id: miktar} sözlüğündeki miktarları ilgili lotlara
+    tek bir UPDATE ile geri ekler.
+    """
+    miktarlar = {pk: miktar for pk, miktar in miktarlar.items() if miktar}
+    if not miktarlar:
+        return
+
+    lotlar = UrunYerlesimYeri.objects.filter(pk__in=miktarlar)
+    urun_farklari = {}
+    for pk, urun_id in lotlar.values_list('pk', 'urun_id'):
+        urun_farklari[urun_id] = urun_farklari.get(urun_id, 0) + miktarlar[pk]
+
+    lotlar.update(
+        miktar=F('miktar') + Case(
+            *[When(pk=pk, then=Value(miktar)) for pk, miktar in miktarlar.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    stok_sayaclarini_guncelle(urun_farklari)
+
+
+def satis_tahsisini_geri_al(satis, miktar=None):
+    """
+    Satışın düştüğü stoğu lot defterine göre tam olarak aynı lotlara geri ekler.
+
+    miktar verilmezse (satış düzenleme) defterdeki tüm miktar geri eklenir ve
+    defter silinir. miktar verilirse (müşteri iadesi) en son tüketilen lottan
+    başlayarak o kadarı geri eklenir ve defter satırları azaltılır. Lotu
+    silinmiş defter satırlarının miktarı geri alınır ama hiçbir lota eklenmez.
+
+    Dönüş: geri eklenen miktar; satışın lot defteri hiç yoksa (eski kayıt) None
+    """
+    with transaction.atomic():
+        hareketler = list(
+            SatisLotHareketi.objects.select_for_update()
+            .filter(satis=satis)
+            .order_by('-pk')
+        )
+        if not hareketler:
+            return None
+
+        geri_eklenecek = {}
+        if miktar is None:
+            for hareket in hareketler:
+                if hareket.yerlesim_id is None:
+                    continue
+                geri_eklenecek[hareket.yerlesim_id] = (
+                    geri_eklenecek.get(hareket.yerlesim_id, 0) + hareket.miktar
+                )
+            SatisLotHareketi.objects.filter(satis=satis).delete()
+        else:
+            kalan_miktar = int(miktar)
+            degisenler = []
+            for hareket in hareketler:
+                if kalan_miktar == 0:
+                    break
+                alinan = min(hareket.miktar, kalan_miktar)
+                if alinan == 0:
+                    continue
+                hareket.miktar -= alinan
+                kalan_miktar -= alinan
+                degisenler.append(hareket)
+                if hareket.yerlesim_id is None:
+                    continue
+                geri_eklenecek[hareket.yerlesim_id] = (
+                    geri_eklenecek.get(hareket.yerlesim_id, 0) + alinan
+                )
+            SatisLotHareketi.objects.bulk_update(degisenler, ['miktar'])
+
+        lotlara_geri_ekle(geri_eklenecek)
+
+    return sum(geri_eklenecek.values())
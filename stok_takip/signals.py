@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Kategori, Urun, SatisFiyati, UrunYerlesimYeri, SatisFisi, Satis, Kasa, KasaHareketi, DonemselFiyat
+from .servisler.arama import arama_terimlerini_guncelle, kategori_terimlerini_guncelle
+from .servisler.barkod import barkod_onbellegini_temizle
+from .servisler.dashboard import dashboard_onbellegini_temizle
+from .servisler.fiyat_listesi import aktif_fiyat_tablosunu_yenile
+from .servisler.gunluk_ozet import silinen_satisi_ozetten_dus
+from .servisler.stok import satis_tahsisini_geri_al, stok_sayacini_guncelle
+
+
+# Barkod önbelleği: ürün, fiyat veya lot değişince ürünün kaydı silinir.
+# Sayaç UPDATE'leri (satış, mal kabul) sinyal üretmez; onlar stok servisinde temizlenir.
+
+@receiver([post_save, post_delete], sender=Urun)
+def urun_degisti(sender, instance, **kwargs):
+    barkod_onbellegini_temizle([instance.pk], [instance.barkod])
+    dashboard_onbellegini_temizle('urun_sayisi', 'dusuk_stok_sayisi')
+
+
+@receiver([post_save, post_delete], sender=SatisFiyati)
+@receiver([post_save, post_delete], sender=UrunYerlesimYeri)
+def urun_verisi_degisti(sender, instance, **kwargs):
+    barkod_onbellegini_temizle([instance.urun_id])
+
+
+# Lot silinince (tek kayıt, queryset, admin toplu silme ya da ürünle CASCADE) ürünün
+# stok sayacından veritabanındaki miktarı düşülür; kaydetme farkı modelin save'inde
+
+@receiver(post_delete, sender=UrunYerlesimYeri)
+def lot_silindi(sender, instance, **kwargs):
+    urun_id, miktar = getattr(instance, '_kayitli_stok', (instance.urun_id, instance.miktar))
+    stok_sayacini_guncelle(urun_id, -miktar)
+
+
+# Dönemsel fiyat değişince süreçlerdeki etkin fiyat tablosu da yeniden yüklenir
+@receiver([post_save, post_delete], sender=DonemselFiyat)
+def donemsel_fiyat_degisti(sender, instance, **kwargs):
+    aktif_fiyat_tablosunu_yenile()
+    barkod_onbellegini_temizle([instance.urun_id])
+
+
+# Dashboard önbelleği: satış ve kasa yazma yollarında ilgili rakam silinir.
+# Toplu eklenen kasa hareketleri (sepet satışı) servis içinde temizlenir.
+
+@receiver([post_save, post_delete], sender=SatisFisi)
+def satis_fisi_degisti(sender, instance, **kwargs):
+    dashboard_onbellegini_temizle('satis_ozeti')
+
+
+@receiver([post_save, post_delete], sender=KasaHareketi)
+@receiver(post_save, sender=Kasa)
+def kasa_degisti(sender, instance, **kwargs):
+    dashboard_onbellegini_temizle('kasa_bakiyesi')
+
+
+@receiver(post_save, sender=Kategori)
+def kategori_degisti(sender, instance, **kwargs):
+    dashboard_onbellegini_temizle('dusuk_stok_sayisi')
+
+
+# Arama dizini: ürün kaydedilince terimleri yeniden yazılır (silinince CASCADE ile gider);
+# kategori adı değişince kategorideki ürünlerin kategori terimleri yenilenir.
+
+@receiver(post_save, sender=Urun)
+def urun_arama_terimleri(sender, instance, **kwargs):
+    arama_terimlerini_guncelle([instance])
+
+
+@receiver(post_save, sender=Kategori)
+def kategori_arama_terimleri(sender, instance, created, **kwargs):
+    if not created:
+        kategori_terimlerini_guncelle(instance)
+
+
+# Satış satırı silinince (tek başına ya da fişiyle birlikte CASCADE): düşülen stok
+# lot defterine göre aynı lotlara geri eklenir, satır günlük özetten düşülür.
+# Özet silme sonrasında yazılır; fişte ürünün satırı kalıp kalmadığı o an bellidir.
+
+@receiver(pre_delete, sender=Satis)
+def satis_siliniyor(sender, instance, **kwargs):
+    satis_tahsisini_geri_al(instance)
+
+
+@receiver(post_delete, sender=Satis)
+def satis_silindi(sender, instance, origin, **kwargs):
+    # Aynı silme işlemindeki satırlar, fiş sayısını (fiş, ürün) başına bir kez düşürür
+    if not hasattr(origin, '_ozetten_dusulenler'):
+        origin._ozetten_dusulenler = set()
+    silinen_satisi_ozetten_dus(instance, origin._ozetten_dusulenler)
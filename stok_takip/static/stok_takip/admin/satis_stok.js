@@ -0,0 +1,25 @@
+'use strict';
+// Satış fişi formu: satırda ürün seçilince "Mevcut Stok" sütununu sayfayı
+// yenilemeden günceller (SatisFisiAdmin.stok_durumu JSON ucu).
+(function($) {
+    // Ürün seçicinin autocomplete adresi admin köküne göredir: /admin/autocomplete/
+    function stokAdresi(secici) {
+        return secici.data('ajax--url').replace(/autocomplete\/$/, 'stok_takip/satisfisi/stok/');
+    }
+
+    $(document).on('change', 'select[name^="satislar-"][name$="-urun"]', function() {
+        const secici = $(this);
+        const hucre = secici.closest('tr').find('td.field-get_mevcut_stok p');
+        const urun = secici.val();
+        if (!urun) {
+            hucre.text('-');
+            return;
+        }
+        $.getJSON(stokAdresi(secici), {urun: urun}, function(veri) {
+            // Yanıt gelene kadar seçim değiştiyse eski sonucu yazma
+            if (secici.val() === urun) {
+                hucre.text(veri[urun] ? veri[urun].metin : '-');
+            }
+        });
+    });
+})(django.jQuery);
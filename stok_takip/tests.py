@@ -1,3 +1,1588 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import (
+    Kategori, Urun, UrunYerlesimYeri, SatisFiyati, SatisFisi, Satis, Kasa,
+    SatisLotHareketi, MusteriIade, TedarikciIade, Tedarikci, AlisFisi, AlisDetay,
+    OdemeKasa, KasaHareketi, KasaOzeti, SatisKasa, GunlukSatisOzet, SktUyarisi,
+    MusteriGrubu, DonemselFiyat
+)
+from .servisler.arama import normallestir, urun_ara
+from .servisler.barkod import BARKOD_ONBELLEGI, SAYAC_ONBELLEGI
+from .servisler.dashboard import DASHBOARD_ONBELLEGI
+from .servisler.envanter import envanter_satirlari
+from .servisler.fiyat import fiyat_hedefi, toplu_fiyat_guncelle
+from .servisler.fiyat_listesi import aktif_fiyat_tablosu, aktif_liste_fiyatlari, zamandaki_liste_fiyatlari
+from .servisler.gunluk_ozet import gunluk_ozeti_yeniden_olustur
+from .servisler.kasa import kasa_bakiyesi, kasa_ozeti_al
+from .servisler.maliyet import maliyetleri_yeniden_hesapla
+from .servisler.muhasebe import aylik_raporlar, donem_raporu
+from .servisler.numara import lot_numaralari_ayir
+from .servisler.satis import sepeti_sat
+from .servisler.skt import GECMIS, WebhookKanali, skt_taramasi, skt_uyarilarini_gonder
+from .servisler.stok import dusuk_stoklu_urunler, fifo_tahsis_et, stok_sayaclarini_yeniden_hesapla
+
+
+class StokTestVerisi:
+    """Testlerde ortak kullanılan örnek kayıtlar"""
+
+    def setUp(self):
+        self.kullanici = User.objects.create_user('kasiyer', password='test')
+        self.kategori = Kategori.objects.create(kategori_adi='Hırdavat')
+        self.kasa = Kasa.objects.create(bakiye=Decimal('0.00'))
+        aktif_fiyat_tablosu()  # Süreç içi fiyat tablosu yüklemesi sorgu sayımlarına girmesin
+
+    def urun_olustur(self, no, lot_sayisi=1, lot_miktari=10, alim_fiyati=Decimal('10.00')):
+        urun = Urun.objects.create(
+            stok_no=f'2879{no:08d}',
+            barkod=f'8690{no:08d}',
+            urun_adi=f'Ürün {no}',
+            kategori=self.kategori,
+        )
+        bugun = date.today()
+        for i in range(lot_sayisi):
+            UrunYerlesimYeri.objects.create(
+                urun=urun,
+                miktar=lot_miktari,
+                konum=f'A-{i}',
+                son_kullanma_tarihi=bugun + timedelta(days=i + 1),
+            )
+        SatisFiyati.objects.create(
+            urun=urun, alim_fiyati=alim_fiyati, kar_orani=Decimal('25.00'), satis_fiyati=0
+        )
+        return urun
+
+    def fis_olustur(self):
+        return SatisFisi.objects.create(kullanici=self.kullanici)
+
+
+class FifoTahsisTest(StokTestVerisi, TestCase):
+
+    def test_en_yakin_skt_once_tuketilir(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+
+        tahsisler = fifo_tahsis_et(urun, 25)
+
+        self.assertEqual([t.miktar for t in tahsisler], [10, 10, 5])
+        miktarlar = list(
+            UrunYerlesimYeri.objects.filter(urun=urun)
+            .order_by('son_kullanma_tarihi')
+            .values_list('miktar', flat=True)
+        )
+        self.assertEqual(miktarlar, [0, 0, 5])
+
+    def test_yetersiz_stokta_hicbir_lot_degismez(self):
+        from django.core.exceptions import ValidationError
+
+        urun = self.urun_olustur(1, lot_sayisi=2, lot_miktari=10)
+
+        with self.assertRaises(ValidationError):
+            fifo_tahsis_et(urun, 21)
+
+        self.assertEqual(
+            sum(UrunYerlesimYeri.objects.filter(urun=urun).values_list('miktar', flat=True)),
+            20
+        )
+
+    def test_sorgu_sayisi_lot_sayisindan_bagimsiz(self):
+        tek_lot = self.urun_olustur(1, lot_sayisi=1, lot_miktari=500)
+        cok_lot = self.urun_olustur(2, lot_sayisi=50, lot_miktari=10)
+
+        sorgu_sayilari = []
+        for urun in (tek_lot, cok_lot):
+            fis = self.fis_olustur()
+            with CaptureQueriesContext(connection) as sorgular:
+                Satis.objects.create(fis=fis, urun=urun, miktar=Decimal('500'))
+            sorgu_sayilari.append(len(sorgular))
+
+        self.assertEqual(sorgu_sayilari[0], sorgu_sayilari[1])
+        self.assertFalse(
+            UrunYerlesimYeri.objects.filter(urun=cok_lot, miktar__gt=0).exists()
+        )
+
+
+class SatisLotDefteriTest(StokTestVerisi, TestCase):
+
+    def lot_miktarlari(self, urun):
+        return list(
+            UrunYerlesimYeri.objects.filter(urun=urun)
+            .order_by('son_kullanma_tarihi')
+            .values_list('miktar', flat=True)
+        )
+
+    def test_satis_defteri_dusulen_lotlari_kaydeder(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('15'))
+
+        self.assertEqual(
+            sorted(satis.lot_hareketleri.values_list('miktar', flat=True)),
+            [5, 10]
+        )
+
+    def test_duzenleme_ayni_lotlara_geri_ekler(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('15'))
+
+        # İlk lot boşaldı; eski davranış iadeyi ikinci lota yazıyordu
+        satis.miktar = Decimal('3')
+        satis.save()
+
+        self.assertEqual(self.lot_miktarlari(urun), [7, 10, 10])
+        self.assertEqual(
+            list(satis.lot_hareketleri.values_list('miktar', flat=True)),
+            [3]
+        )
+
+    def test_musteri_iadesi_ayni_lotlara_geri_ekler(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('15'))
+
+        MusteriIade.objects.create(
+            satis=satis, urun=urun, miktar=7, iade_nedeni='Kusurlu', durum='onaylandi'
+        )
+
+        self.assertEqual(self.lot_miktarlari(urun), [2, 10, 10])
+        self.assertEqual(
+            sum(SatisLotHareketi.objects.filter(satis=satis).values_list('miktar', flat=True)),
+            8
+        )
+
+    def test_satilan_lot_silinebilir_ve_iade_kalan_lotlara_yazilir(self):
+        urun = self.urun_olustur(1, lot_sayisi=2, lot_miktari=10)
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('15'))
+        ilk_lot, ikinci_lot = UrunYerlesimYeri.objects.filter(urun=urun).order_by('son_kullanma_tarihi')
+
+        client = APIClient()
+        client.force_authenticate(self.kullanici)
+        yanit = client.delete(f'/api/yerlesimler/{ilk_lot.pk}/')
+
+        self.assertEqual(yanit.status_code, 204)
+        self.assertEqual(
+            SatisLotHareketi.objects.filter(satis=satis, yerlesim__isnull=True).get().miktar, 10
+        )
+
+        # Silinmiş lotun payı hiçbir lota eklenmez, sayaç lot toplamıyla tutarlı kalır
+        satis.miktar = Decimal('1')
+        satis.save()
+
+        ikinci_lot.refresh_from_db()
+        urun.refresh_from_db()
+        self.assertEqual(ikinci_lot.miktar, 9)
+        self.assertEqual(urun.toplam_stok, 9)
+
+
+class StokSayaciTest(StokTestVerisi, TestCase):
+
+    def sayac(self, urun):
+        urun.refresh_from_db(fields=['toplam_stok'])
+        return urun.toplam_stok
+
+    def test_satis_duzenleme_ve_iade_sayaci_gunceller(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+        self.assertEqual(self.sayac(urun), 30)
+
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('15'))
+        self.assertEqual(self.sayac(urun), 15)
+
+        satis.miktar = Decimal('5')
+        satis.save()
+        self.assertEqual(self.sayac(urun), 25)
+
+        MusteriIade.objects.create(
+            satis=satis, urun=urun, miktar=2, iade_nedeni='Kusurlu', durum='onaylandi'
+        )
+        self.assertEqual(self.sayac(urun), 27)
+
+    def test_urun_kaydi_sayaci_ezmez_stok_no_degisikligi_yeni_satir_acar(self):
+        urun = self.urun_olustur(1, lot_sayisi=1, lot_miktari=10)
+        bayat = Urun.objects.get(pk=urun.pk)
+        Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('4'))
+
+        bayat.urun_adi = 'Yeni Ad'
+        bayat.save()
+        self.assertEqual(self.sayac(urun), 6)
+
+        bayat.stok_no = '287999999999'
+        bayat.barkod = '869099999999'
+        bayat.save()
+        self.assertTrue(Urun.objects.filter(pk='287999999999', urun_adi='Yeni Ad').exists())
+        self.assertTrue(Urun.objects.filter(pk=urun.pk).exists())
+
+    def test_queryset_ve_admin_toplu_silme_sayaci_gunceller(self):
+        urun = self.urun_olustur(1, lot_sayisi=3, lot_miktari=10)
+        UrunYerlesimYeri.objects.filter(urun=urun, pk=urun.yerlesimler.order_by('pk').first().pk).delete()
+        self.assertEqual(self.sayac(urun), 20)
+
+        User.objects.create_superuser('yonetici', password='test')
+        self.client.login(username='yonetici', password='test')
+        yanit = self.client.post(reverse('admin:stok_takip_urunyerlesimyeri_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': list(urun.yerlesimler.values_list('pk', flat=True)),
+        })
+        self.assertEqual(yanit.status_code, 302)
+        self.assertFalse(urun.yerlesimler.exists())
+        self.assertEqual(self.sayac(urun), 0)
+
+    def test_alis_ve_tedarikci_iadesi_sayaci_gunceller(self):
+        urun = self.urun_olustur(1, lot_sayisi=0)
+        tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        fis = AlisFisi.objects.create(
+            fis_no='F-1', tedarikci=tedarikci, fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        AlisDetay.objects.create(
+            fis=fis, urun=urun, miktar=40, birim_fiyat=Decimal('5.00'), konum='B-1'
+        )
+        self.assertEqual(self.sayac(urun), 40)
+
+        TedarikciIade.objects.create(
+            urun=urun, yerlesim=urun.yerlesimler.get(), tedarikci=tedarikci,
+            miktar=4, iade_nedeni='Hasarlı'
+        )
+        self.assertEqual(self.sayac(urun), 36)
+
+    def test_yeniden_hesaplama_sapmayi_bulur_ve_duzeltir(self):
+        urun = self.urun_olustur(1, lot_sayisi=2, lot_miktari=10)
+        Urun.objects.filter(pk=urun.pk).update(toplam_stok=3)
+
+        self.assertEqual(
+            stok_sayaclarini_yeniden_hesapla(duzelt=False),
+            [(urun.stok_no, 3, 20)]
+        )
+        self.assertEqual(self.sayac(urun), 3)
+
+        stok_sayaclarini_yeniden_hesapla()
+        self.assertEqual(self.sayac(urun), 20)
+        self.assertEqual(stok_sayaclarini_yeniden_hesapla(), [])
+
+
+class DusukStokTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+
+    def test_urun_ve_kategori_esigi_kullanilir(self):
+        varsayilan = self.urun_olustur(1, lot_miktari=8)   # limit=10 altında
+        self.urun_olustur(2, lot_miktari=15)                # limit=10 üstünde
+        urun_esikli = self.urun_olustur(3, lot_miktari=15)
+        urun_esikli.yeniden_siparis_noktasi = 20
+        urun_esikli.save()
+
+        diger_kategori = Kategori.objects.create(kategori_adi='Boya', yeniden_siparis_noktasi=50)
+        kategori_esikli = self.urun_olustur(4, lot_miktari=40)
+        kategori_esikli.kategori = diger_kategori
+        kategori_esikli.save()
+
+        yanit = self.client.get('/api/urunler/dusuk_stok/?limit=10')
+
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit.data['count'], 3)
+        self.assertEqual(
+            [u['stok_no'] for u in yanit.data['results']],
+            [varsayilan.stok_no, urun_esikli.stok_no, kategori_esikli.stok_no]
+        )
+        self.assertEqual(yanit.data['results'][0]['satis_fiyati'], 15.0)
+
+    def test_gecersiz_limit_400_doner(self):
+        for limit in ('abc', '-5'):
+            yanit = self.client.get(f'/api/urunler/dusuk_stok/?limit={limit}')
+            self.assertEqual(yanit.status_code, 400)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN çıktısı SQLite\'a özgü')
+    def test_sorgu_stok_sayaci_dizinini_kullanir(self):
+        plan = dusuk_stoklu_urunler(Urun.objects.all()).explain()
+        self.assertIn('USING INDEX urun_toplam_stok_idx', plan)
+
+    def test_sorgu_sayisi_katalog_boyutundan_bagimsiz(self):
+        self.urun_olustur(1, lot_miktari=1)
+        with CaptureQueriesContext(connection) as az_urun:
+            self.client.get('/api/urunler/dusuk_stok/')
+
+        for no in range(2, 15):
+            self.urun_olustur(no, lot_miktari=1)
+        with CaptureQueriesContext(connection) as cok_urun:
+            yanit = self.client.get('/api/urunler/dusuk_stok/')
+
+        self.assertEqual(yanit.data['count'], 14)
+        self.assertEqual(len(az_urun), len(cok_urun))
+
+
+class ListeSorguSayisiTest(StokTestVerisi, TestCase):
+    """Liste uçlarının sorgu sayısı kayıt sayısıyla artmamalı (N+1 kontrolü)"""
+
+    LISTE_URLLERI = [
+        '/api/kategoriler/',
+        '/api/tedarikciler/',
+        '/api/urunler/',
+        '/api/urunler/dusuk_stok/?limit=1000',
+        '/api/yerlesimler/',
+        '/api/yerlesimler/skt_yaklasiyor/',
+        '/api/satis-fiyatlari/',
+        '/api/satis-fisleri/',
+        '/api/satis-fisleri/?view=ozet',
+        '/api/satis-fisleri/bugun/',
+        '/api/satis-fisleri/bugun/?view=ozet',
+        '/api/satislar/',
+        '/api/tedarikci-iadeler/',
+        '/api/musteri-iadeler/',
+        '/api/kasa/',
+        '/api/alis-fisleri/',
+        '/api/alis-fisleri/?view=ozet',
+        '/api/alis-detaylar/',
+        '/api/odemeler/',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.kayit_sayisi = 0
+
+    def kayit_ekle(self):
+        """Her kaynaktan birer kayıt oluşturur"""
+        self.kayit_sayisi += 1
+        no = self.kayit_sayisi
+        Kategori.objects.create(kategori_adi=f'Kategori {no}')
+        tedarikci = Tedarikci.objects.create(firma_adi=f'Tedarikçi {no}')
+
+        urun = self.urun_olustur(no, lot_sayisi=2)
+        fis = self.fis_olustur()
+        satis = Satis.objects.create(fis=fis, urun=urun, miktar=Decimal('1'))
+        Satis.objects.create(fis=fis, urun=urun, miktar=Decimal('2'))
+        TedarikciIade.objects.create(
+            urun=urun, yerlesim=urun.yerlesimler.first(), tedarikci=tedarikci,
+            miktar=1, iade_nedeni='Hasarlı'
+        )
+        MusteriIade.objects.create(satis=satis, urun=urun, miktar=1, iade_nedeni='Vazgeçti')
+
+        alis_fisi = AlisFisi.objects.create(
+            fis_no=f'F-{no}', tedarikci=tedarikci, fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        AlisDetay.objects.create(
+            fis=alis_fisi, urun=urun, miktar=5, birim_fiyat=Decimal('8.00'), konum='B-1',
+            son_kullanma_tarihi=date.today() + timedelta(days=10)
+        )
+        OdemeKasa.objects.create(
+            odeme_tipi='kira', tutar=Decimal('100.00'), aciklama='Kira',
+            odeme_tarihi=date.today(), kullanici=self.kullanici
+        )
+
+    def sorgu_sayilari(self):
+        sayilar = {}
+        for url in self.LISTE_URLLERI:
+            with CaptureQueriesContext(connection) as sorgular:
+                yanit = self.client.get(url)
+            self.assertEqual(yanit.status_code, 200, url)
+            sayilar[url] = len(sorgular)
+        return sayilar
+
+    def test_liste_sorgu_sayisi_sabit(self):
+        self.kayit_ekle()
+        az_kayit = self.sorgu_sayilari()
+
+        for _ in range(4):
+            self.kayit_ekle()
+        cok_kayit = self.sorgu_sayilari()
+
+        for url in self.LISTE_URLLERI:
+            with self.subTest(url=url):
+                self.assertEqual(az_kayit[url], cok_kayit[url])
+
+    def test_ozet_gorunumu_satirlari_icermez(self):
+        self.kayit_ekle()
+
+        yanit = self.client.get('/api/satis-fisleri/?view=ozet')
+        self.assertNotIn('satislar', yanit.data['results'][0])
+        self.assertEqual(yanit.data['results'][0]['urun_sayisi'], 2)
+
+        yanit = self.client.get('/api/satis-fisleri/')
+        self.assertEqual(len(yanit.data['results'][0]['satislar']), 2)
+
+    def test_hareket_tablolari_imlecle_sayfalanir(self):
+        for _ in range(3):
+            self.kayit_ekle()
+
+        gorulen = []
+        url = '/api/satislar/?sayfa_boyutu=4'
+        while url:
+            yanit = self.client.get(url)
+            self.assertNotIn('count', yanit.data)
+            gorulen += [satis['id'] for satis in yanit.data['results']]
+            url = yanit.data['next']
+
+        self.assertEqual(gorulen, sorted(Satis.objects.values_list('id', flat=True), reverse=True))
+
+    def test_sayi_ucu(self):
+        for _ in range(3):
+            self.kayit_ekle()
+
+        yanit = self.client.get('/api/urunler/sayi/')
+        self.assertEqual(yanit.data, {'count': 3})
+
+        yanit = self.client.get('/api/urunler/?sayfa_boyutu=2')
+        self.assertEqual(yanit.data['count'], 3)
+        self.assertEqual(len(yanit.data['results']), 2)
+
+
+class AdminSorguSayisiTest(StokTestVerisi, TestCase):
+    """Admin liste ve ekleme sayfalarının sorgu sayısı kayıt sayısıyla artmamalı"""
+
+    # Ürün seçimi autocomplete olduğundan ekleme formları ürünleri listelemez
+    EKLEME_SAYFALARI = ['urunyerlesimyeri', 'satisfiyati', 'satis', 'tedarikciiade', 'musteriiade', 'alisdetay', 'donemselfiyat']
+
+    def setUp(self):
+        super().setUp()
+        self.kullanici.is_staff = self.kullanici.is_superuser = True
+        self.kullanici.save()
+        self.client.force_login(self.kullanici)
+        self.kayit_sayisi = 0
+        self.grup = MusteriGrubu.objects.create(ad='Bayi')
+
+    def kayit_ekle(self):
+        ListeSorguSayisiTest.kayit_ekle(self)
+        urun = Urun.objects.latest('olusturma_tarihi')
+        DonemselFiyat.objects.create(
+            urun=urun, musteri_grubu=self.grup, satis_fiyati=Decimal('9.00'), gecerlilik_baslangic=timezone.now()
+        )
+        SktUyarisi.objects.create(lot=urun.yerlesimler.first(), kademe=7, son_kullanma_tarihi=date.today())
+
+    def sayfalar(self):
+        sayfalar = [
+            reverse(f'admin:stok_takip_{model._meta.model_name}_changelist')
+            for model in admin.site._registry if model._meta.app_label == 'stok_takip'
+        ]
+        return sayfalar + [reverse(f'admin:stok_takip_{ad}_add') for ad in self.EKLEME_SAYFALARI]
+
+    def sorgu_sayilari(self):
+        sayilar = {}
+        for url in self.sayfalar():
+            with CaptureQueriesContext(connection) as sorgular:
+                yanit = self.client.get(url)
+            self.assertEqual(yanit.status_code, 200, url)
+            sayilar[url] = len(sorgular)
+        return sayilar
+
+    def test_admin_sorgu_sayisi_sabit(self):
+        self.kayit_ekle()
+        self.sorgu_sayilari()  # ContentType önbelleği dolsun
+        az_kayit = self.sorgu_sayilari()
+
+        for _ in range(4):
+            self.kayit_ekle()
+        cok_kayit = self.sorgu_sayilari()
+
+        for url in az_kayit:
+            with self.subTest(url=url):
+                self.assertEqual(az_kayit[url], cok_kayit[url])
+
+
+class SatisFisiAdminTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.kullanici.is_staff = self.kullanici.is_superuser = True
+        self.kullanici.save()
+        self.client.force_login(self.kullanici)
+
+    def test_fis_sayfasi_sorgu_sayisi_satir_sayisindan_bagimsiz(self):
+        urunler = [self.urun_olustur(no, lot_miktari=50) for no in range(1, 6)]
+        az = self.fis_olustur()
+        Satis.objects.create(fis=az, urun=urunler[0], miktar=Decimal('1'))
+        cok = self.fis_olustur()
+        for urun in urunler:
+            Satis.objects.create(fis=cok, urun=urun, miktar=Decimal('2'))
+
+        sayilar = []
+        for fis in (az, az, cok):  # İlki ContentType önbelleğini doldurur
+            with CaptureQueriesContext(connection) as sorgular:
+                yanit = self.client.get(reverse('admin:stok_takip_satisfisi_change', args=[fis.pk]))
+            self.assertEqual(yanit.status_code, 200)
+            sayilar.append(len(sorgular))
+        self.assertEqual(sayilar[1], sayilar[2])
+        self.assertContains(yanit, 'Kalan Mevcut:🟢 48 adet')
+        self.assertContains(yanit, 'stok_takip/admin/satis_stok.js')
+        self.assertContains(yanit, f'<option value="{urunler[4].pk}" selected>{urunler[4]}</option>', count=1)
+        self.assertNotContains(yanit, f'<option value="{urunler[4].pk}">')  # Ürünler autocomplete ile gelir
+
+    def test_stok_ucu_secilen_urunlerin_stokunu_doner(self):
+        urun1 = self.urun_olustur(1, lot_sayisi=2, lot_miktari=10)
+        urun2 = self.urun_olustur(2, lot_miktari=3)
+
+        with self.assertNumQueries(3):  # oturum, kullanıcı, stoklar
+            yanit = self.client.get(reverse('admin:stok_takip_satisfisi_stok'), {'urun': [urun1.pk, urun2.pk, 'yok']})
+        self.assertEqual(yanit.json(), {
+            urun1.pk: {'stok': 20, 'metin': 'Kalan Mevcut:🟢 20 adet'},
+            urun2.pk: {'stok': 3, 'metin': 'Kalan Mevcut:🟠 3 adet'},
+        })
+
+        self.client.logout()
+        yanit = self.client.get(reverse('admin:stok_takip_satisfisi_stok'), {'urun': urun1.pk})
+        self.assertEqual(yanit.status_code, 302)
+
+    def test_urun_secici_on_ek_aramasi(self):
+        urun = self.urun_olustur(1)
+        Urun.objects.filter(pk=urun.pk).update(urun_adi='Vida 4x40')
+        self.urun_olustur(2)  # "Ürün 2" - adın ortasında "vida" geçmez
+
+        def ara(terim):
+            yanit = self.client.get(reverse('admin:autocomplete'), {
+                'term': terim, 'app_label': 'stok_takip', 'model_name': 'satis', 'field_name': 'urun'
+            })
+            return [sonuc['id'] for sonuc in yanit.json()['results']]
+
+        self.assertEqual(ara('vid'), [urun.pk])
+        self.assertEqual(ara(urun.barkod), [urun.pk])
+        self.assertEqual(ara('4x40'), [])  # Ön ek araması: indeks kullanılabilsin diye
+
+
+class SatisFisiNumaraTest(StokTestVerisi, TestCase):
+
+    def test_numaralar_artarak_ve_bosluksuz_verilir(self):
+        numaralar = [self.fis_olustur().fis_no for _ in range(5)]
+        self.assertEqual(numaralar, [1, 2, 3, 4, 5])
+
+    def test_sayac_mevcut_en_buyuk_numaradan_baslar(self):
+        SatisFisi.objects.bulk_create([SatisFisi(fis_no=41, kullanici=self.kullanici)])
+        self.assertEqual(self.fis_olustur().fis_no, 42)
+
+    def test_geri_alinan_fis_numara_harcamaz(self):
+        self.fis_olustur()
+        try:
+            with transaction.atomic():
+                self.fis_olustur()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.fis_olustur().fis_no, 2)
+
+
+class LotNumaraTest(StokTestVerisi, TestCase):
+
+    def on_ek(self):
+        return f'L{date.today().strftime("%Y%m%d")}'
+
+    def test_yerlesim_ve_alis_fisi_ayni_sirayi_kullanir(self):
+        urun = self.urun_olustur(1, lot_sayisi=1)
+        tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        fis = AlisFisi.objects.create(
+            fis_no='F-1', tedarikci=tedarikci, fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        lot = UrunYerlesimYeri.objects.create(urun=urun, miktar=1, konum='C-1')
+
+        self.assertEqual(urun.yerlesimler.order_by('pk').first().lot_no, f'{self.on_ek()}-001')
+        self.assertEqual(fis.lot_no, f'{self.on_ek()}-002')
+        self.assertEqual(lot.lot_no, f'{self.on_ek()}-003')
+
+    def test_toplu_ayirma_ve_hane_sayisi(self):
+        self.assertEqual(
+            lot_numaralari_ayir(3, hane=5),
+            [f'{self.on_ek()}-{sira:05d}' for sira in (1, 2, 3)]
+        )
+
+    def test_999_sonrasi_bozulmaz_ve_mevcut_lotlardan_devam_eder(self):
+        urun = self.urun_olustur(1, lot_sayisi=0)
+        UrunYerlesimYeri.objects.bulk_create([
+            UrunYerlesimYeri(urun=urun, miktar=1, konum='C-1', lot_no=f'{self.on_ek()}-998')
+        ])
+
+        self.assertEqual(
+            lot_numaralari_ayir(3),
+            [f'{self.on_ek()}-999', f'{self.on_ek()}-1000', f'{self.on_ek()}-1001']
+        )
+
+
+class KasaDefteriTest(StokTestVerisi, TestCase):
+
+    def test_hareketler_bakiyeyi_olusturur(self):
+        Kasa.objects.update(bakiye=Decimal('100.00'))
+        Kasa.objects.get().save()  # değişmeyen bakiye hareket üretmez
+        urun = self.urun_olustur(1, lot_sayisi=1)
+        Satis.objects.create(fis=self.fis_olustur(), urun=urun, miktar=Decimal('2'))  # 2 x 15.00
+        OdemeKasa.objects.create(
+            odeme_tipi='elektrik', tutar=Decimal('12.50'), aciklama='Fatura',
+            odeme_tarihi=date.today(), kullanici=self.kullanici
+        )
+
+        self.assertEqual(kasa_bakiyesi(), Decimal('17.50'))
+        self.assertEqual(
+            sorted(KasaHareketi.objects.values_list('tip', flat=True)),
+            ['odeme', 'satis']
+        )
+
+    def test_bakiye_ozet_ve_sonraki_hareketlerden_tek_sorguda_hesaplanir(self):
+        for tutar in ('10.00', '20.00', '-5.00'):
+            KasaHareketi.ekle(Decimal(tutar), 'duzeltme')
+        ozet = kasa_ozeti_al()
+        KasaHareketi.ekle(Decimal('7.25'), 'duzeltme')
+
+        self.assertEqual(ozet.bakiye, Decimal('25.00'))
+        with self.assertNumQueries(1):
+            self.assertEqual(kasa_bakiyesi(), Decimal('32.25'))
+
+        self.assertIsNotNone(kasa_ozeti_al())
+        self.assertIsNone(kasa_ozeti_al())
+        self.assertEqual(kasa_bakiyesi(), Decimal('32.25'))
+
+    def test_gec_commit_edilen_hareket_kaybolmaz(self):
+        ilk = KasaHareketi.ekle(Decimal('10.00'), 'duzeltme')
+        # Daha büyük id'li hareket önce commit edilip özete girer
+        KasaHareketi.objects.create(pk=ilk.pk + 10, tutar=Decimal('20.00'), tip='duzeltme')
+        self.assertEqual(kasa_ozeti_al().bakiye, Decimal('30.00'))
+
+        # Özetin son id'sinden küçük id'li hareket sonradan commit edilir
+        KasaHareketi.objects.create(pk=ilk.pk + 5, tutar=Decimal('4.00'), tip='duzeltme')
+        self.assertEqual(kasa_bakiyesi(), Decimal('34.00'))
+
+        ozet = kasa_ozeti_al()
+        self.assertEqual(ozet.bakiye, Decimal('34.00'))
+        self.assertEqual(ozet.son_hareket_id, ilk.pk + 5)
+        self.assertEqual(kasa_bakiyesi(), Decimal('34.00'))
+
+
+class OrtalamaMaliyetTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        self.urun = self.urun_olustur(1, lot_sayisi=0)
+
+    def mal_kabul(self, miktar, birim_fiyat):
+        fis = AlisFisi.objects.create(
+            fis_no=f'F-{AlisFisi.objects.count() + 1}', tedarikci=self.tedarikci,
+            fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        AlisDetay.objects.create(
+            fis=fis, urun=self.urun, miktar=miktar, birim_fiyat=Decimal(birim_fiyat), konum='D-1'
+        )
+
+    def ortalama(self):
+        self.urun.refresh_from_db(fields=['ortalama_maliyet'])
+        return self.urun.ortalama_maliyet
+
+    def test_hareketli_ortalama_ve_satis_fiyati(self):
+        self.mal_kabul(10, '5.00')
+        self.mal_kabul(10, '8.00')
+        self.assertEqual(self.ortalama(), Decimal('6.5'))
+
+        # Satış ortalamayı değiştirmez, sadece miktarı azaltır
+        Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('5'))
+        self.assertEqual(self.ortalama(), Decimal('6.5'))
+
+        self.mal_kabul(5, '10.00')
+        self.assertEqual(self.ortalama(), Decimal('7.375'))
+        fiyat = SatisFiyati.objects.get(urun=self.urun)
+        self.assertEqual(fiyat.alim_fiyati, Decimal('7.38'))
+        self.assertEqual(fiyat.satis_fiyati, Decimal('11.07'))
+
+    def test_yeniden_hesaplama_ayni_sonucu_verir(self):
+        self.mal_kabul(10, '5.00')
+        self.mal_kabul(10, '8.00')
+        Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('5'))
+        self.mal_kabul(5, '10.00')
+
+        Urun.objects.filter(pk=self.urun.pk).update(ortalama_maliyet=0)
+        self.assertEqual(maliyetleri_yeniden_hesapla(), ([(self.urun.pk, Decimal('0'), Decimal('7.375'))], []))
+        self.assertEqual(self.ortalama(), Decimal('0'))  # Varsayılan sadece rapor
+
+        maliyetleri_yeniden_hesapla(duzelt=True)
+        self.assertEqual(self.ortalama(), Decimal('7.375'))
+
+    def test_yeniden_hesaplama_her_alista_ayni_yuvarlamayi_yapar(self):
+        # Yuvarlanmamış geçmiş 2.2308 verirdi; artımlı yol her alışta yuvarlar
+        for miktar, birim_fiyat in ((3, '1.00'), (6, '3.00'), (4, '2.00')):
+            self.mal_kabul(miktar, birim_fiyat)
+        self.assertEqual(self.ortalama(), Decimal('2.2307'))
+
+        self.assertEqual(maliyetleri_yeniden_hesapla(duzelt=True), ([], []))
+        self.assertEqual(self.ortalama(), Decimal('2.2307'))
+
+    def test_alis_disi_lotu_olan_urun_yeniden_hesaplanmaz(self):
+        # Elle açılan lot ortalamaya ağırlık olarak girer ama geçmişte görünmez
+        UrunYerlesimYeri.objects.create(urun=self.urun, miktar=10, konum='A-1')
+        self.mal_kabul(5, '5.00')
+        self.mal_kabul(10, '15.00')
+        self.assertEqual(self.ortalama(), Decimal('7.0000'))
+
+        self.assertEqual(maliyetleri_yeniden_hesapla(duzelt=True), ([], [(self.urun.pk, 25, 15)]))
+        self.assertEqual(self.ortalama(), Decimal('7.0000'))
+
+    def test_sifir_maliyetli_alis_alim_fiyatina_yazilir(self):
+        self.mal_kabul(5, '0.00')
+
+        self.assertEqual(self.ortalama(), Decimal('0'))
+        self.assertEqual(SatisFiyati.objects.get(urun=self.urun).alim_fiyati, Decimal('0.00'))
+
+    def test_mal_kabul_sorgu_sayisi_lot_sayisindan_bagimsiz(self):
+        sayilar = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as sorgular:
+                self.mal_kabul(10, '5.00')
+            sayilar.append(len(sorgular))
+        for _ in range(10):
+            self.mal_kabul(10, '5.00')
+        with CaptureQueriesContext(connection) as sorgular:
+            self.mal_kabul(10, '5.00')
+
+        self.assertEqual(sayilar[1], len(sorgular))
+
+
+class TopluMalKabulTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+
+    def gonder(self, fis_no, detaylar):
+        return self.client.post('/api/alis-fisleri/toplu/', {
+            'fis_no': fis_no,
+            'tedarikci': self.tedarikci.pk,
+            'fis_tarihi': date.today().isoformat(),
+            'detaylar': detaylar,
+        }, format='json')
+
+    def test_fis_satirlar_lotlar_ve_kasa_birlikte_yazilir(self):
+        urun1 = self.urun_olustur(1, lot_sayisi=0)
+        urun2 = self.urun_olustur(2, lot_sayisi=0)
+
+        yanit = self.gonder('F-1', [
+            {'urun': urun1.pk, 'miktar': 10, 'birim_fiyat': '5.00', 'konum': 'D-1'},
+            {'urun': urun1.pk, 'miktar': 10, 'birim_fiyat': '8.00', 'konum': 'D-1'},
+            {'urun': urun2.pk, 'miktar': 4, 'birim_fiyat': '2.50', 'konum': 'D-2'},
+        ])
+
+        self.assertEqual(yanit.status_code, 201, yanit.data)
+        self.assertEqual(len(yanit.data['detaylar']), 3)
+        fis = AlisFisi.objects.get(fis_no='F-1')
+        self.assertEqual(fis.toplam_tutar, Decimal('140.00'))
+        self.assertEqual(list(KasaHareketi.objects.filter(tip='alis').values_list('tutar', flat=True)), [Decimal('-140.00')])
+
+        lot = UrunYerlesimYeri.objects.get(urun=urun1)
+        self.assertEqual((lot.lot_no, lot.miktar), (fis.lot_no, 20))
+        urun1.refresh_from_db()
+        self.assertEqual((urun1.toplam_stok, urun1.ortalama_maliyet), (20, Decimal('6.5')))
+        self.assertEqual(SatisFiyati.objects.get(urun=urun2).alim_fiyati, Decimal('2.50'))
+
+    def test_gecersiz_satirda_hicbir_kayit_yazilmaz(self):
+        urun = self.urun_olustur(1, lot_sayisi=0)
+
+        yanit = self.gonder('F-1', [
+            {'urun': urun.pk, 'miktar': 10, 'birim_fiyat': '5.00', 'konum': 'D-1'},
+            {'urun': 'YOK', 'miktar': 10, 'birim_fiyat': '5.00', 'konum': 'D-1'},
+        ])
+
+        self.assertEqual(yanit.status_code, 400)
+        self.assertIn('urun', yanit.data['detaylar'][1])
+        self.assertFalse(AlisFisi.objects.exists())
+        self.assertFalse(UrunYerlesimYeri.objects.exists())
+        self.assertFalse(KasaHareketi.objects.filter(tip='alis').exists())
+
+    def test_sorgu_sayisi_satir_sayisindan_bagimsiz(self):
+        urun = self.urun_olustur(1, lot_sayisi=0)
+        satir = {'urun': urun.pk, 'miktar': 1, 'birim_fiyat': '5.00', 'konum': 'D-1'}
+        self.gonder('F-0', [satir])  # Günün lot sayacı oluşsun
+
+        with CaptureQueriesContext(connection) as az:
+            self.gonder('F-1', [satir] * 2)
+        with CaptureQueriesContext(connection) as cok:
+            self.gonder('F-2', [satir] * 50)
+
+        self.assertEqual(len(az), len(cok))
+
+
+class SepetSatisTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+
+    def checkout(self, *kalemler):
+        return self.client.post('/api/satis-fisleri/checkout/', {
+            'kalemler': [{'urun': urun.pk, 'miktar': miktar} for urun, miktar in kalemler]
+        }, format='json')
+
+    def test_sepet_tek_fiste_satilir(self):
+        urun1 = self.urun_olustur(1, lot_sayisi=2, lot_miktari=10)
+        urun2 = self.urun_olustur(2, lot_sayisi=1, lot_miktari=10)
+
+        yanit = self.checkout((urun1, 8), (urun2, 3), (urun1, 4))
+
+        self.assertEqual(yanit.status_code, 201, yanit.data)
+        fis = SatisFisi.objects.get()
+        self.assertEqual(fis.toplam_tutar, Decimal('225.00'))  # 15 adet x 15.00
+        self.assertEqual(len(yanit.data['satislar']), 3)
+
+        # Aynı ürünün ikinci satırı ilk satırın bıraktığı lottan devam eder
+        ikinci = Satis.objects.get(fis=fis, urun=urun1, miktar=4)
+        self.assertEqual(sorted(ikinci.lot_hareketleri.values_list('miktar', flat=True)), [2, 2])
+        urun1.refresh_from_db()
+        self.assertEqual(urun1.toplam_stok, 8)
+        self.assertEqual(SatisKasa.objects.filter(satis__fis=fis).count(), 3)
+        self.assertEqual(kasa_bakiyesi(), Decimal('225.00'))
+
+    def test_stok_hatasi_satir_bazinda_doner_ve_hicbir_sey_yazilmaz(self):
+        urun1 = self.urun_olustur(1, lot_sayisi=1, lot_miktari=10)
+        urun2 = self.urun_olustur(2, lot_sayisi=1, lot_miktari=5)
+
+        yanit = self.checkout((urun1, 5), (urun2, 6))
+
+        self.assertEqual(yanit.status_code, 400)
+        self.assertEqual(yanit.data['kalemler'][0], {})
+        self.assertIn('yeterli stok yok', str(yanit.data['kalemler'][1]['miktar']))
+        self.assertFalse(SatisFisi.objects.exists())
+        self.assertEqual(UrunYerlesimYeri.objects.get(urun=urun1).miktar, 10)
+        self.assertFalse(KasaHareketi.objects.exists())
+
+    def test_sorgu_sayisi_satir_sayisindan_bagimsiz(self):
+        urun = self.urun_olustur(1, lot_sayisi=30, lot_miktari=10)
+        self.checkout((urun, 1))  # Fiş numarası sayacı oluşsun
+
+        with CaptureQueriesContext(connection) as tek:
+            self.checkout((urun, 1))
+        with CaptureQueriesContext(connection) as cok:
+            self.checkout(*[(urun, 10)] * 20)
+
+        self.assertEqual(len(tek), len(cok))
+
+
+class BarkodOnbellekTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches[BARKOD_ONBELLEGI].clear()
+        caches[SAYAC_ONBELLEGI].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.urun = self.urun_olustur(1, lot_sayisi=1, lot_miktari=10)
+
+    def ara(self, barkod=None):
+        return self.client.get('/api/urunler/barkod_ara/', {'barkod': barkod or self.urun.barkod})
+
+    def test_ikinci_okutma_veritabanina_gitmez(self):
+        self.assertEqual(self.ara().data['toplam_stok'], 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ara().data['stok_no'], self.urun.pk)
+
+        self.assertEqual(self.ara('0000').status_code, 404)
+        istatistik = self.client.get('/api/urunler/barkod_istatistik/').data
+        self.assertEqual((istatistik['isabet'], istatistik['iskalama']), (1, 2))
+
+        # Barkod kayıtlarının silinmesi sayaçlara dokunmaz
+        caches[BARKOD_ONBELLEGI].clear()
+        istatistik = self.client.get('/api/urunler/barkod_istatistik/').data
+        self.assertEqual((istatistik['isabet'], istatistik['iskalama']), (1, 2))
+
+    def test_fiyat_stok_ve_barkod_degisikligi_kaydi_siler(self):
+        self.ara()
+
+        fiyat = SatisFiyati.objects.get(urun=self.urun)
+        fiyat.alim_fiyati = Decimal('20.00')
+        fiyat.save()
+        self.assertEqual(self.ara().data['satis_fiyati'], 30.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('4'))
+        self.assertEqual(self.ara().data['toplam_stok'], 6)
+
+        eski_barkod = self.urun.barkod
+        self.urun.barkod = '8690999999999'
+        self.urun.save()
+        self.assertEqual(self.ara(eski_barkod).status_code, 404)
+
+
+class DashboardTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches[DASHBOARD_ONBELLEGI].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.urun = self.urun_olustur(1, lot_sayisi=1, lot_miktari=20)
+
+    def test_tek_yanit_ve_onbellek(self):
+        veri = self.client.get('/api/dashboard/').data
+        self.assertEqual(veri['urun_sayisi'], 1)
+        self.assertEqual(veri['dusuk_stok_sayisi'], 0)
+        self.assertEqual(veri['kasa_bakiyesi'], '0.00')
+
+        # Rakamlar önbellekten, sadece son fişler sorgulanır
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/')
+
+    def test_satis_ve_odeme_yazimi_rakamlari_yeniler(self):
+        self.client.get('/api/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/satis-fisleri/checkout/', {
+                'kalemler': [{'urun': self.urun.pk, 'miktar': 12}]
+            }, format='json')
+        veri = self.client.get('/api/dashboard/').data
+        self.assertEqual(veri['satis_ozeti']['bugun'], 180.0)
+        self.assertEqual(veri['satis_ozeti']['fis_sayisi'], 1)
+        self.assertEqual(veri['dusuk_stok_sayisi'], 1)
+        self.assertEqual(veri['kasa_bakiyesi'], '180.00')
+        self.assertEqual(len(veri['son_satislar']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OdemeKasa.objects.create(
+                odeme_tipi='kira', tutar=Decimal('30.00'), aciklama='Kira',
+                odeme_tarihi=date.today(), kullanici=self.kullanici
+            )
+        self.assertEqual(self.client.get('/api/dashboard/').data['kasa_bakiyesi'], '150.00')
+
+        # Satış rakamları brüttür: para iadesi kasadan düşer, satış toplamından düşmez
+        with self.captureOnCommitCallbacks(execute=True):
+            MusteriIade.objects.create(
+                urun=self.urun, miktar=2, iade_nedeni='Kusurlu',
+                durum='onaylandi', cozum_tipi='para', iade_tutari=Decimal('30.00')
+            )
+        veri = self.client.get('/api/dashboard/').data
+        self.assertEqual(veri['satis_ozeti']['bugun'], 180.0)
+        self.assertEqual(veri['satis_ozeti']['bu_ay'], 180.0)
+        self.assertEqual(veri['kasa_bakiyesi'], '120.00')
+
+
+class GunlukSatisOzetTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        self.urun = self.urun_olustur(1, lot_sayisi=0)
+        self.diger = self.urun_olustur(2, lot_sayisi=0)
+        fis = AlisFisi.objects.create(
+            fis_no='F-1', tedarikci=tedarikci, fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        for urun in (self.urun, self.diger):
+            AlisDetay.objects.create(fis=fis, urun=urun, miktar=50, birim_fiyat=Decimal('8.00'), konum='D-1')
+
+    def ozet(self, urun):
+        return GunlukSatisOzet.objects.filter(urun=urun).values_list('miktar', 'ciro', 'maliyet', 'fis_sayisi').get()
+
+    def test_satis_duzenleme_checkout_ve_iade_ozete_yansir(self):
+        fis = self.fis_olustur()
+        satis = Satis.objects.create(fis=fis, urun=self.urun, miktar=Decimal('2'))
+        Satis.objects.create(fis=fis, urun=self.urun, miktar=Decimal('1'))
+        satis.miktar = Decimal('4')
+        satis.save()
+        sepeti_sat(self.kullanici, [(self.urun.pk, 1), (self.diger.pk, 3)])
+
+        # 6 adet x 12.00 (8.00 ortalama maliyet + %25 kâr); iki fişte geçti
+        self.assertEqual(self.ozet(self.urun), (Decimal('6'), Decimal('72.00'), Decimal('48.00'), 2))
+        self.assertEqual(self.ozet(self.diger), (Decimal('3'), Decimal('36.00'), Decimal('24.00'), 1))
+
+        MusteriIade.objects.create(
+            satis=satis, urun=self.urun, miktar=1, iade_nedeni='Kusurlu',
+            durum='onaylandi', cozum_tipi='para', iade_tutari=Decimal('12.00')
+        )
+        self.assertEqual(self.ozet(self.urun), (Decimal('5'), Decimal('60.00'), Decimal('40.00'), 2))
+        self.assertEqual(
+            GunlukSatisOzet.objects.filter(urun=self.urun).values_list('brut_ciro', 'satir_sayisi').get(),
+            (Decimal('72.00'), 3)
+        )
+
+    def test_duzenleme_eski_maliyeti_kayitli_degerle_geri_alir(self):
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('2'))
+        self.assertEqual(satis.maliyet, Decimal('16.00'))
+
+        # Ortalama 8.00 -> 9.00; düzenleme eski 2 adedi 8.00'den geri almalı
+        fis = AlisFisi.objects.create(
+            fis_no='F-2', tedarikci=Tedarikci.objects.get(), fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        AlisDetay.objects.create(fis=fis, urun=self.urun, miktar=48, birim_fiyat=Decimal('10.00'), konum='D-1')
+        satis.miktar = Decimal('1')
+        satis.save()
+
+        self.assertEqual(satis.maliyet, Decimal('9.00'))
+        self.assertEqual(self.ozet(self.urun)[2], Decimal('9.00'))
+
+    def test_fis_silinince_ozet_ve_lotlar_geri_alinir(self):
+        sepeti_sat(self.kullanici, [(self.diger.pk, 2)])
+        fis = sepeti_sat(self.kullanici, [(self.urun.pk, 3), (self.diger.pk, 1), (self.urun.pk, 2)])
+        tek_satir = Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('4'))
+
+        fis.delete()
+
+        self.assertEqual(self.ozet(self.urun), (Decimal('4'), Decimal('48.00'), Decimal('32.00'), 1))
+        self.assertEqual(self.ozet(self.diger), (Decimal('2'), Decimal('24.00'), Decimal('16.00'), 1))
+        self.assertEqual(UrunYerlesimYeri.objects.get(urun=self.urun).miktar, 46)
+        self.urun.refresh_from_db(fields=['toplam_stok'])
+        self.assertEqual(self.urun.toplam_stok, 46)
+        self.assertFalse(SatisLotHareketi.objects.filter(satis__fis_id=fis.pk).exists())
+        self.assertEqual(
+            GunlukSatisOzet.objects.filter(urun=self.urun).values_list('brut_ciro', 'satir_sayisi').get(),
+            (Decimal('48.00'), 1)
+        )
+
+        tek_satir.delete()
+        self.assertEqual(self.ozet(self.urun), (Decimal('0'), Decimal('0.00'), Decimal('0.00'), 0))
+        self.assertEqual(UrunYerlesimYeri.objects.get(urun=self.urun).miktar, 50)
+
+    def test_yeniden_olusturma_artimli_ozetle_ayni(self):
+        fis = self.fis_olustur()
+        Satis.objects.create(fis=fis, urun=self.urun, miktar=Decimal('2'))
+        sepeti_sat(self.kullanici, [(self.urun.pk, 5), (self.diger.pk, 1), (self.urun.pk, 1)])
+        artimli = sorted(GunlukSatisOzet.objects.values_list(
+            'tarih', 'urun', 'miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi'
+        ))
+
+        GunlukSatisOzet.objects.all().delete()
+        self.assertEqual(gunluk_ozeti_yeniden_olustur(), 2)
+        self.assertEqual(
+            sorted(GunlukSatisOzet.objects.values_list(
+                'tarih', 'urun', 'miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi'
+            )),
+            artimli
+        )
+
+    def test_duzenlemede_urun_ve_gun_degisirse_satir_tasinir(self):
+        dunku_fis = self.fis_olustur()
+        SatisFisi.objects.filter(pk=dunku_fis.pk).update(olusturma_tarihi=timezone.now() - timedelta(days=1))
+        dunku_fis.refresh_from_db()
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('2'))
+
+        satis.urun = self.diger
+        satis.save()
+        alanlar = ('tarih', 'urun', 'miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi')
+        bugun = timezone.localdate()
+        self.assertEqual(
+            sorted(GunlukSatisOzet.objects.values_list(*alanlar)),
+            sorted([
+                (bugun, self.urun.pk, Decimal('0'), Decimal('0.00'), Decimal('0.00'), Decimal('0.00'), 0, 0),
+                (bugun, self.diger.pk, Decimal('2'), Decimal('24.00'), Decimal('24.00'), Decimal('16.00'), 1, 1),
+            ])
+        )
+
+        satis.fis = dunku_fis
+        satis.save()
+        self.assertEqual(
+            GunlukSatisOzet.objects.filter(tarih=bugun, urun=self.diger).values_list('fis_sayisi', 'satir_sayisi').get(),
+            (0, 0)
+        )
+        artimli = sorted(GunlukSatisOzet.objects.exclude(satir_sayisi=0).values_list(*alanlar))
+        self.assertEqual(artimli, [
+            (bugun - timedelta(days=1), self.diger.pk, Decimal('2'), Decimal('24.00'), Decimal('24.00'), Decimal('16.00'), 1, 1),
+        ])
+
+        GunlukSatisOzet.objects.all().delete()
+        gunluk_ozeti_yeniden_olustur()
+        self.assertEqual(sorted(GunlukSatisOzet.objects.values_list(*alanlar)), artimli)
+
+    def test_yeniden_olusturma_kayitli_satis_maliyetini_kullanir(self):
+        satis = Satis.objects.create(fis=self.fis_olustur(), urun=self.urun, miktar=Decimal('2'))
+        # Ortalama 8.00 -> 9.00; düzenlenen satır maliyetini 9.00'dan yeniden yazar,
+        # iade de onay anındaki ortalamadan. Geçmişi oynatmak bu değerleri vermez:
+        # düzenlenen satış alıştan önceki fiş anına 3 adet olarak düşer
+        fis = AlisFisi.objects.create(
+            fis_no='F-2', tedarikci=Tedarikci.objects.get(), fis_tarihi=date.today(), kullanici=self.kullanici
+        )
+        AlisDetay.objects.create(fis=fis, urun=self.urun, miktar=48, birim_fiyat=Decimal('10.00'), konum='D-1')
+        satis.miktar = Decimal('3')
+        satis.save()
+        sepeti_sat(self.kullanici, [(self.urun.pk, 1)])
+        MusteriIade.objects.create(
+            satis=satis, urun=self.urun, miktar=1, iade_nedeni='Kusurlu',
+            durum='onaylandi', cozum_tipi='degisim', iade_tutari=Decimal('0')
+        )
+        alanlar = ('tarih', 'urun', 'miktar', 'ciro', 'brut_ciro', 'maliyet', 'fis_sayisi', 'satir_sayisi')
+        artimli = sorted(GunlukSatisOzet.objects.values_list(*alanlar))
+        self.assertEqual(self.ozet(self.urun)[2], Decimal('27.00'))
+
+        GunlukSatisOzet.objects.all().delete()
+        gunluk_ozeti_yeniden_olustur()
+        self.assertEqual(sorted(GunlukSatisOzet.objects.values_list(*alanlar)), artimli)
+
+
+class MuhasebeRaporuTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.urun = self.urun_olustur(1, lot_sayisi=0)
+        tedarikci = Tedarikci.objects.create(firma_adi='Tedarikçi A')
+        # Rapor brüt satışı ve satış satırı sayısını okur; ciro/fiş sayısı farklı tutulur
+        for tarih, brut_ciro, satir_sayisi in ((date(2025, 1, 10), '100.00', 2), (date(2025, 3, 5), '250.00', 3),
+                                               (date(2025, 3, 31), '50.00', 1)):
+            GunlukSatisOzet.objects.create(
+                tarih=tarih, urun=self.urun, miktar=1, ciro=Decimal(brut_ciro) - 10, brut_ciro=Decimal(brut_ciro),
+                fis_sayisi=1, satir_sayisi=satir_sayisi
+            )
+        AlisFisi.objects.create(
+            fis_no='F-1', tedarikci=tedarikci, fis_tarihi=date(2025, 3, 2),
+            toplam_tutar=Decimal('80.00'), kullanici=self.kullanici
+        )
+        for tarih, tip, tutar in ((date(2025, 1, 15), 'kira', '40.00'), (date(2025, 3, 1), 'kira', '40.00'),
+                                  (date(2025, 3, 20), 'elektrik', '15.50'), (date(2025, 3, 25), 'elektrik', '4.50')):
+            OdemeKasa.objects.create(
+                odeme_tipi=tip, tutar=Decimal(tutar), aciklama=tip, odeme_tarihi=tarih, kullanici=self.kullanici
+            )
+
+    def test_aylik_raporlar_ay_sayisindan_bagimsiz_uc_sorgu(self):
+        with self.assertNumQueries(3):
+            raporlar = aylik_raporlar(date(2025, 1, 1), 3)
+
+        self.assertEqual([r.baslangic for r in raporlar], [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)])
+        ocak, subat, mart = raporlar
+        self.assertEqual((ocak.satis_toplam, ocak.satis_adet, ocak.net_kar), (Decimal('100.00'), 2, Decimal('60.00')))
+        self.assertEqual((subat.satis_toplam, subat.toplam_gider, subat.odeme_detay), (Decimal('0.00'), Decimal('0.00'), []))
+        self.assertEqual((mart.satis_toplam, mart.satis_adet), (Decimal('300.00'), 4))
+        self.assertEqual((mart.alis_toplam, mart.alis_adet), (Decimal('80.00'), 1))
+        self.assertEqual(mart.odeme_detay, [
+            {'tip': 'Kira', 'tutar': Decimal('40.00')},
+            {'tip': 'Elektrik', 'tutar': Decimal('20.00')},
+        ])
+        self.assertEqual(mart.net_kar, Decimal('160.00'))
+
+    def test_tarih_araligi_ve_sayfa(self):
+        with self.assertNumQueries(3):
+            rapor = donem_raporu(date(2025, 1, 12), date(2025, 3, 21))
+        self.assertEqual((rapor.satis_toplam, rapor.alis_toplam, rapor.odeme_toplam),
+                         (Decimal('250.00'), Decimal('80.00'), Decimal('95.50')))
+
+        User.objects.create_superuser('yonetici', password='test')
+        self.client.login(username='yonetici', password='test')
+        yanit = self.client.get('/api/raporlar/muhasebe/', {'ay': 3, 'yil': 2025, 'ay_sayisi': 3})
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(len(yanit.context['raporlar']), 3)
+        self.assertEqual(yanit.context['rapor'].net_kar, Decimal('160.00'))
+
+
+class EnvanterRaporuTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for no in range(1, 6):
+            self.urun_olustur(no, lot_sayisi=3)
+        UrunYerlesimYeri.objects.filter(konum='A-1').update(miktar=0)  # boş lotlar rapora girmez
+        User.objects.create_superuser('yonetici', password='test')
+        self.client.login(username='yonetici', password='test')
+
+    def test_anahtar_tabanli_sayfalama_tum_lotlari_sirayla_verir(self):
+        beklenen = list(
+            UrunYerlesimYeri.objects.filter(miktar__gt=0).order_by('urun_id', 'pk').values_list('urun_id', 'lot_no')
+        )
+        with self.assertNumQueries(4):  # 10 lot, 3'erlik sayfalar
+            satirlar = list(envanter_satirlari(sayfa_boyutu=3))
+        self.assertEqual([(s['stok_no'], s['lot_no']) for s in satirlar], beklenen)
+        self.assertEqual(satirlar[0]['kategori'], 'Hırdavat')
+        self.assertEqual(len(list(envanter_satirlari(konum='a-2'))), 5)
+
+    def test_csv_ve_xlsx_akisi(self):
+        yanit = self.client.get('/api/raporlar/envanter/', {'format': 'csv'})
+        self.assertTrue(yanit.streaming)
+        satirlar = list(csv.reader(io.StringIO(b''.join(yanit.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(satirlar[0][:3], ['Stok No', 'Ürün Adı', 'Kategori'])
+        self.assertEqual(len(satirlar), 11)
+
+        yanit = self.client.get('/api/raporlar/envanter/', {'format': 'xlsx'})
+        arsiv = zipfile.ZipFile(io.BytesIO(b''.join(yanit.streaming_content)))
+        self.assertIsNone(arsiv.testzip())
+        sayfa = arsiv.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sayfa.count('<row>'), 11)
+        self.assertIn('<t>Hırdavat</t>', sayfa)
+
+    def test_html_sayfasi_tek_sorgu(self):
+        with self.assertNumQueries(3):  # oturum, kullanıcı, envanter
+            yanit = self.client.get('/api/raporlar/envanter/')
+        self.assertContains(yanit, 'class="urun-card"', count=5)
+
+    def test_komut_dosyaya_json_yazar_ve_suzer(self):
+        diger = Kategori.objects.create(kategori_adi='Boya')
+        Urun.objects.filter(pk=self.urun_olustur(6, lot_sayisi=1).pk).update(kategori=diger)
+
+        with tempfile.TemporaryDirectory() as klasor:
+            dosya = os.path.join(klasor, 'envanter.json')
+            hatalar = io.StringIO()
+            call_command('envanter_raporu', format='json', kategori='hırdavat', output=dosya, parca=4, stderr=hatalar)
+            with open(dosya, encoding='utf-8') as f:
+                satirlar = json.load(f)
+        self.assertEqual(len(satirlar), 10)
+        self.assertEqual({s['kategori'] for s in satirlar}, {'Hırdavat'})
+        self.assertIn('10 lot', hatalar.getvalue())
+
+        cikti = io.StringIO()
+        call_command('envanter_raporu', kategori=diger.pk, konum='A-', stdout=cikti)
+        self.assertIn(f'{Urun.objects.get(kategori=diger).stok_no} - Ürün 6', cikti.getvalue())
+        self.assertEqual(cikti.getvalue().count('• Lot:'), 1)
+
+
+@override_settings(
+    SKT_UYARI_ALICILARI=['depo@ornek.com'],
+    SKT_BILDIRIM_KANALLARI=['stok_takip.servisler.skt.EpostaKanali'],
+)
+class SktUyariTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bugun = date.today()
+        urun = self.urun_olustur(1, lot_sayisi=0)
+        self.lotlar = {}
+        for gun in (-2, 3, 20, 60, 200):
+            self.lotlar[gun] = UrunYerlesimYeri.objects.create(
+                urun=urun, miktar=5, konum=f'S-{gun}', son_kullanma_tarihi=self.bugun + timedelta(days=gun)
+            )
+        UrunYerlesimYeri.objects.create(urun=urun, miktar=0, konum='S-bos', son_kullanma_tarihi=self.bugun)
+
+    def test_kademeler_tek_sorguda(self):
+        with self.assertNumQueries(1):
+            satirlar = skt_taramasi(self.bugun, [7, 30, 90])
+        self.assertEqual(
+            [(satir['pk'], satir['kademe']) for satir in satirlar],
+            [(self.lotlar[-2].pk, GECMIS), (self.lotlar[3].pk, 7), (self.lotlar[20].pk, 30), (self.lotlar[60].pk, 90)]
+        )
+        self.assertEqual(satirlar[0]['urun_adi'], 'Ürün 1')
+
+    def test_ayni_lot_ayni_kademede_bir_kez_bildirilir(self):
+        self.assertEqual(len(skt_uyarilarini_gonder(skt_taramasi(self.bugun), self.bugun)), 4)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Süresi geçmiş', mail.outbox[0].body)
+        self.assertEqual(SktUyarisi.objects.count(), 4)
+
+        # Ertesi gün: kademesi değişmeyenler tekrar bildirilmez
+        self.assertEqual(skt_uyarilarini_gonder(skt_taramasi(self.bugun + timedelta(days=1)), self.bugun), [])
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Kademesi daralan (30 → 7 gün, 7 gün → geçmiş) ve SKT'si değişen lotlar yeniden bildirilir
+        lot = self.lotlar[200]
+        lot.son_kullanma_tarihi = self.bugun + timedelta(days=10)
+        lot.save()
+        yeniler = skt_uyarilarini_gonder(skt_taramasi(self.bugun + timedelta(days=13)), self.bugun)
+        self.assertEqual({(uyari['pk'], uyari['kademe']) for uyari in yeniler}, {
+            (self.lotlar[3].pk, GECMIS), (self.lotlar[20].pk, 7), (lot.pk, GECMIS)
+        })
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_webhook_ve_komut(self):
+        with override_settings(SKT_WEBHOOK_URL='http://ornek.com/skt'), \
+                mock.patch('urllib.request.urlopen') as urlopen:
+            skt_uyarilarini_gonder(skt_taramasi(self.bugun), self.bugun, kanallar=[WebhookKanali()])
+        istek = urlopen.call_args.args[0]
+        self.assertEqual(istek.full_url, 'http://ornek.com/skt')
+        self.assertEqual(len(json.loads(istek.data)['uyarilar']), 4)
+
+        SktUyarisi.objects.all().delete()
+        cikti = io.StringIO()
+        call_command('skt_kontrol', ufuk=[7, 30], stdout=cikti)
+        self.assertIn('3 yeni uyarı', cikti.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TopluFiyatGuncelleTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches[BARKOD_ONBELLEGI].clear()
+        caches[SAYAC_ONBELLEGI].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.diger_kategori = Kategori.objects.create(kategori_adi='Boya')
+
+    def fiyatlar_olustur(self, adet):
+        ornek = random.Random(7)
+        for no in range(adet):
+            urun = Urun.objects.create(
+                stok_no=f'FYT{no:05d}', barkod=f'7{no:012d}', urun_adi=f'Fiyat {no}', kategori=self.kategori
+            )
+            SatisFiyati.objects.create(
+                urun=urun,
+                alim_fiyati=Decimal(ornek.randint(1, 2000000)) / 100,
+                kar_orani=Decimal(ornek.randint(0, 20000)) / 100,
+                kdv=ornek.choice([1, 10, 20]),
+                iskonto_orani=Decimal(ornek.randint(0, 5000)) / 100,
+                satis_fiyati=0,
+            )
+
+    def test_tek_update_satir_formuluyle_ayni(self):
+        self.fiyatlar_olustur(300)
+        # 0.165 yarım: quantize() çifte (0.16) yuvarlar
+        urun = Urun.objects.create(stok_no='FYT-YARIM', barkod='7999', urun_adi='Yarım', kategori=self.kategori)
+        yarim = SatisFiyati.objects.create(
+            urun=urun, alim_fiyati=Decimal('0.15'), kar_orani=Decimal('0.00'), kdv=1, iskonto_orani=Decimal('0.00'), satis_fiyati=0
+        )
+
+        with self.assertNumQueries(6):  # örnekler, ürün id'leri, UPDATE, taşan satırlar + savepoint
+            sonuc = toplu_fiyat_guncelle(fiyat_hedefi(kategoriler=[self.kategori.pk]), kdv=10)
+        self.assertEqual(sonuc['guncellenen'], 301)
+
+        for fiyat in SatisFiyati.objects.all():
+            self.assertEqual(fiyat.kdv, 10)
+            self.assertEqual(fiyat.satis_fiyati, fiyat.satis_fiyati_hesapla(), fiyat.urun_id)
+        yarim.refresh_from_db()
+        self.assertEqual(yarim.satis_fiyati, Decimal('0.16'))
+
+    def test_kuru_calisma_ve_uc_deger(self):
+        buyuk = self.urun_olustur(1, lot_sayisi=0)
+        SatisFiyati.objects.filter(urun=buyuk).update(alim_fiyati=Decimal('5000000.00'), kar_orani=Decimal('900.00'))
+        self.urun_olustur(2, lot_sayisi=0)
+
+        yanit = self.client.post('/api/satis-fiyatlari/toplu-guncelle/', {
+            'urunler': [buyuk.pk], 'iskonto_orani': '10.00', 'kuru_calisma': True
+        }, format='json')
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit.data['guncellenen'], 1)
+        self.assertEqual(SatisFiyati.objects.get(urun=buyuk).iskonto_orani, Decimal('0.00'))
+
+        # BIGINT sınırını aşan satır tek tek save() ile hesaplanır
+        sonuc = toplu_fiyat_guncelle(fiyat_hedefi(urunler=[buyuk.pk]), kar_orani=Decimal('800.00'))
+        self.assertEqual(sonuc['guncellenen'], 1)
+        fiyat = SatisFiyati.objects.get(urun=buyuk)
+        self.assertEqual(fiyat.satis_fiyati, Decimal('54000000.00'))
+
+    def test_endpoint_suzgecler_ve_barkod_onbellegi(self):
+        urun = self.urun_olustur(1, lot_sayisi=0)
+        boya = self.urun_olustur(2, lot_sayisi=0)
+        Urun.objects.filter(pk=boya.pk).update(kategori=self.diger_kategori)
+        self.client.get('/api/urunler/barkod_ara/', {'barkod': urun.barkod})  # önbelleğe al
+
+        with self.captureOnCommitCallbacks(execute=True):
+            yanit = self.client.post('/api/satis-fiyatlari/toplu-guncelle/', {
+                'kategoriler': [self.kategori.pk], 'kar_orani': '50.00'
+            }, format='json')
+        self.assertEqual(yanit.data['guncellenen'], 1)
+        self.assertEqual(yanit.data['ornekler'][0]['yeni_fiyat'], Decimal('18.00'))
+        self.assertEqual(SatisFiyati.objects.get(urun=boya).kar_orani, Decimal('25.00'))
+        self.assertEqual(
+            self.client.get('/api/urunler/barkod_ara/', {'barkod': urun.barkod}).data['satis_fiyati'], 18.0
+        )
+
+        yanit = self.client.post('/api/satis-fiyatlari/toplu-guncelle/', {'kdv': 10}, format='json')
+        self.assertEqual(yanit.status_code, 400)
+
+
+class DonemselFiyatTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()  # Fiyat tablosu sürümü yenilenir
+        # Geri alınan kayıtlarla yüklenmiş tablo sonraki testlere kalmasın
+        self.addCleanup(caches['default'].clear)
+        caches[BARKOD_ONBELLEGI].clear()
+        caches[SAYAC_ONBELLEGI].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.simdi = timezone.now()
+        self.grup = MusteriGrubu.objects.create(ad='Bayi')
+
+    def fiyat(self, urun, fiyat, baslangic, bitis=None, grup=None):
+        return DonemselFiyat.objects.create(
+            urun=urun, musteri_grubu=grup, satis_fiyati=Decimal(fiyat),
+            gecerlilik_baslangic=self.simdi + baslangic,
+            gecerlilik_bitis=self.simdi + bitis if bitis is not None else None,
+        )
+
+    def test_zamandaki_fiyat_tek_sorguda_grup_oncelikli(self):
+        urun1 = self.urun_olustur(1)
+        urun2 = self.urun_olustur(2)
+        self.fiyat(urun1, '11.00', timedelta(days=-10), timedelta(0))
+        self.fiyat(urun1, '12.00', timedelta(0))
+        self.fiyat(urun1, '9.00', timedelta(0), timedelta(days=5), grup=self.grup)
+
+        with self.assertNumQueries(1):
+            gecmis = zamandaki_liste_fiyatlari([urun1.pk, urun2.pk], self.simdi - timedelta(days=1))
+        self.assertEqual(gecmis, {urun1.pk: Decimal('11.00')})
+
+        ertesi_gun = self.simdi + timedelta(days=1)
+        self.assertEqual(zamandaki_liste_fiyatlari([urun1.pk], ertesi_gun), {urun1.pk: Decimal('12.00')})
+        self.assertEqual(zamandaki_liste_fiyatlari([urun1.pk], ertesi_gun, self.grup.pk), {urun1.pk: Decimal('9.00')})
+        # Grup fiyatı bitince genel fiyata düşer
+        self.assertEqual(
+            zamandaki_liste_fiyatlari([urun1.pk], self.simdi + timedelta(days=6), self.grup.pk),
+            {urun1.pk: Decimal('12.00')}
+        )
+
+    def test_aktif_tablo_onbellekten_okunur_ve_degisiklikte_yenilenir(self):
+        urun = self.urun_olustur(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            kayit = self.fiyat(urun, '20.00', timedelta(days=-1))
+        aktif_liste_fiyatlari([urun.pk])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(aktif_liste_fiyatlari([urun.pk]), {urun.pk: Decimal('20.00')})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kayit.satis_fiyati = Decimal('22.00')
+            kayit.save()
+        self.assertEqual(aktif_liste_fiyatlari([urun.pk]), {urun.pk: Decimal('22.00')})
+
+    def test_baslayan_fiyat_barkod_yanitina_yansir(self):
+        urun = self.urun_olustur(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fiyat(urun, '30.00', timedelta(hours=1))
+
+        yanit = self.client.get('/api/urunler/barkod_ara/', {'barkod': urun.barkod})
+        self.assertEqual(yanit.data['satis_fiyati'], 15.0)
+
+        # Tablo ilk başlangıç anında kendiliğinden yenilenir, barkod kaydı silinir
+        with mock.patch('django.utils.timezone.now', return_value=self.simdi + timedelta(hours=2)):
+            yanit = self.client.get('/api/urunler/barkod_ara/', {'barkod': urun.barkod})
+        self.assertEqual(yanit.data['satis_fiyati'], 30.0)
+
+    def test_sepet_ve_satis_liste_fiyatini_kullanir(self):
+        listeli = self.urun_olustur(1, lot_miktari=50)
+        listesiz = self.urun_olustur(2, lot_miktari=50)
+        self.fiyat(listeli, '14.00', timedelta(days=-1))
+        self.fiyat(listeli, '12.00', timedelta(days=-1), grup=self.grup)
+
+        fis = sepeti_sat(self.kullanici, [(listeli.pk, 1), (listesiz.pk, 1)])
+        self.assertEqual(
+            dict(fis.satislar.values_list('urun_id', 'birim_fiyat')),
+            {listeli.pk: Decimal('14.00'), listesiz.pk: Decimal('15.00')}
+        )
+
+        yanit = self.client.post('/api/satis-fisleri/checkout/', {
+            'kalemler': [{'urun': listeli.pk, 'miktar': 2}], 'musteri_grubu': self.grup.pk
+        }, format='json')
+        self.assertEqual(yanit.status_code, 201, yanit.data)
+        fis = SatisFisi.objects.get(pk=yanit.data['id'])
+        self.assertEqual(fis.musteri_grubu, self.grup)
+        self.assertEqual(fis.toplam_tutar, Decimal('24.00'))
+
+        satis = Satis.objects.create(fis=fis, urun=listeli, miktar=Decimal('1'))
+        self.assertEqual(satis.birim_fiyat, Decimal('12.00'))
+
+    def test_liste_fiyati_sepet_sorgu_sayisini_artirmaz(self):
+        listeli = self.urun_olustur(1, lot_miktari=50)
+        listesiz = self.urun_olustur(2, lot_miktari=50)
+        self.fiyat(listeli, '14.00', timedelta(days=-1))
+        sepeti_sat(self.kullanici, [(listesiz.pk, 1)])  # Sayaç ve fiyat tablosu hazır olsun
+
+        with CaptureQueriesContext(connection) as liste:
+            sepeti_sat(self.kullanici, [(listeli.pk, 1)])
+        with CaptureQueriesContext(connection) as taban:
+            sepeti_sat(self.kullanici, [(listesiz.pk, 1)])
+        self.assertEqual(len(liste), len(taban))
+
+
+class UrunAramaTest(StokTestVerisi, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.kullanici)
+        self.yapi = Kategori.objects.create(kategori_adi='Yapı Kimyasalları')
+        self.vida = self.urun('A-1', '8690000000011', 'Vida 4x40 IŞIKLI')
+        self.vidasi = self.urun('A-2', '8690000000028', 'Ahşap Vidası')
+        self.silikon = self.urun('B-1', '8690000000035', 'Şeffaf Silikon', self.yapi)
+
+    def urun(self, stok_no, barkod, urun_adi, kategori=None):
+        return Urun.objects.create(stok_no=stok_no, barkod=barkod, urun_adi=urun_adi, kategori=kategori or self.kategori)
+
+    def ara(self, q, **parametreler):
+        yanit = self.client.get('/api/urunler/ara/', {'q': q, **parametreler})
+        self.assertEqual(yanit.status_code, 200, yanit.data)
+        return [urun['stok_no'] for urun in yanit.data]
+
+    def test_turkce_harfler_normallestirilir(self):
+        self.assertEqual(normallestir('İSTANBUL Işık ÇİVİ şeffaf'), 'istanbul isik civi seffaf')
+        self.assertEqual(self.ara('işikli'), ['A-1'])
+        self.assertEqual(self.ara('SEFFAF'), ['B-1'])
+        self.assertEqual(self.ara('ahsap'), ['A-2'])
+
+    def test_kelime_basi_eslesmesi_ve_siralama(self):
+        # "vida" kelimesi tam eşleşen ürün, "vidası" ile başlayandan önce gelir
+        self.assertEqual(self.ara('VİDA'), ['A-1', 'A-2'])
+        self.assertEqual(self.ara('vida 4x'), ['A-1'])  # Her kelime eşleşmeli
+        self.assertEqual(self.ara('idas'), [])  # Kelime ortası aranmaz
+        self.assertEqual(self.ara('8690000000035'), ['B-1'])
+        self.assertEqual(self.ara('b-1'), ['B-1'])
+        # Kategori adı eşleşmesi ad eşleşmesinden düşük puanlıdır
+        hirdavat = self.urun('C-1', '8690000000042', 'Hırdavat Seti', self.yapi)
+        self.assertEqual(self.ara('hirdavat'), [hirdavat.pk, 'A-1', 'A-2'])
+        self.assertEqual(self.ara('hirdavat', limit=1), [hirdavat.pk])
+
+    def test_dizin_kayitla_guncellenir(self):
+        self.vida.urun_adi = 'Cıvata M8'
+        self.vida.save()
+        self.assertEqual(self.ara('vida'), ['A-2'])
+        self.assertEqual(self.ara('civata'), ['A-1'])
+
+        self.yapi.kategori_adi = 'Boya'
+        self.yapi.save()
+        self.assertEqual(self.ara('yapi'), [])
+        self.assertEqual(self.ara('boya'), ['B-1'])
+
+        self.silikon.delete()
+        self.assertEqual(self.ara('boya'), [])
+
+    def test_sorgu_sayisi_ve_parametre_hatalari(self):
+        for no in range(10):
+            self.urun(f'D-{no}', f'86901{no:08d}', f'Vida Seti {no}')
+        with self.assertNumQueries(3):  # adaylar, puanlar, ürünler
+            self.assertEqual(len(self.ara('vida', limit=5)), 5)
+
+        # Genel kelimede adaylar seçici kelimeden gelir; yoksa indeks sırasıyla kırpılır
+        with mock.patch('stok_takip.servisler.arama.ADAY_SINIRI', 3):
+            self.assertEqual(self.ara('vida 4x40'), ['A-1'])
+            self.assertEqual(self.ara('vida')[:2], ['A-1', 'D-0'])
+        self.assertEqual(urun_ara('   -  '), [])
+
+        self.assertEqual(self.client.get('/api/urunler/ara/').status_code, 400)
+        self.assertEqual(self.client.get('/api/urunler/ara/', {'q': 'vida', 'limit': 1000}).status_code, 400)
+        self.assertEqual(self.client.get('/api/urunler/ara/', {'q': 'vida', 'limit': 'x'}).status_code, 400)
+
+
+@unittest.skipUnless(connection.features.has_select_for_update, 'Satır kilidi destekleyen veritabanı gerekir')
+class SatisFisiNumaraEszamanlilikTest(TransactionTestCase):
+    KASA_SAYISI = 8
+    KASA_BASINA_FIS = 25
+    AZAMI_SURE = 2.0  # saniye, tek fiş için
+
+    def test_eszamanli_kasalar_benzersiz_ve_sirali_numara_alir(self):
+        kullanici = User.objects.create_user('kasiyer')
+        sonuclar = {}
+        hatalar = []
+        baslat = threading.Barrier(self.KASA_SAYISI)
+
+        def kasa(no):
+            try:
+                baslat.wait()
+                numaralar, sureler = [], []
+                for _ in range(self.KASA_BASINA_FIS):
+                    baslangic = time.perf_counter()
+                    numaralar.append(SatisFisi.objects.create(kullanici=kullanici).fis_no)
+                    sureler.append(time.perf_counter() - baslangic)
+                sonuclar[no] = (numaralar, max(sureler))
+            except Exception as hata:  # pragma: no cover - test başarısızlığında raporlanır
+                hatalar.append(hata)
+            finally:
+                connections.close_all()
+
+        kasalar = [threading.Thread(target=kasa, args=(no,)) for no in range(self.KASA_SAYISI)]
+        for t in kasalar:
+            t.start()
+        for t in kasalar:
+            t.join()
+
+        self.assertEqual(hatalar, [])
+        tum_numaralar = []
+        for numaralar, en_uzun in sonuclar.values():
+            self.assertEqual(numaralar, sorted(numaralar))
+            self.assertLess(en_uzun, self.AZAMI_SURE)
+            tum_numaralar += numaralar
+
+        toplam = self.KASA_SAYISI * self.KASA_BASINA_FIS
+        self.assertEqual(sorted(tum_numaralar), list(range(1, toplam + 1)))
@@ -12,7 +12,7 @@ from .viewsets import (
     UrunYerlesimYeriViewSet, SatisFiyatiViewSet,
     SatisFisiViewSet, SatisViewSet, TedarikciIadeViewSet,
     MusteriIadeViewSet, KasaViewSet, AlisFisiViewSet,
-    AlisDetayViewSet, OdemeKasaViewSet
+    AlisDetayViewSet, OdemeKasaViewSet, DashboardViewSet
 )
 
 # Router oluştur
@@ -32,6 +32,7 @@ router.register(r'kasa', KasaViewSet, basename='kasa')
 router.register(r'alis-fisleri', AlisFisiViewSet, basename='alis-fisi')
 router.register(r'alis-detaylar', AlisDetayViewSet, basename='alis-detay')
 router.register(r'odemeler', OdemeKasaViewSet, basename='odeme')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
 # API root view
 @api_view(['GET'])
@@ -50,6 +51,7 @@ def api_root(request, format=None):
         'alis-fisleri': reverse('alis-fisi-list', request=request, format=format),
         'alis-detaylar': reverse('alis-detay-list', request=request, format=format),
         'odemeler': reverse('odeme-list', request=request, format=format),
+        'dashboard': reverse('dashboard-list', request=request, format=format),
     })
 
 app_name = 'stok_takip'
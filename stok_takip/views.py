@@ -1,30 +1,42 @@
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from django.db.models import Sum
-from decimal import Decimal
-from datetime import datetime, date
+from datetime import date, timedelta
 from .models import *
+from .servisler.envanter import csv_parcalari, envanter_satirlari, urunlere_grupla, xlsx_parcalari
+from .servisler.kasa import kasa_bakiyesi
+from .servisler.muhasebe import aylik_raporlar, donem_raporu
+
+
+# format: (uzantı, içerik tipi, parça üreteci)
+ENVANTER_INDIRME_BICIMLERI = {
+    'csv': ('csv', 'text/csv; charset=utf-8', csv_parcalari),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_parcalari),
+}
 
 
 @staff_member_required
 def envanter_raporu(request):
-    """Envanter raporu sayfası"""
+    """
+    Envanter raporu sayfası
+    ?format=csv|xlsx akış halinde indirilir; ?kategori= (id/ad), ?konum= (önek) süzer
+    """
+    satirlar = envanter_satirlari(
+        kategori=request.GET.get('kategori') or None,
+        konum=request.GET.get('konum') or None,
+    )
+    bicim = request.GET.get('format')
     
-    # Tüm ürünleri ve lotlarını getir
-    urunler = []
-    for urun in Urun.objects.all():
-        lotlar = UrunYerlesimYeri.objects.filter(urun=urun, miktar__gt=0)  # miktar > 0 eklendi
-        if lotlar.exists():
-            toplam_miktar = lotlar.aggregate(toplam=Sum('miktar'))['toplam'] or 0
-            urunler.append({
-                'urun': urun,
-                'toplam': toplam_miktar,
-                'lotlar': lotlar
-            })
+    if bicim in ENVANTER_INDIRME_BICIMLERI:
+        uzanti, icerik_tipi, parcalar = ENVANTER_INDIRME_BICIMLERI[bicim]
+        yanit = StreamingHttpResponse(parcalar(satirlar), content_type=icerik_tipi)
+        yanit['Content-Disposition'] = f'attachment; filename="envanter_{date.today():%Y%m%d}.{uzanti}"'
+        return yanit
     
     context = {
-        'urunler': urunler,
-        'tarih': date.today()
+        'urunler': urunlere_grupla(satirlar),
+        'tarih': date.today(),
+        'sorgu': request.GET.urlencode(),
     }
     
     return render(request, 'admin/envanter_raporu.html', context)
@@ -32,72 +44,39 @@ def envanter_raporu(request):
 
 @staff_member_required
 def muhasebe_raporu(request):
-    """Muhasebe raporu sayfası"""
-    
-    # Ay ve yıl parametreleri
-    ay = int(request.GET.get('ay', date.today().month))
-    yil = int(request.GET.get('yil', date.today().year))
+    """
+    Muhasebe raporu sayfası
+    ?ay=&yil= seçilen ay, ?ay_sayisi=N önceki aylarla yan yana,
+    ?baslangic=YYYY-AA-GG&bitis=YYYY-AA-GG herhangi bir tarih aralığı (bitiş dahil)
+    """
+    baslangic = request.GET.get('baslangic')
+    bitis = request.GET.get('bitis')
     
-    # Ay başı ve sonu
-    ay_basi = datetime(yil, ay, 1)
-    if ay == 12:
-        ay_sonu = datetime(yil + 1, 1, 1)
+    if baslangic and bitis:
+        baslangic = date.fromisoformat(baslangic)
+        bitis = date.fromisoformat(bitis)
+        raporlar = [donem_raporu(baslangic, bitis + timedelta(days=1))]
+        ay, yil = baslangic.month, baslangic.year
+        baslik = f"{baslangic.strftime('%d.%m.%Y')} - {bitis.strftime('%d.%m.%Y')}"
     else:
-        ay_sonu = datetime(yil, ay + 1, 1)
-    
-    # Kasa
-    kasa = Kasa.objects.first()
-    
-    # Satışlar
-    satislar = SatisKasa.objects.filter(
-        islem_tarihi__gte=ay_basi,
-        islem_tarihi__lt=ay_sonu
-    )
-    satis_toplam = satislar.aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-    
-    # Alışlar
-    alislar = AlisFisi.objects.filter(
-        fis_tarihi__gte=ay_basi.date(),
-        fis_tarihi__lt=ay_sonu.date()
-    )
-    alis_toplam = alislar.aggregate(toplam=Sum('toplam_tutar'))['toplam'] or Decimal('0.00')
-    
-    # Ödemeler (kategorilere göre)
-    odemeler = OdemeKasa.objects.filter(
-        odeme_tarihi__gte=ay_basi.date(),
-        odeme_tarihi__lt=ay_sonu.date()
-    )
-    
-    odeme_detay = []
-    for odeme_tip in OdemeKasa.ODEME_TIP:
-        tip_kod = odeme_tip[0]
-        tip_adi = odeme_tip[1]
-        tip_toplam = odemeler.filter(odeme_tipi=tip_kod).aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-        if tip_toplam > 0:
-            odeme_detay.append({
-                'tip': tip_adi,
-                'tutar': tip_toplam
-            })
-    
-    odeme_toplam = odemeler.aggregate(toplam=Sum('tutar'))['toplam'] or Decimal('0.00')
-    
-    # Hesaplamalar
-    toplam_gider = alis_toplam + odeme_toplam
-    net_kar = satis_toplam - toplam_gider
+        # Ay ve yıl parametreleri
+        ay = int(request.GET.get('ay', date.today().month))
+        yil = int(request.GET.get('yil', date.today().year))
+        ay_sayisi = min(max(int(request.GET.get('ay_sayisi', 1)), 1), 12)
+        
+        # Seçilen ay ve ondan önceki ay_sayisi - 1 ay
+        ilk_ay = (yil * 12 + ay - 1) - (ay_sayisi - 1)
+        raporlar = aylik_raporlar(date(ilk_ay // 12, ilk_ay % 12 + 1, 1), ay_sayisi)
+        baslik = f"{raporlar[-1].baslangic.strftime('%B')} {yil}"
     
     context = {
         'ay': ay,
         'yil': yil,
-        'ay_adi': ay_basi.strftime('%B'),
-        'kasa_bakiye': kasa.bakiye if kasa else 0,
-        'satis_toplam': satis_toplam,
-        'satis_adet': satislar.count(),
-        'alis_toplam': alis_toplam,
-        'alis_adet': alislar.count(),
-        'odeme_detay': odeme_detay,
-        'odeme_toplam': odeme_toplam,
-        'toplam_gider': toplam_gider,
-        'net_kar': net_kar,
+        'baslik': baslik,
+        'kasa_bakiye': kasa_bakiyesi(),
+        'rapor': raporlar[-1],
+        'raporlar': raporlar if len(raporlar) > 1 else [],
+        'ay_sayisi': len(raporlar),
     }
     
-    return render(request, 'admin/muhasebe_raporu.html', context)
\ No newline at end of file
+    return render(request, 'admin/muhasebe_raporu.html', context)
@@ -2,25 +2,56 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Q
+from django.db.models import Count, OuterRef, Prefetch, Subquery
 from datetime import date, timedelta
 
 from .models import (
     Kategori, Tedarikci, Urun, UrunYerlesimYeri, SatisFiyati,
     SatisFisi, Satis, TedarikciIade, MusteriIade, 
-    Kasa, SatisKasa, AlisFisi, AlisDetay, OdemeKasa
+    Kasa, KasaHareketi, SatisKasa, AlisFisi, AlisDetay, OdemeKasa
 )
 from .serializers import (
     KategoriSerializer, TedarikciSerializer, UrunSerializer,
-    UrunYerlesimYeriSerializer, SatisFiyatiSerializer,
-    SatisFisiSerializer, SatisSerializer, TedarikciIadeSerializer,
-    MusteriIadeSerializer, KasaSerializer, SatisKasaSerializer,
-    AlisFisiSerializer, AlisDetaySerializer, OdemeKasaSerializer
+    UrunYerlesimYeriSerializer, SatisFiyatiSerializer, TopluFiyatGuncelleSerializer,
+    SatisFisiSerializer, SatisFisiOzetSerializer, SepetSerializer, SatisSerializer, TedarikciIadeSerializer,
+    MusteriIadeSerializer, KasaSerializer, KasaHareketiSerializer, SatisKasaSerializer,
+    AlisFisiSerializer, AlisFisiOzetSerializer, AlisFisiTopluSerializer, AlisDetaySerializer,
+    OdemeKasaSerializer
 )
+from .pagination import StokSayfalama, HareketSayfalama
+from .servisler.arama import ARAMA_LIMITI, EN_FAZLA_SONUC, urun_ara
+from .servisler.barkod import barkod_ara, barkod_onbellek_istatistigi
+from .servisler.dashboard import dashboard_verisi, satis_ozeti
+from .servisler.fiyat_listesi import aktif_fiyat_tablosu, aktif_liste_fiyatlari
+from .servisler.kasa import kasa_bakiyesi
+from .servisler.stok import DUSUK_STOK_LIMITI, dusuk_stoklu_urunler
+
+
+def ozet_istendi(request):
+    """Liste uçlarında ?view=ozet ile satır detayı olmayan hafif görünüm istenir"""
+    return request.query_params.get('view') == 'ozet'
+
+
+def satis_fiyati_sorgusu():
+    """Ürünün satış fiyatını satır başına sorgu atmadan getiren alt sorgu"""
+    return Subquery(
+        SatisFiyati.objects.filter(urun=OuterRef('pk')).values('satis_fiyati')[:1]
+    )
+
+
+class SayiMixin:
+    """
+    Listeyi indirmeden kayıt sayısını döner
+    URL: /api/<kaynak>/sayi/
+    """
+    
+    @action(detail=False, methods=['get'])
+    def sayi(self, request):
+        return Response({'count': self.filter_queryset(self.get_queryset()).count()})
 
 
 # 1. KATEGORİ VIEWSET
-class KategoriViewSet(viewsets.ModelViewSet):
+class KategoriViewSet(SayiMixin, viewsets.ModelViewSet):
     """
     Kategori işlemleri:
     - Liste (GET /api/kategoriler/)
@@ -35,18 +66,24 @@ class KategoriViewSet(viewsets.ModelViewSet):
 
 
 # 2. TEDARİKÇİ VIEWSET
-class TedarikciViewSet(viewsets.ModelViewSet):
+class TedarikciViewSet(SayiMixin, viewsets.ModelViewSet):
     queryset = Tedarikci.objects.all()
     serializer_class = TedarikciSerializer
     permission_classes = [IsAuthenticated]
 
 
 # 3. ÜRÜN VIEWSET
-class UrunViewSet(viewsets.ModelViewSet):
+class UrunViewSet(SayiMixin, viewsets.ModelViewSet):
     queryset = Urun.objects.all()
     serializer_class = UrunSerializer
     permission_classes = [IsAuthenticated]
     
+    def get_queryset(self):
+        """Kategori adı ve satış fiyatı satır başına sorgu atmadan gelir"""
+        return Urun.objects.select_related('kategori').annotate(
+            satis_fiyati_deger=satis_fiyati_sorgusu()
+        )
+    
     @action(detail=False, methods=['get'])
     def barkod_ara(self, request):
         """
@@ -55,47 +92,103 @@ class UrunViewSet(viewsets.ModelViewSet):
         """
         barkod = request.query_params.get('barkod', None)
         if barkod:
-            try:
-                urun = Urun.objects.get(barkod=barkod)
-                serializer = self.get_serializer(urun)
-                return Response(serializer.data)
-            except Urun.DoesNotExist:
+            # Süresi dolan dönemsel fiyatların barkod kayıtları tablo yenilenirken silinir
+            aktif_fiyat_tablosu()
+            
+            def yukle():
+                urun = self.get_queryset().filter(barkod=barkod).first()
+                if urun is None:
+                    return None
+                veri = self.get_serializer(urun).data
+                liste = aktif_liste_fiyatlari([urun.pk])
+                if urun.pk in liste:
+                    veri['satis_fiyati'] = float(liste[urun.pk])
+                return urun.pk, veri
+            
+            veri = barkod_ara(barkod, yukle)
+            if veri is None:
                 return Response(
                     {'error': 'Ürün bulunamadı'},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            return Response(veri)
         return Response(
             {'error': 'Barkod parametresi gerekli'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    @action(detail=False, methods=['get'])
+    def ara(self, request):
+        """
+        Ad, stok no, barkod ve kategori adında kelime başı araması (puana göre sıralı)
+        URL: /api/urunler/ara/?q=vida 4x&limit=20
+        
+        Her kelime ürünün bir kelimesinin başıyla eşleşmeli; büyük/küçük harf ve
+        Türkçe karakter farkı (İ/ı, ş/s ...) gözetilmez. İki sorgu: dizin ve ürünler.
+        """
+        sorgu = request.query_params.get('q', '').strip()
+        if not sorgu:
+            return Response(
+                {'error': 'q parametresi gerekli'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', ARAMA_LIMITI))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= EN_FAZLA_SONUC:
+            return Response(
+                {'error': f'limit 1 ile {EN_FAZLA_SONUC} arasında olmalı'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        urun_idleri = urun_ara(sorgu, limit)
+        urunler = self.get_queryset().in_bulk(urun_idleri)
+        return Response(self.get_serializer(
+            [urunler[pk] for pk in urun_idleri if pk in urunler], many=True
+        ).data)
+    
+    @action(detail=False, methods=['get'])
+    def barkod_istatistik(self, request):
+        """
+        Barkod önbelleği isabet/ıskalama sayaçları
+        URL: /api/urunler/barkod_istatistik/
+        """
+        return Response(barkod_onbellek_istatistigi())
+    
     @action(detail=False, methods=['get'])
     def dusuk_stok(self, request):
         """
-        Düşük stoklu ürünleri listele
-        URL: /api/urunler/dusuk_stok/?limit=10
+        Düşük stoklu ürünleri listele (sayfalı)
+        URL: /api/urunler/dusuk_stok/?limit=10&page=1
+        
+        Eşik sırasıyla ürünün, kategorisinin yeniden sipariş noktası ya da
+        limit parametresidir. Toplam stok ürünün stok sayacından okunur.
         """
-        limit = int(request.query_params.get('limit', 10))
+        try:
+            limit = int(request.query_params.get('limit', DUSUK_STOK_LIMITI))
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            return Response(
+                {'error': 'limit sıfır ya da pozitif bir tam sayı olmalı'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Her ürün için toplam stok hesapla
-        urunler = []
-        for urun in Urun.objects.all():
-            toplam_stok = UrunYerlesimYeri.objects.filter(
-                urun=urun
-            ).aggregate(toplam=Sum('miktar'))['toplam'] or 0
-            
-            if toplam_stok <= limit:
-                urunler.append(urun)
+        urunler = dusuk_stoklu_urunler(self.get_queryset(), limit).order_by('toplam_stok', 'stok_no')
         
-        serializer = self.get_serializer(urunler, many=True)
-        return Response(serializer.data)
+        sayfalama = StokSayfalama()
+        sayfa = sayfalama.paginate_queryset(urunler, request, view=self)
+        serializer = self.get_serializer(sayfa, many=True)
+        return sayfalama.get_paginated_response(serializer.data)
 
 
 # 4. ÜRÜN YERLEŞİM YERİ VIEWSET
-class UrunYerlesimYeriViewSet(viewsets.ModelViewSet):
-    queryset = UrunYerlesimYeri.objects.all()
+class UrunYerlesimYeriViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = UrunYerlesimYeri.objects.select_related('urun')
     serializer_class = UrunYerlesimYeriSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HareketSayfalama
     
     @action(detail=False, methods=['get'])
     def skt_yaklasiyor(self, request):
@@ -107,7 +200,7 @@ class UrunYerlesimYeriViewSet(viewsets.ModelViewSet):
         bugun = date.today()
         gelecek = bugun + timedelta(days=gun)
         
-        yerlesimler = UrunYerlesimYeri.objects.filter(
+        yerlesimler = self.get_queryset().filter(
             son_kullanma_tarihi__lte=gelecek,
             son_kullanma_tarihi__gte=bugun,
             miktar__gt=0
@@ -118,17 +211,58 @@ class UrunYerlesimYeriViewSet(viewsets.ModelViewSet):
 
 
 # 5. SATIŞ FİYATI VIEWSET
-class SatisFiyatiViewSet(viewsets.ModelViewSet):
-    queryset = SatisFiyati.objects.all()
+class SatisFiyatiViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = SatisFiyati.objects.select_related('urun').order_by('urun')
     serializer_class = SatisFiyatiSerializer
     permission_classes = [IsAuthenticated]
+    
+    @action(detail=False, methods=['post'], url_path='toplu-guncelle')
+    def toplu_guncelle(self, request):
+        """
+        Kategori/tedarikçi/ürün listesine göre kâr, KDV veya iskonto oranını
+        değiştirip satış fiyatlarını tek sorguda yeniden hesaplar
+        URL: POST /api/satis-fiyatlari/toplu-guncelle/ (kuru_calisma: true ile önizleme)
+        """
+        serializer = TopluFiyatGuncelleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
 
 
 # 6. SATIŞ FİŞİ VIEWSET
-class SatisFisiViewSet(viewsets.ModelViewSet):
+class SatisFisiViewSet(SayiMixin, viewsets.ModelViewSet):
+    """
+    Satış fişleri; ?view=ozet ile satış satırları olmadan listelenir
+    """
     queryset = SatisFisi.objects.all()
     serializer_class = SatisFisiSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HareketSayfalama
+    
+    def get_queryset(self):
+        fisler = SatisFisi.objects.select_related('kullanici').order_by('-olusturma_tarihi')
+        if ozet_istendi(self.request):
+            return fisler.annotate(urun_sayisi=Count('satislar'))
+        return fisler.prefetch_related(
+            Prefetch('satislar', queryset=Satis.objects.select_related('urun'))
+        )
+    
+    def get_serializer_class(self):
+        if ozet_istendi(self.request):
+            return SatisFisiOzetSerializer
+        return SatisFisiSerializer
+    
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        """
+        Sepetin tamamını tek seferde satar; stok yetmeyen satır varsa hiçbir şey yazılmaz
+        URL: POST /api/satis-fisleri/checkout/
+        """
+        serializer = SepetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fis = serializer.save(kullanici=request.user)
+        
+        fis = self.get_queryset().get(pk=fis.pk)
+        return Response(SatisFisiSerializer(fis).data, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['get'])
     def bugun(self, request):
@@ -137,7 +271,7 @@ class SatisFisiViewSet(viewsets.ModelViewSet):
         URL: /api/satis-fisleri/bugun/
         """
         bugun = date.today()
-        fisler = SatisFisi.objects.filter(
+        fisler = self.get_queryset().filter(
             olusturma_tarihi__date=bugun
         )
         serializer = self.get_serializer(fisler, many=True)
@@ -146,78 +280,129 @@ class SatisFisiViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def ozet(self, request):
         """
-        Satış özeti
+        Satış özeti (kısa süreli önbellekten)
         URL: /api/satis-fisleri/ozet/
         """
-        bugun = date.today()
-        
-        # Bugün
-        bugun_satis = SatisFisi.objects.filter(
-            olusturma_tarihi__date=bugun
-        ).aggregate(toplam=Sum('toplam_tutar'))['toplam'] or 0
-        
-        # Bu ay
-        ay_satis = SatisFisi.objects.filter(
-            olusturma_tarihi__year=bugun.year,
-            olusturma_tarihi__month=bugun.month
-        ).aggregate(toplam=Sum('toplam_tutar'))['toplam'] or 0
-        
-        return Response({
-            'bugun': float(bugun_satis),
-            'bu_ay': float(ay_satis),
-            'fis_sayisi': SatisFisi.objects.filter(
-                olusturma_tarihi__date=bugun
-            ).count()
-        })
+        return Response(satis_ozeti())
 
 
 # 7. SATIŞ VIEWSET
-class SatisViewSet(viewsets.ModelViewSet):
-    queryset = Satis.objects.all()
+class SatisViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = Satis.objects.select_related('urun')
     serializer_class = SatisSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HareketSayfalama
 
 
 # 8. TEDARİKÇİ İADE VIEWSET
-class TedarikciIadeViewSet(viewsets.ModelViewSet):
-    queryset = TedarikciIade.objects.all()
+class TedarikciIadeViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = TedarikciIade.objects.select_related('urun', 'tedarikci')
     serializer_class = TedarikciIadeSerializer
     permission_classes = [IsAuthenticated]
 
 
 # 9. MÜŞTERİ İADE VIEWSET
-class MusteriIadeViewSet(viewsets.ModelViewSet):
-    queryset = MusteriIade.objects.all()
+class MusteriIadeViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = MusteriIade.objects.select_related('urun')
     serializer_class = MusteriIadeSerializer
     permission_classes = [IsAuthenticated]
 
 
 # 10. KASA VIEWSET
-class KasaViewSet(viewsets.ReadOnlyModelViewSet):
+class KasaViewSet(SayiMixin, viewsets.ReadOnlyModelViewSet):
     """
     Kasa sadece okunabilir (güncelleme otomatik)
+    Bakiye kasa defterinden (son özet + sonraki hareketler) hesaplanır
     """
-    queryset = Kasa.objects.all()
+    queryset = Kasa.objects.order_by('pk')
     serializer_class = KasaSerializer
     permission_classes = [IsAuthenticated]
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve'):
+            context['kasa_bakiyesi'] = kasa_bakiyesi()
+        return context
+    
+    @action(detail=False, methods=['get'], pagination_class=HareketSayfalama)
+    def hareketler(self, request):
+        """
+        Kasa defteri
+        URL: /api/kasa/hareketler/
+        """
+        hareketler = self.paginate_queryset(KasaHareketi.objects.all())
+        serializer = KasaHareketiSerializer(hareketler, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # 11. ALIŞ FİŞİ VIEWSET
-class AlisFisiViewSet(viewsets.ModelViewSet):
+class AlisFisiViewSet(SayiMixin, viewsets.ModelViewSet):
+    """
+    Alış fişleri; ?view=ozet ile detay satırları olmadan listelenir
+    """
     queryset = AlisFisi.objects.all()
     serializer_class = AlisFisiSerializer
     permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        fisler = AlisFisi.objects.select_related('tedarikci', 'kullanici').order_by('-fis_tarihi', '-id')
+        if ozet_istendi(self.request):
+            return fisler.annotate(urun_sayisi=Count('detaylar'))
+        return fisler.prefetch_related(
+            Prefetch('detaylar', queryset=AlisDetay.objects.select_related('urun'))
+        )
+    
+    def get_serializer_class(self):
+        if ozet_istendi(self.request):
+            return AlisFisiOzetSerializer
+        return AlisFisiSerializer
+    
+    @action(detail=False, methods=['post'])
+    def toplu(self, request):
+        """
+        Fiş başlığı ve tüm satırlarla mal kabul (tek transaction)
+        URL: POST /api/alis-fisleri/toplu/
+        """
+        serializer = AlisFisiTopluSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fis = serializer.save(kullanici=request.user)
+        
+        fis = self.get_queryset().get(pk=fis.pk)
+        return Response(AlisFisiSerializer(fis).data, status=status.HTTP_201_CREATED)
 
 
 # 12. ALIŞ DETAY VIEWSET
-class AlisDetayViewSet(viewsets.ModelViewSet):
-    queryset = AlisDetay.objects.all()
+class AlisDetayViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = AlisDetay.objects.select_related('urun')
     serializer_class = AlisDetaySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HareketSayfalama
 
 
 # 13. ÖDEME VIEWSET
-class OdemeKasaViewSet(viewsets.ModelViewSet):
-    queryset = OdemeKasa.objects.all()
+class OdemeKasaViewSet(SayiMixin, viewsets.ModelViewSet):
+    queryset = OdemeKasa.objects.select_related('kullanici')
     serializer_class = OdemeKasaSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    permission_classes = [IsAuthenticated]
+    pagination_class = HareketSayfalama
+
+
+# 14. DASHBOARD VIEWSET
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    Dashboard rakamları ve bugünün son fişleri tek yanıtta
+    URL: /api/dashboard/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        son_fisler = SatisFisi.objects.filter(
+            olusturma_tarihi__date=date.today()
+        ).select_related('kullanici').annotate(
+            urun_sayisi=Count('satislar')
+        ).order_by('-olusturma_tarihi')[:5]
+        
+        return Response({
+            **dashboard_verisi(),
+            'son_satislar': SatisFisiOzetSerializer(son_fisler, many=True).data,
+        })